@@ -48,7 +48,10 @@ classes = [
     DRG_OT_randomize_camera_position,
     DRG_OT_randomize_scene,
     # DRG_OT_render_scene,
+    DRG_OT_render_job,
+    DRG_OT_cancel_render_job,
     DRG_OT_confirm_rendering,
+    DRG_OT_resume_rendering,
     DRG_OT_path_filebrowser,
     # DRG_OT_test,
     # UI
@@ -89,8 +92,19 @@ classes = [
 class_register, class_unregister = bpy.utils.register_classes_factory(classes)
 
 
+file_change_handler_lists = [
+    bpy.app.handlers.load_post,
+    bpy.app.handlers.undo_post,
+    bpy.app.handlers.redo_post,
+]
+file_change_handlers = [clear_interface_identifiers, clear_sky_library_cache]
+
+
 def register():
     class_register()
+    for handler_list in file_change_handler_lists:
+        for handler in file_change_handlers:
+            handler_list.append(handler)
     # PROPERTIES
     bpy.types.Scene.render_index = bpy.props.IntProperty(
         name="render_index", default=0, min=0
@@ -105,6 +119,113 @@ def register():
     bpy.types.Scene.datalogger_name = bpy.props.StringProperty(
         name="datalogger_name", default = "dining_room_dataset_logger"
     )
+    bpy.types.Scene.scene_ready_timeout = bpy.props.FloatProperty(
+        name="scene_ready_timeout", default=20.0, min=0.0
+    )
+    bpy.types.Scene.scene_ready_stable_time = bpy.props.FloatProperty(
+        name="scene_ready_stable_time", default=2.0, min=0.0
+    )
+    bpy.types.Scene.exposure_mode = bpy.props.EnumProperty(
+        name="exposure_mode",
+        items=[
+            (
+                "PHOTOGRAPHER",
+                "Photographer Addon",
+                "Wait until the Photographer addon settled the exposure",
+            ),
+            (
+                "NATIVE",
+                "Built-in",
+                "Compute the exposure from a low sample preview render",
+            ),
+        ],
+        default="PHOTOGRAPHER",
+    )
+    bpy.types.Scene.auto_exposure_key = bpy.props.FloatProperty(
+        name="auto_exposure_key", default=0.18, min=0.001, max=1.0
+    )
+    bpy.types.Scene.auto_exposure_resolution = bpy.props.IntProperty(
+        name="auto_exposure_resolution", default=10, min=1, max=100
+    )
+    bpy.types.Scene.auto_exposure_samples = bpy.props.IntProperty(
+        name="auto_exposure_samples", default=16, min=1
+    )
+    bpy.types.Scene.mask_render_mode = bpy.props.EnumProperty(
+        name="mask_render_mode",
+        items=[
+            (
+                "FULL",
+                "Full",
+                "Render the masks with the settings saved in the .blend file",
+            ),
+            (
+                "FLAT",
+                "Flat",
+                "Render the masks with 1 sample, no bounces and a box filter",
+            ),
+        ],
+        default="FULL",
+    )
+    bpy.types.Scene.use_persistent_data = bpy.props.BoolProperty(
+        name="use_persistent_data", default=False
+    )
+    bpy.types.Scene.use_render_budget = bpy.props.BoolProperty(
+        name="use_render_budget", default=False
+    )
+    bpy.types.Scene.render_noise_threshold = bpy.props.FloatProperty(
+        name="render_noise_threshold", default=0.01, min=0.0, precision=4
+    )
+    bpy.types.Scene.render_min_samples = bpy.props.IntProperty(
+        name="render_min_samples", default=0, min=0
+    )
+    bpy.types.Scene.render_max_samples = bpy.props.IntProperty(
+        name="render_max_samples", default=1024, min=1
+    )
+    bpy.types.Scene.render_time_limit = bpy.props.FloatProperty(
+        name="render_time_limit", default=0.0, min=0.0
+    )
+    bpy.types.Scene.light_path_profile = bpy.props.EnumProperty(
+        name="light_path_profile",
+        items=[("FILE", "File", "Keep the light path settings of the .blend file")]
+        + [
+            (profile_name, profile_name.capitalize(), f"{profile_name} light paths")
+            for profile_name in LIGHT_PATH_PROFILES
+        ],
+        default="FILE",
+    )
+    bpy.types.Scene.use_window_portals = bpy.props.BoolProperty(
+        name="use_window_portals", default=False
+    )
+    bpy.types.Scene.max_indoor_lights = bpy.props.IntProperty(
+        name="max_indoor_lights", default=0, min=0
+    )
+    bpy.types.Scene.use_screen_space_lod = bpy.props.BoolProperty(
+        name="use_screen_space_lod", default=False
+    )
+    bpy.types.Scene.lod_full_detail_size = bpy.props.IntProperty(
+        name="lod_full_detail_size", default=256, min=1
+    )
+    bpy.types.Scene.use_camera_culling = bpy.props.BoolProperty(
+        name="use_camera_culling", default=False
+    )
+    bpy.types.Scene.camera_cull_margin = bpy.props.FloatProperty(
+        name="camera_cull_margin", default=0.1, min=0.0
+    )
+    bpy.types.Scene.sky_library_path = bpy.props.StringProperty(
+        name="sky_library_path", default="", subtype="DIR_PATH"
+    )
+    bpy.types.Scene.sky_library_memory_mb = bpy.props.IntProperty(
+        name="sky_library_memory_mb", default=512, min=1
+    )
+    bpy.types.Scene.camera_views_per_scene = bpy.props.IntProperty(
+        name="camera_views_per_scene", default=1, min=1
+    )
+    for stage in SceneRenderer.variation_stages:
+        setattr(
+            bpy.types.Scene,
+            f"variation_rate_{stage}",
+            bpy.props.IntProperty(name=f"variation_rate_{stage}", default=1, min=1),
+        )
 
 
 def unregister():
@@ -113,6 +234,35 @@ def unregister():
     del bpy.types.Scene.amount_of_imgs
     del bpy.types.Scene.render_filepath
     del bpy.types.Scene.datalogger_name
+    del bpy.types.Scene.scene_ready_timeout
+    del bpy.types.Scene.scene_ready_stable_time
+    del bpy.types.Scene.exposure_mode
+    del bpy.types.Scene.auto_exposure_key
+    del bpy.types.Scene.auto_exposure_resolution
+    del bpy.types.Scene.auto_exposure_samples
+    del bpy.types.Scene.mask_render_mode
+    del bpy.types.Scene.use_persistent_data
+    del bpy.types.Scene.use_render_budget
+    del bpy.types.Scene.render_noise_threshold
+    del bpy.types.Scene.render_min_samples
+    del bpy.types.Scene.render_max_samples
+    del bpy.types.Scene.render_time_limit
+    del bpy.types.Scene.camera_views_per_scene
+    del bpy.types.Scene.max_indoor_lights
+    del bpy.types.Scene.use_window_portals
+    del bpy.types.Scene.light_path_profile
+    del bpy.types.Scene.sky_library_path
+    del bpy.types.Scene.sky_library_memory_mb
+    del bpy.types.Scene.use_screen_space_lod
+    del bpy.types.Scene.lod_full_detail_size
+    del bpy.types.Scene.use_camera_culling
+    del bpy.types.Scene.camera_cull_margin
+    for stage in SceneRenderer.variation_stages:
+        delattr(bpy.types.Scene, f"variation_rate_{stage}")
+    for handler_list in file_change_handler_lists:
+        for handler in file_change_handlers:
+            if handler in handler_list:
+                handler_list.remove(handler)
     class_unregister()
 
 
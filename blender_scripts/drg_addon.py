@@ -1,11 +1,14 @@
 import os
-from typing import Callable, List, Set
+import collections
+import contextlib
+import tempfile
+from typing import Set
 import bpy
-import bmesh
 import random
 import numpy as np
 import json
 import math
+import re
 import pathlib
 import time
 import datetime
@@ -13,6 +16,15 @@ import csv
 import mathutils
 from bpy_extras.io_utils import ImportHelper
 
+try:
+    from . import drg_dataset
+    from . import drg_sky_library
+    from . import drg_floor_plan
+except ImportError:
+    import drg_dataset
+    import drg_sky_library
+    import drg_floor_plan
+
 
 class DataLogger:
     _instance = None
@@ -28,7 +40,16 @@ class DataLogger:
         self.scene_index = 0
         self.scene_datetime = datetime.datetime.now()
         self.scene_seed = 0
+        self.scene_view_index = 0
+        self.scene_view_scene_index = 0
         self.scene_render_time = 0
+        self.scene_wait_time = 0
+        self.scene_render_samples = 0
+        self.scene_sync_time = 0
+        self.scene_sampling_time = 0
+        self.scene_light_path_profile = "FILE"
+        self.scene_cull_candidates = 0
+        self.scene_culled_instances = 0
         self.start_exec_render_time = 0
 
         # Camera
@@ -40,6 +61,7 @@ class DataLogger:
         # Lighting
         self.light_indoor_lighting = False
         self.light_amount_of_lights = 0
+        self.light_nominal_amount_of_lights = 0
         self.light_dist_seed = 0
         self.light_lamp_temp = 0
         self.sun_intensity = 0
@@ -48,6 +70,7 @@ class DataLogger:
         self.air_density = 0
         self.dust_density = 0
         self.ozone_density = 0
+        self.sky_library_entry = ""
 
         # Room
         self.room_area = 0
@@ -67,6 +90,7 @@ class DataLogger:
         self.room_glass_thickness = 0
         self.room_window_height_pos = 0
         self.room_window_dist_seed = 0
+        self.room_amount_of_window_portals = 0
         self.room_wall_mat = ""
         self.room_wall_col_palette = ""
         self.room_wall_mat_rot = (0, 0, 0)
@@ -159,6 +183,7 @@ class DataLogger:
 
         # Glass
         self.glass_lod = 0
+        self.glass_projected_size = 0
         self.glass_height = 0
         self.glass_thickness = 0
         self.glass_base_diameter = 0
@@ -199,6 +224,8 @@ class DataLogger:
         self.plate_crumb_geometry_seed = 0
         self.plate_crumb_distribution_seed = 0
         self.plate_crumb_scale_seed = 0
+        self.plate_projected_size = 0
+        self.plate_subdivision_levels = 2
 
         ## WIP: PLATE ALTERNATIVES ARE MISSING
         ## WIP: RANDOM OBJECTS ON PLATE ARE MISSING
@@ -207,6 +234,7 @@ class DataLogger:
         self.spoon_length = 0
         self.spoon_thickness = 0
         self.spoon_lod = 0
+        self.spoon_projected_size = 0
         self.spoon_bowl_length = 0
         self.spoon_bowl_width = 0
         self.spoon_bowl_depth = 0
@@ -261,13 +289,23 @@ class DataLogger:
             "index",
             "datetime",
             "scene_seed",
+            "view_index",
+            "view_scene_index",
             "render_time",
+            "scene_wait_time",
+            "render_samples",
+            "sync_time",
+            "sampling_time",
+            "light_path_profile",
+            "cull_candidates",
+            "culled_instances",
             "camera_height",
             "camera_position_seed",
             "camera_focal_length",
             "camera_exposure",
             "indoor_lighting",
             "amount_of_lights",
+            "nominal_amount_of_lights",
             "light_distribution_seed",
             "lamp_temperature",
             "sun_intensity",
@@ -276,6 +314,7 @@ class DataLogger:
             "air_density",
             "dust_density",
             "ozone_density",
+            "sky_library_entry",
             "room_area",
             "room_generator_seed",
             "wall_height",
@@ -293,6 +332,7 @@ class DataLogger:
             "glass_thickness",
             "window_height_position",
             "window_distribution_seed",
+            "amount_of_window_portals",
             "wall_material",
             "wall_material_color_palette",
             "wall_material_rotation",
@@ -375,6 +415,7 @@ class DataLogger:
             "fork_handle_end_width",
             "fork_handle_end_curvature",
             "glass_lod",
+            "glass_projected_size",
             "glass_height",
             "glass_thickness",
             "glass_base_diameter",
@@ -411,9 +452,12 @@ class DataLogger:
             "plate_crumb_geometry_seed",
             "plate_crumb_distribution_seed",
             "plate_crumb_scale_seed",
+            "plate_projected_size",
+            "plate_subdivision_levels",
             "spoon_length",
             "spoon_thickness",
             "spoon_lod",
+            "spoon_projected_size",
             "spoon_bowl_length",
             "spoon_bowl_width",
             "spoon_bowl_depth",
@@ -435,19 +479,35 @@ class DataLogger:
             "napkin_random_colors",
         ]
 
-    def add_entry_to_csv(self):
+    def get_csv_entry(self):
+        """
+        Returns the logged values of the current scene
+
+        Returns:
+        - datapoint_entry_dict (dict): csv column name -> logged value
+        """
 
         scene_attribute_values = [
             self.scene_index,
             self.scene_datetime,
             self.scene_seed,
+            self.scene_view_index,
+            self.scene_view_scene_index,
             self.scene_render_time,
+            self.scene_wait_time,
+            self.scene_render_samples,
+            self.scene_sync_time,
+            self.scene_sampling_time,
+            self.scene_light_path_profile,
+            self.scene_cull_candidates,
+            self.scene_culled_instances,
             self.camera_height,
             self.camera_pos_seed,
             self.camera_focal_length,
             self.camera_exposure,
             self.light_indoor_lighting,
             self.light_amount_of_lights,
+            self.light_nominal_amount_of_lights,
             self.light_dist_seed,
             self.light_lamp_temp,
             self.sun_intensity,
@@ -456,6 +516,7 @@ class DataLogger:
             self.air_density,
             self.dust_density,
             self.ozone_density,
+            self.sky_library_entry,
             self.room_area,
             self.room_generator_seed,
             self.room_wall_height,
@@ -473,6 +534,7 @@ class DataLogger:
             self.room_glass_thickness,
             self.room_window_height_pos,
             self.room_window_dist_seed,
+            self.room_amount_of_window_portals,
             self.room_wall_mat,
             self.room_wall_col_palette,
             self.room_wall_mat_rot,
@@ -555,6 +617,7 @@ class DataLogger:
             self.fork_handle_end_width,
             self.fork_handle_end_curvature,
             self.glass_lod,
+            self.glass_projected_size,
             self.glass_height,
             self.glass_thickness,
             self.glass_base_diameter,
@@ -591,9 +654,12 @@ class DataLogger:
             self.plate_crumb_geometry_seed,
             self.plate_crumb_distribution_seed,
             self.plate_crumb_scale_seed,
+            self.plate_projected_size,
+            self.plate_subdivision_levels,
             self.spoon_length,
             self.spoon_thickness,
             self.spoon_lod,
+            self.spoon_projected_size,
             self.spoon_bowl_length,
             self.spoon_bowl_width,
             self.spoon_bowl_depth,
@@ -620,6 +686,12 @@ class DataLogger:
             for i in range(len(self.scene_attribute_keys))
         }
 
+        return datapoint_entry_dict
+
+    def add_entry_to_csv(self, datapoint_entry_dict=None):
+        if datapoint_entry_dict is None:
+            datapoint_entry_dict = self.get_csv_entry()
+
         with open(
             f"{bpy.context.scene.render_filepath}/{self.csv_file_name}.csv",
             "a",
@@ -628,7 +700,7 @@ class DataLogger:
             writer = csv.DictWriter(csvfile, fieldnames=self.scene_attribute_keys)
             writer.writerow(datapoint_entry_dict)
 
-    def create_csv(self):
+    def create_csv(self, datapoint_entry_dict=None):
         with open(
             f"{bpy.context.scene.render_filepath}/{self.csv_file_name}.csv",
             "w",
@@ -637,15 +709,28 @@ class DataLogger:
             writer = csv.DictWriter(csvfile, fieldnames=self.scene_attribute_keys)
             writer.writeheader()
 
-        self.add_entry_to_csv()
+        self.add_entry_to_csv(datapoint_entry_dict)
+
+    def create_or_append_csv(self, datapoint_entry_dict=None):
+        """
+        Writes a row to the csv-file, the header is written if the file is new
+
+        Args:
+        - datapoint_entry_dict (dict, optional): The row to write,
+            defaults to the values of the current scene
+        """
 
-    def create_or_append_csv(self):
         if pathlib.Path(
             f"{bpy.context.scene.render_filepath}/{self.csv_file_name}.csv"
         ).exists():
-            self.add_entry_to_csv()
+            self.add_entry_to_csv(datapoint_entry_dict)
         else:
-            self.create_csv()
+            self.create_csv(datapoint_entry_dict)
+
+    def datalog_render_stats(self, render_stats):
+        self.scene_render_samples = render_stats.samples
+        self.scene_sync_time = render_stats.sync_time
+        self.scene_sampling_time = render_stats.sampling_time
 
     def datalog_camera(self, camera_randomizer):
         self.camera_height = camera_randomizer.camera_height
@@ -656,6 +741,7 @@ class DataLogger:
     def datalog_lighting(self, procedural_room, lighting_randomizer):
         self.light_indoor_lighting = procedural_room.indoor_lighting
         self.light_amount_of_lights = procedural_room.amount_of_lights
+        self.light_nominal_amount_of_lights = procedural_room.nominal_amount_of_lights
         self.light_dist_seed = procedural_room.light_distribution_random_seed
         self.light_lamp_temp = lighting_randomizer.lamp_temperature
         self.sun_intensity = lighting_randomizer.sun_intensity
@@ -664,6 +750,7 @@ class DataLogger:
         self.air_density = lighting_randomizer.air_density
         self.dust_density = lighting_randomizer.dust_density
         self.ozone_density = lighting_randomizer.ozone_density
+        self.sky_library_entry = lighting_randomizer.sky_library_entry
 
     def datalog_room(self, procedural_room):
         self.room_area = procedural_room.room_area
@@ -683,6 +770,7 @@ class DataLogger:
         self.room_glass_thickness = procedural_room.glass_thickness
         self.room_window_height_pos = procedural_room.window_height_pos
         self.room_window_dist_seed = procedural_room.window_distribution_random_seed
+        self.room_amount_of_window_portals = procedural_room.amount_of_window_portals
         self.room_wall_mat = procedural_room.room_wall_mat
         self.room_wall_col_palette = procedural_room.room_wall_col_palette
         self.room_wall_mat_rot = procedural_room.room_wall_mat_rot
@@ -821,11 +909,22 @@ class DataLogger:
         self.plate_base_radius = procedural_plate.base_radius
         self.plate_base_height = procedural_plate.base_height
         self.plate_base_width = procedural_plate.base_width
+        self.datalog_plate_crumbs(procedural_plate)
+
+    def datalog_plate_crumbs(self, procedural_plate):
         self.plate_dirt_pattern_seed = procedural_plate.dirt_pattern_seed
         self.plate_crumb_geometry_seed = procedural_plate.crumb_geometry_seed
         self.plate_crumb_distribution_seed = procedural_plate.crumb_distribution_seed
         self.plate_crumb_scale_seed = procedural_plate.crumb_scale_seed
 
+    def datalog_level_of_detail(self, screen_space_lod):
+        self.spoon_lod = screen_space_lod.spoon_lod
+        self.spoon_projected_size = screen_space_lod.spoon_projected_size
+        self.glass_lod = screen_space_lod.glass_lod
+        self.glass_projected_size = screen_space_lod.glass_projected_size
+        self.plate_projected_size = screen_space_lod.plate_projected_size
+        self.plate_subdivision_levels = screen_space_lod.plate_subdivision_levels
+
     def datalog_spoon(self, procedural_spoon):
         self.spoon_length = procedural_spoon.length
         self.spoon_thickness = procedural_spoon.thickness
@@ -1021,6 +1120,8 @@ class LightingRandomizer:
         self.air_density = 0
         self.dust_density = 0
         self.ozone_density = 0
+        # Name of the used entry of the sky library, empty without library
+        self.sky_library_entry = ""
 
     def randomize_indoor_lighting(self, context):
 
@@ -1034,6 +1135,17 @@ class LightingRandomizer:
             "Temperature"
         ].default_value = self.lamp_temperature
 
+    def apply_light_budget(self, procedural_room):
+        """
+        Scales the energy of the room lights, so the lights of the light
+        budget emit the flux of the nominal amount of lights with the same
+        lamp temperature
+        """
+
+        bpy.data.objects["room_light"].data.energy = (
+            self.light_bulb_watt_strength * procedural_room.light_energy_scale
+        )
+
     def randomize_environment_lighting(self, context):
 
         self.sun_intensity = np.random.choice(np.arange(0, 1000, 10))
@@ -1057,6 +1169,334 @@ class LightingRandomizer:
         sky_texture_node.ozone_density = self.ozone_density
 
 
+class SkyLibrary:
+    """
+    Bakes the Nishita sky texture of the World into a library of
+    equirectangular images and replaces the sky texture by the nearest baked
+    entry at render time. Each entry consists of the sky without sun disc and
+    of the sun disc alone at sun intensity 1, the world of the library adds
+    both with the sun intensity as strength of the disc and rotates them by
+    the sun rotation.
+    """
+
+    _instance = None
+
+    world_name = "drg_sky_library_world"
+
+    # Loaded images, least recently used first. Class attribute, the
+    # constructor of the singleton must not forget the loaded images. Cleared
+    # by clear_sky_library_cache when a file is loaded or a step is undone.
+    loaded_images = collections.OrderedDict()
+    # library path -> (modification time of the index file, index)
+    loaded_indices = {}
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SkyLibrary, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.sky_world_name = "World"
+        self.bake_scene_name = "drg_sky_bake"
+
+    def bake(self, library_path, grid, resolution=512, samples=16):
+        """
+        Renders every entry of the grid with a panoramic camera that only sees
+        the World and writes the images and the index.json to library_path.
+        Entries that are already in the index are skipped.
+
+        Args:
+        - library_path (str): folder of the library
+        - grid (dict): parameter -> (minimum, maximum, amount of steps)
+        - resolution (int): width of the equirectangular images
+        - samples (int): samples per image, the sky has no noisy light paths
+
+        Returns:
+        - sky_library_index (drg_sky_library.SkyLibraryIndex): the index
+        """
+
+        library_path = pathlib.Path(library_path)
+        sky_library_index = drg_sky_library.SkyLibraryIndex.load(library_path)
+        if sky_library_index is None or sky_library_index.grid != grid:
+            sky_library_index = drg_sky_library.SkyLibraryIndex(library_path, grid)
+
+        world = bpy.data.worlds[self.sky_world_name]
+        sky_texture_node = world.node_tree.nodes["Sky Texture"]
+
+        bake_scene = bpy.data.scenes.new(self.bake_scene_name)
+        bake_scene.world = world
+        bake_scene.render.engine = "CYCLES"
+        bake_scene.cycles.samples = samples
+        bake_scene.cycles.use_denoising = False
+        bake_scene.render.resolution_x = resolution
+        bake_scene.render.resolution_y = resolution // 2
+        bake_scene.render.resolution_percentage = 100
+        bake_scene.render.use_compositing = False
+        bake_scene.render.image_settings.file_format = "OPEN_EXR"
+        bake_scene.render.image_settings.color_depth = "32"
+
+        camera_data = bpy.data.cameras.new(self.bake_scene_name)
+        camera_data.type = "PANO"
+        camera_data.panorama_type = "EQUIRECTANGULAR"
+        camera_obj = bpy.data.objects.new(self.bake_scene_name, camera_data)
+        # Maps the panorama like an Environment Texture without rotation
+        camera_obj.rotation_euler = (math.pi / 2, 0, -math.pi / 2)
+        bake_scene.collection.objects.link(camera_obj)
+        bake_scene.camera = camera_obj
+
+        bake_path = library_path / f"drg_sky_bake_{os.getpid()}.exr"
+        try:
+            with temporary_attributes(
+                sky_texture_node,
+                sun_size=math.radians(2),
+                sun_rotation=0,
+                altitude=0,
+                sun_intensity=1,
+            ):
+                for entry_name, params in drg_sky_library.iter_grid(grid):
+                    if entry_name in sky_library_index.entries:
+                        continue
+
+                    for name, value in params.items():
+                        setattr(sky_texture_node, name, value)
+
+                    sky_texture_node.sun_disc = False
+                    sky_pixels = self.render_panorama(bake_scene, bake_path)
+                    sky_texture_node.sun_disc = True
+                    disc_pixels = (
+                        self.render_panorama(bake_scene, bake_path) - sky_pixels
+                    )
+                    disc_pixels[..., 3] = 1
+
+                    sky_file_name = f"{entry_name}_sky.exr"
+                    disc_file_name = f"{entry_name}_disc.exr"
+                    self.save_pixels(sky_pixels, library_path / sky_file_name)
+                    self.save_pixels(
+                        np.maximum(disc_pixels, 0), library_path / disc_file_name
+                    )
+                    sky_library_index.add(
+                        entry_name, params, sky_file_name, disc_file_name
+                    )
+                    # Saved after every entry, an interrupted bake continues
+                    sky_library_index.save()
+                    print(f"Baked {entry_name}: {params}")
+        finally:
+            bake_path.unlink(missing_ok=True)
+            bpy.data.objects.remove(camera_obj)
+            bpy.data.cameras.remove(camera_data)
+            bpy.data.scenes.remove(bake_scene)
+
+        sky_library_index.save()
+
+        return sky_library_index
+
+    def render_panorama(self, bake_scene, bake_path):
+        bake_scene.render.filepath = str(bake_path)
+        bpy.ops.render.render(write_still=True, scene=bake_scene.name)
+
+        return read_image_pixels(bake_path)
+
+    def save_pixels(self, pixels, filepath):
+        height, width = pixels.shape[:2]
+        image = bpy.data.images.new(
+            filepath.stem, width=width, height=height, alpha=True, float_buffer=True
+        )
+        try:
+            image.pixels.foreach_set(pixels.astype(np.float32).ravel())
+            image.filepath_raw = str(filepath)
+            image.file_format = "OPEN_EXR"
+            image.save()
+        finally:
+            bpy.data.images.remove(image)
+
+    def load_image(self, filepath, memory_limit):
+        """
+        Loads an image of the library, the least recently used images are
+        removed as long as all loaded images need more than memory_limit bytes.
+        Images still used by the world are kept and stay tracked, the next
+        unused one is removed instead.
+
+        Returns:
+        - image (bpy.types.Image): the loaded image
+        """
+
+        filepath = str(filepath)
+        image = SkyLibrary.loaded_images.pop(filepath, None)
+        if image is None or image.name not in bpy.data.images:
+            image = bpy.data.images.load(filepath, check_existing=False)
+        SkyLibrary.loaded_images[filepath] = image
+
+        def image_size(loaded_image):
+            width, height = loaded_image.size
+            return width * height * loaded_image.channels * 4
+
+        for loaded_filepath, loaded_image in list(SkyLibrary.loaded_images.items()):
+            if (
+                sum(image_size(image) for image in SkyLibrary.loaded_images.values())
+                <= memory_limit
+            ):
+                break
+            if loaded_filepath == filepath:
+                continue
+            if loaded_image.name not in bpy.data.images:
+                del SkyLibrary.loaded_images[loaded_filepath]
+            elif not loaded_image.users:
+                del SkyLibrary.loaded_images[loaded_filepath]
+                bpy.data.images.remove(loaded_image)
+
+        return image
+
+    def get_library_world(self):
+        """
+        Returns:
+        - world (bpy.types.World): world adding the sky and the rotated,
+            scaled sun disc images, created on first use
+        """
+
+        if self.world_name in bpy.data.worlds:
+            return bpy.data.worlds[self.world_name]
+
+        # Same strength as the background of the sky world
+        sky_strength = next(
+            (
+                node.inputs["Strength"].default_value
+                for node in bpy.data.worlds[self.sky_world_name].node_tree.nodes
+                if node.type == "BACKGROUND"
+            ),
+            1.0,
+        )
+
+        world = bpy.data.worlds.new(self.world_name)
+        world.use_nodes = True
+        nodes = world.node_tree.nodes
+        links = world.node_tree.links
+        nodes.clear()
+
+        texture_coordinate_node = nodes.new("ShaderNodeTexCoord")
+        mapping_node = nodes.new("ShaderNodeMapping")
+        mapping_node.name = "Sun Rotation"
+        mapping_node.vector_type = "TEXTURE"
+        links.new(
+            texture_coordinate_node.outputs["Generated"], mapping_node.inputs["Vector"]
+        )
+
+        background_nodes = []
+        for name, strength in (("Sky", sky_strength), ("Sun Disc", sky_strength)):
+            environment_node = nodes.new("ShaderNodeTexEnvironment")
+            environment_node.name = name
+            background_node = nodes.new("ShaderNodeBackground")
+            background_node.name = f"{name} Background"
+            background_node.inputs["Strength"].default_value = strength
+            links.new(mapping_node.outputs["Vector"], environment_node.inputs["Vector"])
+            links.new(
+                environment_node.outputs["Color"], background_node.inputs["Color"]
+            )
+            background_nodes.append(background_node)
+
+        add_shader_node = nodes.new("ShaderNodeAddShader")
+        links.new(background_nodes[0].outputs["Background"], add_shader_node.inputs[0])
+        links.new(background_nodes[1].outputs["Background"], add_shader_node.inputs[1])
+        world_output_node = nodes.new("ShaderNodeOutputWorld")
+        links.new(
+            add_shader_node.outputs["Shader"], world_output_node.inputs["Surface"]
+        )
+
+        world["sky_strength"] = sky_strength
+
+        return world
+
+    def load_index(self, library_path):
+        """
+        Loads the index of a library once, it is loaded again if its index
+        file changed, e.g. by baking more entries
+
+        Returns:
+        - sky_library_index (drg_sky_library.SkyLibraryIndex): None if the
+            folder has no index
+        """
+
+        index_path = pathlib.Path(library_path) / drg_sky_library.INDEX_FILE_NAME
+        if not index_path.exists():
+            return None
+
+        modification_time = index_path.stat().st_mtime_ns
+        cached_index = SkyLibrary.loaded_indices.get(library_path)
+        if cached_index is None or cached_index[0] != modification_time:
+            cached_index = (
+                modification_time,
+                drg_sky_library.SkyLibraryIndex.load(library_path),
+            )
+            SkyLibrary.loaded_indices[library_path] = cached_index
+
+        return cached_index[1]
+
+    def apply_environment(self, context, lighting_randomizer, render_scene):
+        """
+        Uses the nearest entry of the sky library of the scene for the
+        randomized environment lighting, or the sky texture of the World if no
+        library is set. The logged parameters of lighting_randomizer are set
+        to the parameters of the entry.
+
+        Args:
+        - lighting_randomizer (LightingRandomizer): the randomized parameters
+        - render_scene (bpy.types.Scene): scene rendering the image
+        """
+
+        lighting_randomizer.sky_library_entry = ""
+        sky_library_index = None
+        if context.scene.sky_library_path:
+            sky_library_index = self.load_index(
+                bpy.path.abspath(context.scene.sky_library_path)
+            )
+        nearest_entry = (
+            sky_library_index.nearest(
+                {
+                    parameter: getattr(lighting_randomizer, parameter)
+                    for parameter in sky_library_index.grid
+                }
+            )
+            if sky_library_index is not None
+            else None
+        )
+        if nearest_entry is None:
+            render_scene.world = bpy.data.worlds[self.sky_world_name]
+            return
+
+        entry_name, entry = nearest_entry
+        memory_limit = context.scene.sky_library_memory_mb * 1024**2
+        world = self.get_library_world()
+        nodes = world.node_tree.nodes
+        nodes["Sky"].image = self.load_image(
+            sky_library_index.folder_path / entry["sky"], memory_limit
+        )
+        nodes["Sun Disc"].image = self.load_image(
+            sky_library_index.folder_path / entry["disc"], memory_limit
+        )
+        nodes["Sun Rotation"].inputs["Rotation"].default_value[
+            2
+        ] = lighting_randomizer.sun_rotation
+        nodes["Sun Disc Background"].inputs["Strength"].default_value = (
+            world["sky_strength"] * lighting_randomizer.sun_intensity
+        )
+        render_scene.world = world
+
+        for parameter, value in entry["params"].items():
+            setattr(lighting_randomizer, parameter, value)
+        lighting_randomizer.sky_library_entry = entry_name
+
+
+@bpy.app.handlers.persistent
+def clear_sky_library_cache(*args):
+    """
+    load_post and undo_post handler, the loaded images of the previous file or
+    undo step are freed and must not be accessed anymore
+    """
+
+    SkyLibrary.loaded_images.clear()
+    SkyLibrary.loaded_indices.clear()
+
+
 class CameraRandomizer:
     _instance = None
 
@@ -1074,13 +1514,16 @@ class CameraRandomizer:
         self.focal_length = 0
         self.exposure = 0
 
-    def randomize_camera_position(self, context):
+    def randomize_camera_position(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
         image_camera_obj = bpy.data.objects["camera_image"]
         segmentation_camera_obj = bpy.data.objects["camera_segmentation"]
         focus_point_obj = bpy.data.objects["camera_focus_point"]
 
-        if "Room Generator" in context.object.modifiers:
-            rg_mod = context.object.modifiers["Room Generator"]
+        if "Room Generator" in obj.modifiers:
+            rg_mod = obj.modifiers["Room Generator"]
             rg_node_group = rg_mod.node_group
 
             self.camera_height = np.random.choice(np.arange(1.3, 1.6, 0.01))
@@ -1090,33 +1533,23 @@ class CameraRandomizer:
                 SceneRenderer().main_scene_name
             ].view_settings.exposure
 
-            camera_height_id = rg_node_group.interface.items_tree[
-                "Camera Height"
-            ].identifier
-            camera_position_random_seed_id = rg_node_group.interface.items_tree[
+            camera_height_id = interface_identifiers(rg_node_group)["Camera Height"]
+            camera_position_random_seed_id = interface_identifiers(rg_node_group)[
                 "Camera Position Random Seed"
-            ].identifier
+            ]
 
             rg_mod[camera_height_id] = self.camera_height
             rg_mod[camera_position_random_seed_id] = int(
                 self.camera_position_random_seed
             )
 
-            rg_node_group.interface_update(context)
+            update_node_tree(rg_node_group, context)
 
-            camera_position = [
-                v.vector
-                for v in context.object.evaluated_get(context.evaluated_depsgraph_get())
-                .data.attributes["camera_position"]
-                .data
-            ][0]
-
-            focus_point_position = [
-                v.vector
-                for v in context.object.evaluated_get(context.evaluated_depsgraph_get())
-                .data.attributes["focus_point_position"]
-                .data
-            ][0]
+            camera_attributes = read_evaluated_attributes(
+                context, obj, ["camera_position", "focus_point_position"]
+            )
+            camera_position = camera_attributes["camera_position"][0]
+            focus_point_position = camera_attributes["focus_point_position"][0]
 
             image_camera_obj.location = (
                 camera_position[0],
@@ -1197,11 +1630,14 @@ class ProceduralPlate(object):
         points[1].location = (1, 1)
 
         geo_group.nodes["Float Curve"].mapping.update()
-        geo_group.interface_update(context)
+        update_node_tree(geo_group, context)
 
-    def randomize_plate(self, context):
-        if "Plate Curve Generator" in context.object.modifiers:
-            pcg_mod = context.object.modifiers["Plate Curve Generator"]
+    def randomize_plate(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Plate Curve Generator" in obj.modifiers:
+            pcg_mod = obj.modifiers["Plate Curve Generator"]
             pcg_node_group = pcg_mod.node_group
 
             self.reset_curvemapping(context, pcg_node_group)
@@ -1238,16 +1674,12 @@ class ProceduralPlate(object):
             # To avoid curves with a too high gradient
             points.new(self.rim_coor[0] + 0.0101, self.rim_coor[1])
 
-            base_id = pcg_node_group.interface.items_tree["Base"].identifier
-            diameter_id = pcg_node_group.interface.items_tree["Diameter"].identifier
-            thickness_id = pcg_node_group.interface.items_tree["Thickness"].identifier
-            base_radius_id = pcg_node_group.interface.items_tree[
-                "Base Radius"
-            ].identifier
-            base_height_id = pcg_node_group.interface.items_tree[
-                "Base Height"
-            ].identifier
-            base_width_id = pcg_node_group.interface.items_tree["Base Width"].identifier
+            base_id = interface_identifiers(pcg_node_group)["Base"]
+            diameter_id = interface_identifiers(pcg_node_group)["Diameter"]
+            thickness_id = interface_identifiers(pcg_node_group)["Thickness"]
+            base_radius_id = interface_identifiers(pcg_node_group)["Base Radius"]
+            base_height_id = interface_identifiers(pcg_node_group)["Base Height"]
+            base_width_id = interface_identifiers(pcg_node_group)["Base Width"]
 
             # arbitrarily choosen (measure on own tableware)
             if self.well_x >= 0.02:
@@ -1277,7 +1709,7 @@ class ProceduralPlate(object):
             pcg_mod[base_width_id] = self.base_width
 
             pcg_node_group.nodes["Float Curve"].mapping.update()
-            pcg_node_group.interface_update(context)
+            update_node_tree(pcg_node_group, context)
 
             # print()
             # print(
@@ -1313,12 +1745,15 @@ class ProceduralPlate(object):
             "Color 1"
         ].default_value = random_crumble_col
 
-        ceramic_dirt_mat.node_tree.interface_update(context)
-        ceramic_crumble_mat.node_tree.interface_update(context)
+        update_node_tree(ceramic_dirt_mat.node_tree, context)
+        update_node_tree(ceramic_crumble_mat.node_tree, context)
 
-    def randomize_crumbs(self, context):
-        if "Plate Crumbs" in context.object.modifiers:
-            pc_mod = context.object.modifiers["Plate Crumbs"]
+    def randomize_crumbs(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Plate Crumbs" in obj.modifiers:
+            pc_mod = obj.modifiers["Plate Crumbs"]
             pc_node_group = pc_mod.node_group
 
             self.dirt_pattern_seed = np.random.choice(np.arange(-10000, 10000, 1))
@@ -1326,29 +1761,32 @@ class ProceduralPlate(object):
             self.crumb_distribution_seed = np.random.choice(np.arange(-10000, 10000, 1))
             self.crumb_scale_seed = np.random.choice(np.arange(-10000, 10000, 1))
 
-            dirt_pattern_seed_id = pc_node_group.interface.items_tree[
+            dirt_pattern_seed_id = interface_identifiers(pc_node_group)[
                 "Dirt Pattern Random Seed"
-            ].identifier
-            crumb_geometry_seed_id = pc_node_group.interface.items_tree[
+            ]
+            crumb_geometry_seed_id = interface_identifiers(pc_node_group)[
                 "Crumb Geometry Random Seed"
-            ].identifier
-            crumb_distribution_seed_id = pc_node_group.interface.items_tree[
+            ]
+            crumb_distribution_seed_id = interface_identifiers(pc_node_group)[
                 "Crumb Distribution Random Seed"
-            ].identifier
-            crumb_scale_seed_id = pc_node_group.interface.items_tree[
+            ]
+            crumb_scale_seed_id = interface_identifiers(pc_node_group)[
                 "Crumb Scale Random Seed"
-            ].identifier
+            ]
 
             pc_mod[dirt_pattern_seed_id] = int(self.dirt_pattern_seed)
             pc_mod[crumb_geometry_seed_id] = int(self.crumb_geometry_seed)
             pc_mod[crumb_distribution_seed_id] = int(self.crumb_distribution_seed)
             pc_mod[crumb_scale_seed_id] = int(self.crumb_scale_seed)
 
-            pc_node_group.interface_update(context)
+            update_node_tree(pc_node_group, context)
 
-    def randomize_tableware_on_plate(self, context):
-        if "Tableware on Plate" in context.object.modifiers:
-            top_mod = context.object.modifiers["Tableware on Plate"]
+    def randomize_tableware_on_plate(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Tableware on Plate" in obj.modifiers:
+            top_mod = obj.modifiers["Tableware on Plate"]
             top_node_group = top_mod.node_group
 
             self.tableware_spawn_point_seed = np.random.choice(
@@ -1357,15 +1795,15 @@ class ProceduralPlate(object):
             self.tableware_rotation_seed = np.random.choice(np.arange(-10000, 10000, 1))
             self.tableware_object_seed = np.random.choice(np.arange(-10000, 10000, 1))
 
-            tableware_spawn_point_seed_id = top_node_group.interface.items_tree[
+            tableware_spawn_point_seed_id = interface_identifiers(top_node_group)[
                 "Spawn Point Seed"
-            ].identifier
-            tableware_rotation_seed_id = top_node_group.interface.items_tree[
+            ]
+            tableware_rotation_seed_id = interface_identifiers(top_node_group)[
                 "Tableware Rotation Seed"
-            ].identifier
-            tableware_object_seed_id = top_node_group.interface.items_tree[
+            ]
+            tableware_object_seed_id = interface_identifiers(top_node_group)[
                 "Object Seed"
-            ].identifier
+            ]
 
             top_mod[tableware_spawn_point_seed_id] = int(
                 self.tableware_spawn_point_seed
@@ -1373,7 +1811,7 @@ class ProceduralPlate(object):
             top_mod[tableware_rotation_seed_id] = int(self.tableware_rotation_seed)
             top_mod[tableware_object_seed_id] = int(self.tableware_object_seed)
 
-            top_node_group.interface_update(context)
+            update_node_tree(top_node_group, context)
 
 
 class ProceduralSpoon(object):
@@ -1424,9 +1862,12 @@ class ProceduralSpoon(object):
         bevel_mod.width = 0.001
         bevel_mod.segments = 2
 
-    def randomize_spoon(self, context):
-        if "Spoon Generator" in context.object.modifiers:
-            sg_mod = context.object.modifiers["Spoon Generator"]
+    def randomize_spoon(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Spoon Generator" in obj.modifiers:
+            sg_mod = obj.modifiers["Spoon Generator"]
             sg_node_group = sg_mod.node_group
 
             self.length = np.random.choice(np.arange(0.187, 0.218, 0.001))
@@ -1454,35 +1895,27 @@ class ProceduralSpoon(object):
 
             ##################################################################################
 
-            length_id = sg_node_group.interface.items_tree["Length"].identifier
+            length_id = interface_identifiers(sg_node_group)["Length"]
 
-            lod_id = sg_node_group.interface.items_tree["Level of Detail"].identifier
+            lod_id = interface_identifiers(sg_node_group)["Level of Detail"]
 
-            bowl_length_id = sg_node_group.interface.items_tree[
-                "Bowl Length"
-            ].identifier
-            bowl_width_id = sg_node_group.interface.items_tree["Bowl Width"].identifier
-            bowl_depth_id = sg_node_group.interface.items_tree["Bowl Depth"].identifier
+            bowl_length_id = interface_identifiers(sg_node_group)["Bowl Length"]
+            bowl_width_id = interface_identifiers(sg_node_group)["Bowl Width"]
+            bowl_depth_id = interface_identifiers(sg_node_group)["Bowl Depth"]
 
-            neck_length_id = sg_node_group.interface.items_tree[
-                "Neck Length"
-            ].identifier
-            neck_height_id = sg_node_group.interface.items_tree[
-                "Neck Height"
-            ].identifier
+            neck_length_id = interface_identifiers(sg_node_group)["Neck Length"]
+            neck_height_id = interface_identifiers(sg_node_group)["Neck Height"]
 
-            handle_width_id = sg_node_group.interface.items_tree[
-                "Handle Width"
-            ].identifier
-            handle_end_height_id = sg_node_group.interface.items_tree[
+            handle_width_id = interface_identifiers(sg_node_group)["Handle Width"]
+            handle_end_height_id = interface_identifiers(sg_node_group)[
                 "Handle End Height"
-            ].identifier
-            handle_end_width_id = sg_node_group.interface.items_tree[
+            ]
+            handle_end_width_id = interface_identifiers(sg_node_group)[
                 "Handle End Width"
-            ].identifier
-            handle_end_curvature_id = sg_node_group.interface.items_tree[
+            ]
+            handle_end_curvature_id = interface_identifiers(sg_node_group)[
                 "Handle End Curvature"
-            ].identifier
+            ]
 
             ##################################################################################
 
@@ -1502,15 +1935,15 @@ class ProceduralSpoon(object):
             sg_mod[handle_end_width_id] = self.handle_end_width
             sg_mod[handle_end_curvature_id] = self.handle_end_curvature
 
-            if "Solidify" in context.object.modifiers:
-                solidify_mod = context.object.modifiers["Solidify"]
+            if "Solidify" in obj.modifiers:
+                solidify_mod = obj.modifiers["Solidify"]
                 rounded_thickness = float(np.around(self.thickness, decimals=5))
                 solidify_mod.thickness = rounded_thickness
             else:
                 print("Object does not have the 'Solidify' Modifier")
                 self.report({"ERROR"}, "Object does not have the 'Solidify' Modifier")
 
-            sg_node_group.interface_update(context)
+            update_node_tree(sg_node_group, context)
         else:
             print("Object does not have the 'Spoon Generator' Modifier")
             self.report(
@@ -1570,9 +2003,12 @@ class ProceduralFork(object):
         bevel_mod.width = 0.001
         bevel_mod.segments = 2
 
-    def randomize_fork(self, context):
-        if "Fork Generator" in context.object.modifiers:
-            fg_mod = context.object.modifiers["Fork Generator"]
+    def randomize_fork(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Fork Generator" in obj.modifiers:
+            fg_mod = obj.modifiers["Fork Generator"]
             fg_node_group = fg_mod.node_group
 
             self.length = np.random.choice(np.arange(0.183, 0.217, 0.001))
@@ -1619,50 +2055,36 @@ class ProceduralFork(object):
 
             ##################################################################################
 
-            length_id = fg_node_group.interface.items_tree["Length"].identifier
+            length_id = interface_identifiers(fg_node_group)["Length"]
 
-            amount_of_prongs_id = fg_node_group.interface.items_tree[
+            amount_of_prongs_id = interface_identifiers(fg_node_group)[
                 "Amount of Prongs"
-            ].identifier
+            ]
 
-            prong_length_id = fg_node_group.interface.items_tree[
-                "Prong Length"
-            ].identifier
-            prong_tip_curvature_id = fg_node_group.interface.items_tree[
+            prong_length_id = interface_identifiers(fg_node_group)["Prong Length"]
+            prong_tip_curvature_id = interface_identifiers(fg_node_group)[
                 "Prong Tip Curvature"
-            ].identifier
-
-            eyes_curvature_id = fg_node_group.interface.items_tree[
-                "Eyes Curvature"
-            ].identifier
-
-            bowl_length_id = fg_node_group.interface.items_tree[
-                "Bowl Length"
-            ].identifier
-            bowl_width_id = fg_node_group.interface.items_tree["Bowl Width"].identifier
-            bowl_curvature_id = fg_node_group.interface.items_tree[
-                "Bowl Curvature"
-            ].identifier
-
-            neck_length_id = fg_node_group.interface.items_tree[
-                "Neck Length"
-            ].identifier
-            neck_height_id = fg_node_group.interface.items_tree[
-                "Neck Height"
-            ].identifier
-
-            handle_width_id = fg_node_group.interface.items_tree[
-                "Handle Width"
-            ].identifier
-            handle_end_height_id = fg_node_group.interface.items_tree[
+            ]
+
+            eyes_curvature_id = interface_identifiers(fg_node_group)["Eyes Curvature"]
+
+            bowl_length_id = interface_identifiers(fg_node_group)["Bowl Length"]
+            bowl_width_id = interface_identifiers(fg_node_group)["Bowl Width"]
+            bowl_curvature_id = interface_identifiers(fg_node_group)["Bowl Curvature"]
+
+            neck_length_id = interface_identifiers(fg_node_group)["Neck Length"]
+            neck_height_id = interface_identifiers(fg_node_group)["Neck Height"]
+
+            handle_width_id = interface_identifiers(fg_node_group)["Handle Width"]
+            handle_end_height_id = interface_identifiers(fg_node_group)[
                 "Handle End Height"
-            ].identifier
-            handle_end_width_id = fg_node_group.interface.items_tree[
+            ]
+            handle_end_width_id = interface_identifiers(fg_node_group)[
                 "Handle End Width"
-            ].identifier
-            handle_end_curvature_id = fg_node_group.interface.items_tree[
+            ]
+            handle_end_curvature_id = interface_identifiers(fg_node_group)[
                 "Handle End Curvature"
-            ].identifier
+            ]
 
             ##################################################################################
 
@@ -1686,15 +2108,15 @@ class ProceduralFork(object):
             fg_mod[handle_end_width_id] = self.handle_end_width
             fg_mod[handle_end_curvature_id] = self.handle_end_curvature
 
-            if "Solidify" in context.object.modifiers:
-                solidify_mod = context.object.modifiers["Solidify"]
+            if "Solidify" in obj.modifiers:
+                solidify_mod = obj.modifiers["Solidify"]
                 rounded_thickness = float(np.around(self.thickness, decimals=5))
                 solidify_mod.thickness = rounded_thickness
             else:
                 print("Object does not have the 'Solidify' Modifier")
                 self.report({"ERROR"}, "Object does not have the 'Solidify' Modifier")
 
-            fg_node_group.interface_update(context)
+            update_node_tree(fg_node_group, context)
 
         else:
             self.report({"ERROR"}, "Object does not have the 'Fork Generator' Modifier")
@@ -1739,9 +2161,12 @@ class ProceduralKnife(object):
             self.report({"ERROR"}, "WIP: Knife Generator Node Tree not found.")
         kg_mod.node_group = kg_node_tree
 
-    def randomize_knife(self, context):
-        if "Knife Generator" in context.object.modifiers:
-            kg_mod = context.object.modifiers["Knife Generator"]
+    def randomize_knife(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Knife Generator" in obj.modifiers:
+            kg_mod = obj.modifiers["Knife Generator"]
             kg_node_group = kg_mod.node_group
 
             self.length = np.random.choice(np.arange(0.203, 0.23, 0.001))
@@ -1779,40 +2204,34 @@ class ProceduralKnife(object):
 
             ##################################################################################
 
-            length_id = kg_node_group.interface.items_tree["Length"].identifier
-            width_id = kg_node_group.interface.items_tree["Width"].identifier
-            thickness_id = kg_node_group.interface.items_tree["Thickness"].identifier
+            length_id = interface_identifiers(kg_node_group)["Length"]
+            width_id = interface_identifiers(kg_node_group)["Width"]
+            thickness_id = interface_identifiers(kg_node_group)["Thickness"]
 
-            blade_length_id = kg_node_group.interface.items_tree[
-                "Blade Length"
-            ].identifier
-            blade_thickness_id = kg_node_group.interface.items_tree[
-                "Blade Thickness"
-            ].identifier
+            blade_length_id = interface_identifiers(kg_node_group)["Blade Length"]
+            blade_thickness_id = interface_identifiers(kg_node_group)["Blade Thickness"]
 
-            blade_tip_curvature_id = kg_node_group.interface.items_tree[
+            blade_tip_curvature_id = interface_identifiers(kg_node_group)[
                 "Blade Tip Curvature"
-            ].identifier
-            blade_tip_intensity_id = kg_node_group.interface.items_tree[
+            ]
+            blade_tip_intensity_id = interface_identifiers(kg_node_group)[
                 "Blade Tip Intensity"
-            ].identifier
+            ]
 
-            blade_base_curvature_id = kg_node_group.interface.items_tree[
+            blade_base_curvature_id = interface_identifiers(kg_node_group)[
                 "Blade Base Curvature"
-            ].identifier
-            blade_base_intensity_id = kg_node_group.interface.items_tree[
+            ]
+            blade_base_intensity_id = interface_identifiers(kg_node_group)[
                 "Blade Base Intensity"
-            ].identifier
+            ]
 
-            handle_width_id = kg_node_group.interface.items_tree[
-                "Handle Width"
-            ].identifier
-            handle_end_width_id = kg_node_group.interface.items_tree[
+            handle_width_id = interface_identifiers(kg_node_group)["Handle Width"]
+            handle_end_width_id = interface_identifiers(kg_node_group)[
                 "Handle End Width"
-            ].identifier
-            handle_end_curvature_id = kg_node_group.interface.items_tree[
+            ]
+            handle_end_curvature_id = interface_identifiers(kg_node_group)[
                 "Handle End Curvature"
-            ].identifier
+            ]
 
             ##################################################################################
 
@@ -1833,7 +2252,7 @@ class ProceduralKnife(object):
             kg_mod[handle_end_width_id] = self.handle_end_width
             kg_mod[handle_end_curvature_id] = self.handle_end_curvature
 
-            kg_node_group.interface_update(context)
+            update_node_tree(kg_node_group, context)
         else:
             print("Object does not have the 'Knife Generator' Modifier")
             self.report(
@@ -1880,9 +2299,12 @@ class ProceduralGlass(object):
             self.report({"ERROR"}, "WIP: Glass Generator Node Tree not found.")
         gg_mod.node_group = gg_node_tree
 
-    def randomize_glass(self, context):
-        if "Glass Generator" in context.object.modifiers:
-            gg_mod = context.object.modifiers["Glass Generator"]
+    def randomize_glass(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Glass Generator" in obj.modifiers:
+            gg_mod = obj.modifiers["Glass Generator"]
             gg_node_group = gg_mod.node_group
 
             self.lod = 3
@@ -1917,38 +2339,26 @@ class ProceduralGlass(object):
 
             ##################################################################################
 
-            lod_id = gg_node_group.interface.items_tree["Level of Detail"].identifier
+            lod_id = interface_identifiers(gg_node_group)["Level of Detail"]
 
-            height_id = gg_node_group.interface.items_tree["Height"].identifier
-            thickness_id = gg_node_group.interface.items_tree["Thickness"].identifier
+            height_id = interface_identifiers(gg_node_group)["Height"]
+            thickness_id = interface_identifiers(gg_node_group)["Thickness"]
 
-            base_diameter_id = gg_node_group.interface.items_tree[
-                "Base Diameter"
-            ].identifier
-            base_curvature_id = gg_node_group.interface.items_tree[
-                "Base Curvature"
-            ].identifier
-            base_thickness_id = gg_node_group.interface.items_tree[
-                "Base Thickness"
-            ].identifier
+            base_diameter_id = interface_identifiers(gg_node_group)["Base Diameter"]
+            base_curvature_id = interface_identifiers(gg_node_group)["Base Curvature"]
+            base_thickness_id = interface_identifiers(gg_node_group)["Base Thickness"]
 
-            mid_curvature_height_id = gg_node_group.interface.items_tree[
+            mid_curvature_height_id = interface_identifiers(gg_node_group)[
                 "Mid Curvature Height"
-            ].identifier
-            mid_curvature_diameter_id = gg_node_group.interface.items_tree[
+            ]
+            mid_curvature_diameter_id = interface_identifiers(gg_node_group)[
                 "Mid Curvature Diameter"
-            ].identifier
+            ]
 
-            rim_diameter_id = gg_node_group.interface.items_tree[
-                "Rim Diameter"
-            ].identifier
-            rim_curvature_id = gg_node_group.interface.items_tree[
-                "Rim Curvature"
-            ].identifier
+            rim_diameter_id = interface_identifiers(gg_node_group)["Rim Diameter"]
+            rim_curvature_id = interface_identifiers(gg_node_group)["Rim Curvature"]
 
-            bowl_curvature_id = gg_node_group.interface.items_tree[
-                "Bowl Curvature"
-            ].identifier
+            bowl_curvature_id = interface_identifiers(gg_node_group)["Bowl Curvature"]
 
             ##################################################################################
 
@@ -1969,7 +2379,7 @@ class ProceduralGlass(object):
 
             gg_mod[bowl_curvature_id] = self.bowl_curvature
 
-            gg_node_group.interface_update(context)
+            update_node_tree(gg_node_group, context)
 
         else:
             print("Object does not have the 'Glass Generator' Modifier")
@@ -2008,9 +2418,12 @@ class ProceduralPlacemat(object):
             self.report({"ERROR"}, "WIP: Placemat Generator Node Tree not found.")
         pmg_mod.node_group = pmg_node_tree
 
-    def randomize_placemat(self, context):
-        if "Placemat Generator" in context.object.modifiers:
-            pmg_mod = context.object.modifiers["Placemat Generator"]
+    def randomize_placemat(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Placemat Generator" in obj.modifiers:
+            pmg_mod = obj.modifiers["Placemat Generator"]
             pmg_node_group = pmg_mod.node_group
 
             self.round_tablecloth = random.random() < 0.5
@@ -2030,17 +2443,17 @@ class ProceduralPlacemat(object):
 
             ##################################################################################
 
-            round_tablecloth_id = pmg_node_group.interface.items_tree[
+            round_tablecloth_id = interface_identifiers(pmg_node_group)[
                 "Round Tablecloth"
-            ].identifier
+            ]
 
-            height_id = pmg_node_group.interface.items_tree["Height"].identifier
-            width_id = pmg_node_group.interface.items_tree["Width"].identifier
-            depth_id = pmg_node_group.interface.items_tree["Depth"].identifier
+            height_id = interface_identifiers(pmg_node_group)["Height"]
+            width_id = interface_identifiers(pmg_node_group)["Width"]
+            depth_id = interface_identifiers(pmg_node_group)["Depth"]
 
-            square_placemat_curvature = pmg_node_group.interface.items_tree[
+            square_placemat_curvature = interface_identifiers(pmg_node_group)[
                 "Square Placemat Curvature"
-            ].identifier
+            ]
 
             ##################################################################################
 
@@ -2052,7 +2465,7 @@ class ProceduralPlacemat(object):
 
             pmg_mod[square_placemat_curvature] = self.depth
 
-            pmg_node_group.interface_update(context)
+            update_node_tree(pmg_node_group, context)
 
         else:
             print("Object does not have the 'Placemat Generator' Modifier")
@@ -2128,9 +2541,12 @@ class ProceduralChair(object):
         bevel_mod.width = 0.002
         bevel_mod.segments = 4
 
-    def randomize_chair(self, context):
-        if "Chair Generator" in context.object.modifiers:
-            cg_mod = context.object.modifiers["Chair Generator"]
+    def randomize_chair(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Chair Generator" in obj.modifiers:
+            cg_mod = obj.modifiers["Chair Generator"]
             cg_node_group = cg_mod.node_group
 
             self.curved_backrest = random.random() < 0.5
@@ -2205,74 +2621,54 @@ class ProceduralChair(object):
 
             ##################################################################################
 
-            curved_backrest_id = cg_node_group.interface.items_tree[
-                "Curved Backrest"
-            ].identifier
-            round_seat_id = cg_node_group.interface.items_tree["Round Seat"].identifier
-            round_rail_id = cg_node_group.interface.items_tree["Round Rail"].identifier
+            curved_backrest_id = interface_identifiers(cg_node_group)["Curved Backrest"]
+            round_seat_id = interface_identifiers(cg_node_group)["Round Seat"]
+            round_rail_id = interface_identifiers(cg_node_group)["Round Rail"]
 
-            height_id = cg_node_group.interface.items_tree["Height"].identifier
-            width_id = cg_node_group.interface.items_tree["Width"].identifier
-            depth_id = cg_node_group.interface.items_tree["Depth"].identifier
+            height_id = interface_identifiers(cg_node_group)["Height"]
+            width_id = interface_identifiers(cg_node_group)["Width"]
+            depth_id = interface_identifiers(cg_node_group)["Depth"]
 
-            backrest_angle_id = cg_node_group.interface.items_tree[
-                "Backrest Angle"
-            ].identifier
+            backrest_angle_id = interface_identifiers(cg_node_group)["Backrest Angle"]
 
-            top_rail_height_id = cg_node_group.interface.items_tree[
-                "Top Rail Height"
-            ].identifier
-            top_rail_thickness_id = cg_node_group.interface.items_tree[
+            top_rail_height_id = interface_identifiers(cg_node_group)["Top Rail Height"]
+            top_rail_thickness_id = interface_identifiers(cg_node_group)[
                 "Top Rail Thickness"
-            ].identifier
+            ]
 
-            backpost_width_id = cg_node_group.interface.items_tree[
-                "Backpost Width"
-            ].identifier
-            backpost_thickness_id = cg_node_group.interface.items_tree[
+            backpost_width_id = interface_identifiers(cg_node_group)["Backpost Width"]
+            backpost_thickness_id = interface_identifiers(cg_node_group)[
                 "Backpost Thickness"
-            ].identifier
+            ]
 
-            amount_of_crossrails_id = cg_node_group.interface.items_tree[
+            amount_of_crossrails_id = interface_identifiers(cg_node_group)[
                 "Amount of Crossrails"
-            ].identifier
-            crossrail_height_id = cg_node_group.interface.items_tree[
+            ]
+            crossrail_height_id = interface_identifiers(cg_node_group)[
                 "Crossrail Height"
-            ].identifier
-            crossrail_thickness_id = cg_node_group.interface.items_tree[
+            ]
+            crossrail_thickness_id = interface_identifiers(cg_node_group)[
                 "Crossrail Thickness"
-            ].identifier
-
-            amount_of_slats_id = cg_node_group.interface.items_tree[
-                "Amount of Slats"
-            ].identifier
-            slat_width_id = cg_node_group.interface.items_tree["Slat Width"].identifier
-            slat_thickness_id = cg_node_group.interface.items_tree[
-                "Slat Thickness"
-            ].identifier
-
-            seat_height_id = cg_node_group.interface.items_tree[
-                "Seat Height"
-            ].identifier
-            seat_thickness_id = cg_node_group.interface.items_tree[
-                "Seat Thickness"
-            ].identifier
-            seat_curvature_id = cg_node_group.interface.items_tree[
-                "Seat Curvature"
-            ].identifier
-
-            seat_rail_reduction_id = cg_node_group.interface.items_tree[
+            ]
+
+            amount_of_slats_id = interface_identifiers(cg_node_group)["Amount of Slats"]
+            slat_width_id = interface_identifiers(cg_node_group)["Slat Width"]
+            slat_thickness_id = interface_identifiers(cg_node_group)["Slat Thickness"]
+
+            seat_height_id = interface_identifiers(cg_node_group)["Seat Height"]
+            seat_thickness_id = interface_identifiers(cg_node_group)["Seat Thickness"]
+            seat_curvature_id = interface_identifiers(cg_node_group)["Seat Curvature"]
+
+            seat_rail_reduction_id = interface_identifiers(cg_node_group)[
                 "Seat Rail Reduction"
-            ].identifier
-            seat_rail_thickness_id = cg_node_group.interface.items_tree[
+            ]
+            seat_rail_thickness_id = interface_identifiers(cg_node_group)[
                 "Seat Rail Thickness"
-            ].identifier
+            ]
 
-            leg_width_id = cg_node_group.interface.items_tree["Leg Width"].identifier
-            leg_thickness_id = cg_node_group.interface.items_tree[
-                "Leg Thickness"
-            ].identifier
-            leg_angle_id = cg_node_group.interface.items_tree["Leg Angle"].identifier
+            leg_width_id = interface_identifiers(cg_node_group)["Leg Width"]
+            leg_thickness_id = interface_identifiers(cg_node_group)["Leg Thickness"]
+            leg_angle_id = interface_identifiers(cg_node_group)["Leg Angle"]
 
             ##################################################################################
 
@@ -2302,32 +2698,16 @@ class ProceduralChair(object):
 
             cg_mod[seat_rail_thickness_id] = self.seat_rail_thickness
 
-            cg_node_group.interface_update(context)
+            update_node_tree(cg_node_group, context)
 
             ## Must be at the end, can only be calculated after every other attribute is registered
             ## ORDER IS VERY IMPORTANT HERE
 
-            seat_area_max_width = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["seat_area_max_width"]
-                    .data
-                ]
-            )
-
-            seat_area_max_depth = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["seat_area_max_depth"]
-                    .data
-                ]
+            seat_area_attributes = read_evaluated_attributes(
+                context, obj, ["seat_area_max_width", "seat_area_max_depth"]
             )
+            seat_area_max_width = np.max(seat_area_attributes["seat_area_max_width"])
+            seat_area_max_depth = np.max(seat_area_attributes["seat_area_max_depth"])
 
             self.leg_width = np.random.choice(
                 np.arange(0.03, seat_area_max_width / 2, 0.001)
@@ -2357,18 +2737,15 @@ class ProceduralChair(object):
             if self.top_rail_height > 0:
                 self.amount_of_slats = np.random.choice(np.arange(0, 5, 1))
                 cg_mod[amount_of_slats_id] = int(self.amount_of_slats)
-                cg_node_group.interface_update(context)
+                update_node_tree(cg_node_group, context)
                 if self.amount_of_slats == 0:
                     self.slat_thickness = 0
                     self.slat_width = 0
                 else:
 
-                    max_slat_width = (
-                        context.object.evaluated_get(context.evaluated_depsgraph_get())
-                        .data.attributes["max_slat_width"]
-                        .data[0]
-                        .value
-                    )
+                    max_slat_width = read_evaluated_attributes(
+                        context, obj, ["max_slat_width"]
+                    )["max_slat_width"][0]
 
                     if max_slat_width <= 0:
                         self.slat_width = 0
@@ -2400,9 +2777,11 @@ class ProceduralChair(object):
             cg_mod[slat_width_id] = float(self.slat_width)
             cg_mod[slat_thickness_id] = float(self.slat_thickness)
 
-            cg_node_group.interface_update(context)
+            update_node_tree(cg_node_group, context)
 
-    def randomize_material(self, context):
+    def randomize_material(self, context, obj=None):
+        if obj is None:
+            obj = context.object
 
         chair_obj = ColorPaletteRandomizer().get_dining_room_object(
             obj_name="chair",
@@ -2430,8 +2809,8 @@ class ProceduralChair(object):
         )
         self.chair_rail_col_palette = chair_rail_color_palette[1]
 
-        if "Chair Generator" in context.object.modifiers:
-            cg_mod = context.object.modifiers["Chair Generator"]
+        if "Chair Generator" in obj.modifiers:
+            cg_mod = obj.modifiers["Chair Generator"]
             cg_node_group = cg_mod.node_group
 
             seat_mat = bpy.data.materials[self.chair_seat_mat]
@@ -2458,10 +2837,10 @@ class ProceduralChair(object):
             else:
                 self.chair_seat_mat_rot = 0
 
-            seat_mat_id = cg_node_group.interface.items_tree["Seat Material"].identifier
+            seat_mat_id = interface_identifiers(cg_node_group)["Seat Material"]
             cg_mod[seat_mat_id] = bpy.data.materials[self.chair_seat_mat]
 
-            seat_mat.node_tree.interface_update(context)
+            update_node_tree(seat_mat.node_tree, context)
 
             rail_mat = bpy.data.materials[self.chair_rail_mat]
 
@@ -2487,12 +2866,12 @@ class ProceduralChair(object):
             else:
                 self.chair_rail_mat_rot = 0
 
-            rail_mat_id = cg_node_group.interface.items_tree["Rail Material"].identifier
+            rail_mat_id = interface_identifiers(cg_node_group)["Rail Material"]
             cg_mod[rail_mat_id] = bpy.data.materials[self.chair_rail_mat]
 
-            rail_mat.node_tree.interface_update(context)
+            update_node_tree(rail_mat.node_tree, context)
 
-            cg_node_group.interface_update(context)
+            update_node_tree(cg_node_group, context)
 
 
 class ProceduralTable(object):
@@ -2544,9 +2923,12 @@ class ProceduralTable(object):
         bevel_mod.width = 0.002
         bevel_mod.segments = 4
 
-    def randomize_table(self, context):
-        if "Table Generator" in context.object.modifiers:
-            tg_mod = context.object.modifiers["Table Generator"]
+    def randomize_table(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Table Generator" in obj.modifiers:
+            tg_mod = obj.modifiers["Table Generator"]
             tg_node_group = tg_mod.node_group
 
             self.round_table = random.random() < 0.5
@@ -2565,36 +2947,24 @@ class ProceduralTable(object):
 
             ##################################################################################
 
-            round_table_id = tg_node_group.interface.items_tree[
-                "Round Table"
-            ].identifier
-            round_apron_id = tg_node_group.interface.items_tree[
-                "Round Apron"
-            ].identifier
-
-            height_id = tg_node_group.interface.items_tree["Height"].identifier
-            width_id = tg_node_group.interface.items_tree["Width"].identifier
-            depth_id = tg_node_group.interface.items_tree["Depth"].identifier
-
-            top_thickness_id = tg_node_group.interface.items_tree[
-                "Top Thickness"
-            ].identifier
-            top_curvature_id = tg_node_group.interface.items_tree[
-                "Top Curvature"
-            ].identifier
-
-            apron_size_reduction_id = tg_node_group.interface.items_tree[
+            round_table_id = interface_identifiers(tg_node_group)["Round Table"]
+            round_apron_id = interface_identifiers(tg_node_group)["Round Apron"]
+
+            height_id = interface_identifiers(tg_node_group)["Height"]
+            width_id = interface_identifiers(tg_node_group)["Width"]
+            depth_id = interface_identifiers(tg_node_group)["Depth"]
+
+            top_thickness_id = interface_identifiers(tg_node_group)["Top Thickness"]
+            top_curvature_id = interface_identifiers(tg_node_group)["Top Curvature"]
+
+            apron_size_reduction_id = interface_identifiers(tg_node_group)[
                 "Apron Size Reduction"
-            ].identifier
-            apron_thickness_id = tg_node_group.interface.items_tree[
-                "Apron Thickness"
-            ].identifier
+            ]
+            apron_thickness_id = interface_identifiers(tg_node_group)["Apron Thickness"]
 
-            leg_width_id = tg_node_group.interface.items_tree["Leg Width"].identifier
-            leg_thickness_id = tg_node_group.interface.items_tree[
-                "Leg Thickness"
-            ].identifier
-            leg_angle_id = tg_node_group.interface.items_tree["Leg Angle"].identifier
+            leg_width_id = interface_identifiers(tg_node_group)["Leg Width"]
+            leg_thickness_id = interface_identifiers(tg_node_group)["Leg Thickness"]
+            leg_angle_id = interface_identifiers(tg_node_group)["Leg Angle"]
 
             ##################################################################################
 
@@ -2610,32 +2980,16 @@ class ProceduralTable(object):
 
             tg_mod[apron_thickness_id] = self.apron_thickness
 
-            tg_node_group.interface_update(context)
+            update_node_tree(tg_node_group, context)
 
             ## Must be at the end, can only be calculated after every other attribute is registered
             ## ORDER IS VERY IMPORTANT HERE
 
-            table_area_max_width = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["table_area_max_width"]
-                    .data
-                ]
-            )
-
-            table_area_max_depth = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["table_area_max_depth"]
-                    .data
-                ]
+            table_area_attributes = read_evaluated_attributes(
+                context, obj, ["table_area_max_width", "table_area_max_depth"]
             )
+            table_area_max_width = np.max(table_area_attributes["table_area_max_width"])
+            table_area_max_depth = np.max(table_area_attributes["table_area_max_depth"])
 
             self.leg_width = np.random.choice(
                 np.arange(0.03, table_area_max_width / 2, 0.001)
@@ -2668,9 +3022,11 @@ class ProceduralTable(object):
             tg_mod[leg_thickness_id] = self.leg_thickness
             tg_mod[leg_angle_id] = float(self.leg_angle)
 
-            tg_node_group.interface_update(context)
+            update_node_tree(tg_node_group, context)
 
-    def randomize_material(self, context):
+    def randomize_material(self, context, obj=None):
+        if obj is None:
+            obj = context.object
 
         table_obj = ColorPaletteRandomizer().get_dining_room_object(
             obj_name="table",
@@ -2699,8 +3055,8 @@ class ProceduralTable(object):
         )
         self.table_bot_col_palette = table_bottom_color_palette[1]
 
-        if "Table Generator" in context.object.modifiers:
-            tg_mod = context.object.modifiers["Table Generator"]
+        if "Table Generator" in obj.modifiers:
+            tg_mod = obj.modifiers["Table Generator"]
             tg_node_group = tg_mod.node_group
 
             top_mat = bpy.data.materials[self.table_top_mat]
@@ -2728,12 +3084,10 @@ class ProceduralTable(object):
             else:
                 self.table_top_mat_rot = 0
 
-            top_mat_id = tg_node_group.interface.items_tree[
-                "Table Top Material"
-            ].identifier
+            top_mat_id = interface_identifiers(tg_node_group)["Table Top Material"]
             tg_mod[top_mat_id] = bpy.data.materials[self.table_top_mat]
 
-            top_mat.node_tree.interface_update(context)
+            update_node_tree(top_mat.node_tree, context)
 
             bottom_mat = bpy.data.materials[self.table_bot_mat]
 
@@ -2760,14 +3114,14 @@ class ProceduralTable(object):
             else:
                 self.table_bot_mat_rot = 0
 
-            bottom_mat_id = tg_node_group.interface.items_tree[
+            bottom_mat_id = interface_identifiers(tg_node_group)[
                 "Table Bottom Material"
-            ].identifier
+            ]
             tg_mod[bottom_mat_id] = bpy.data.materials[self.table_bot_mat]
 
-            bottom_mat.node_tree.interface_update(context)
+            update_node_tree(bottom_mat.node_tree, context)
 
-            tg_node_group.interface_update(context)
+            update_node_tree(tg_node_group, context)
 
 
 class ProceduralDistractor(object):
@@ -2801,9 +3155,12 @@ class ProceduralDistractor(object):
             self.report({"ERROR"}, "WIP: Distractor Generator Node Tree not found.")
         dg_mod.node_group = dg_node_tree
 
-    def randomize_distractor(self, context):
-        if "Distractor Generator" in context.object.modifiers:
-            dg_mod = context.object.modifiers["Distractor Generator"]
+    def randomize_distractor(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Distractor Generator" in obj.modifiers:
+            dg_mod = obj.modifiers["Distractor Generator"]
             dg_node_group = dg_mod.node_group
 
             self.max_length = np.random.choice(np.arange(0.05, 0.2, 0.01))
@@ -2813,14 +3170,10 @@ class ProceduralDistractor(object):
 
             ##################################################################################
 
-            max_length_id = dg_node_group.interface.items_tree["Max Length"].identifier
-            max_height_id = dg_node_group.interface.items_tree["Max Height"].identifier
-            max_segments_id = dg_node_group.interface.items_tree[
-                "Max Segments"
-            ].identifier
-            random_seed_id = dg_node_group.interface.items_tree[
-                "Random Seed"
-            ].identifier
+            max_length_id = interface_identifiers(dg_node_group)["Max Length"]
+            max_height_id = interface_identifiers(dg_node_group)["Max Height"]
+            max_segments_id = interface_identifiers(dg_node_group)["Max Segments"]
+            random_seed_id = interface_identifiers(dg_node_group)["Random Seed"]
 
             ##################################################################################
 
@@ -2829,7 +3182,7 @@ class ProceduralDistractor(object):
             dg_mod[max_segments_id] = self.max_segments
             dg_mod[random_seed_id] = int(self.random_seed)
 
-            dg_node_group.interface_update(context)
+            update_node_tree(dg_node_group, context)
 
         else:
             print("Object does not have the 'Distractor Generator' Modifier")
@@ -2837,15 +3190,15 @@ class ProceduralDistractor(object):
                 {"ERROR"}, "Object does not have the 'Distractor Generator' Modifier"
             )
 
-    def randomize_material(self, context):
+    def randomize_material(self, context, obj=None):
+        if obj is None:
+            obj = context.object
 
-        if "Distractor Generator" in context.object.modifiers:
-            dg_mod = context.object.modifiers["Distractor Generator"]
+        if "Distractor Generator" in obj.modifiers:
+            dg_mod = obj.modifiers["Distractor Generator"]
             dg_node_group = dg_mod.node_group
 
-            distractor_mat_id = dg_node_group.interface.items_tree[
-                "Material"
-            ].identifier
+            distractor_mat_id = interface_identifiers(dg_node_group)["Material"]
 
             distractor_mat = dg_mod[distractor_mat_id]
 
@@ -2877,7 +3230,7 @@ class ProceduralDistractor(object):
                 "Color 3"
             ].default_value = self.distractor_mat_color3
 
-            distractor_mat.node_tree.interface_update(context)
+            update_node_tree(distractor_mat.node_tree, context)
 
 
 class ProceduralRoom:
@@ -2918,8 +3271,17 @@ class ProceduralRoom:
         self.room_lumen_per_sqm = 0
         self.lumen_per_light_bulb = 800
         self.amount_of_lights = 0
+        # Amount of lights before the light budget
+        self.nominal_amount_of_lights = 0
         self.light_distribution_random_seed = 0
 
+        # Faces of the evaluated room with a material containing this name
+        # are window glass
+        self.window_glass_material_keyword = "glass"
+        # Distance of the portals from the glass into the room
+        self.window_portal_offset = 0.02
+        self.amount_of_window_portals = 0
+
         self.room_wall_mat = ""
         self.room_wall_col_palette = ""
         self.room_wall_mat_rot = 0
@@ -2935,33 +3297,32 @@ class ProceduralRoom:
             random_seed=int(self.construct_floor_random_seed),
         )
 
-        bpy.ops.object.select_all(action="DESELECT")
-        floor_obj.select_set(True)
-        bpy.context.view_layer.objects.active = floor_obj
-
-        rg_mod = bpy.context.object.modifiers.new("Room Generator", "NODES")
+        rg_mod = floor_obj.modifiers.new("Room Generator", "NODES")
         if "room_generator" in bpy.data.node_groups.keys():
             rg_node_tree = bpy.data.node_groups["room_generator"]
         else:
             self.report({"ERROR"}, "WIP: Room Generator Node Tree not found.")
 
         rg_mod.node_group = rg_node_tree
-        self.randomize_room(context)
+        self.randomize_room(context, floor_obj)
 
-        solidify_mod = bpy.context.object.modifiers.new("Solidify", "SOLIDIFY")
+        solidify_mod = floor_obj.modifiers.new("Solidify", "SOLIDIFY")
         solidify_mod.thickness = 0.0001
         solidify_mod.use_even_offset = True
         solidify_mod.use_rim = True
 
-    def randomize_room(self, context):
-        if "Room Generator" in context.object.modifiers:
-            rg_mod = context.object.modifiers["Room Generator"]
+    def randomize_room(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Room Generator" in obj.modifiers:
+            rg_mod = obj.modifiers["Room Generator"]
             rg_node_group = rg_mod.node_group
 
             self.amount_of_windows = np.random.choice(np.arange(1, 6, 1))
             self.wall_height = np.random.choice(np.arange(2.3, 2.5, 0.01))
 
-            max_room_width = np.max(context.object.dimensions[:2])
+            max_room_width = np.max(obj.dimensions[:2])
 
             self.window_width = (max_room_width * 0.55) / self.amount_of_windows
 
@@ -3014,66 +3375,51 @@ class ProceduralRoom:
             self.amount_of_lights = np.floor(
                 (self.room_lumen_per_sqm * self.room_area) / self.lumen_per_light_bulb
             )
+            self.apply_light_budget(context)
             self.light_distribution_random_seed = np.random.choice(
                 np.arange(0, 5000, 1)
             )
 
-            wall_height_id = rg_node_group.interface.items_tree[
-                "Wall Height"
-            ].identifier
-            wall_thickness_id = rg_node_group.interface.items_tree[
-                "Wall Thickness"
-            ].identifier
-            baseboard_height_id = rg_node_group.interface.items_tree[
+            wall_height_id = interface_identifiers(rg_node_group)["Wall Height"]
+            wall_thickness_id = interface_identifiers(rg_node_group)["Wall Thickness"]
+            baseboard_height_id = interface_identifiers(rg_node_group)[
                 "Baseboard Height"
-            ].identifier
-            baseboard_width_id = rg_node_group.interface.items_tree[
-                "Baseboard Width"
-            ].identifier
-            table_location_random_seed_id = rg_node_group.interface.items_tree[
+            ]
+            baseboard_width_id = interface_identifiers(rg_node_group)["Baseboard Width"]
+            table_location_random_seed_id = interface_identifiers(rg_node_group)[
                 "Table Location Random Seed"
-            ].identifier
+            ]
 
-            amount_of_windows_id = rg_node_group.interface.items_tree[
+            amount_of_windows_id = interface_identifiers(rg_node_group)[
                 "Amount of Windows"
-            ].identifier
-            window_height_id = rg_node_group.interface.items_tree[
-                "Window Height"
-            ].identifier
-            window_width_id = rg_node_group.interface.items_tree[
-                "Window Width"
-            ].identifier
-            window_frame_thickness_id = rg_node_group.interface.items_tree[
+            ]
+            window_height_id = interface_identifiers(rg_node_group)["Window Height"]
+            window_width_id = interface_identifiers(rg_node_group)["Window Width"]
+            window_frame_thickness_id = interface_identifiers(rg_node_group)[
                 "Window Frame Thickness"
-            ].identifier
-            window_frame_depth_id = rg_node_group.interface.items_tree[
+            ]
+            window_frame_depth_id = interface_identifiers(rg_node_group)[
                 "Window Frame Depth"
-            ].identifier
-            window_thickness_id = rg_node_group.interface.items_tree[
+            ]
+            window_thickness_id = interface_identifiers(rg_node_group)[
                 "Window Thickness"
-            ].identifier
-            window_depth_id = rg_node_group.interface.items_tree[
-                "Window Depth"
-            ].identifier
-            glass_thickness_id = rg_node_group.interface.items_tree[
-                "Glass Thickness"
-            ].identifier
-            window_height_pos_id = rg_node_group.interface.items_tree[
+            ]
+            window_depth_id = interface_identifiers(rg_node_group)["Window Depth"]
+            glass_thickness_id = interface_identifiers(rg_node_group)["Glass Thickness"]
+            window_height_pos_id = interface_identifiers(rg_node_group)[
                 "Window Height Position"
-            ].identifier
-            window_distribution_random_seed = rg_node_group.interface.items_tree[
+            ]
+            window_distribution_random_seed = interface_identifiers(rg_node_group)[
                 "Window Distribution Random Seed"
-            ].identifier
+            ]
 
-            indoor_lighting_id = rg_node_group.interface.items_tree[
-                "Indoor Lighting"
-            ].identifier
-            amount_of_lights_id = rg_node_group.interface.items_tree[
+            indoor_lighting_id = interface_identifiers(rg_node_group)["Indoor Lighting"]
+            amount_of_lights_id = interface_identifiers(rg_node_group)[
                 "Amount of Lights"
-            ].identifier
-            light_distribution_random_seed_id = rg_node_group.interface.items_tree[
+            ]
+            light_distribution_random_seed_id = interface_identifiers(rg_node_group)[
                 "Light Distribution Random Seed"
-            ].identifier
+            ]
 
             rg_mod[wall_height_id] = self.wall_height
             rg_mod[wall_thickness_id] = self.wall_thickness
@@ -3100,13 +3446,15 @@ class ProceduralRoom:
                 self.light_distribution_random_seed
             )
 
-            rg_node_group.interface_update(context)
+            update_node_tree(rg_node_group, context)
 
         else:
             print("Object does not have 'Room Generator' Modifier")
             self.report({"ERROR"}, "Object does not have 'Room Generator' Modifier")
 
-    def randomize_material(self, context):
+    def randomize_material(self, context, obj=None):
+        if obj is None:
+            obj = context.object
 
         room_obj = ColorPaletteRandomizer().get_dining_room_object(
             obj_name="room",
@@ -3132,8 +3480,8 @@ class ProceduralRoom:
         self.room_wall_mat = f"Procedural {room_wall_color_palette[0]['material']} Wall"
         self.room_wall_col_palette = room_wall_color_palette[1]
 
-        if "Room Generator" in context.object.modifiers:
-            rg_mod = context.object.modifiers["Room Generator"]
+        if "Room Generator" in obj.modifiers:
+            rg_mod = obj.modifiers["Room Generator"]
             rg_node_group = rg_mod.node_group
 
             floor_mat = bpy.data.materials[self.room_floor_mat]
@@ -3161,12 +3509,10 @@ class ProceduralRoom:
             else:
                 self.room_floor_mat_rot = 0
 
-            floor_mat_id = rg_node_group.interface.items_tree[
-                "Floor Material"
-            ].identifier
+            floor_mat_id = interface_identifiers(rg_node_group)["Floor Material"]
             rg_mod[floor_mat_id] = bpy.data.materials[self.room_floor_mat]
 
-            floor_mat.node_tree.interface_update(context)
+            update_node_tree(floor_mat.node_tree, context)
 
             wall_mat = bpy.data.materials[self.room_wall_mat]
 
@@ -3192,12 +3538,12 @@ class ProceduralRoom:
             else:
                 self.room_wall_mat_rot = 0
 
-            wall_mat_id = rg_node_group.interface.items_tree["Wall Material"].identifier
+            wall_mat_id = interface_identifiers(rg_node_group)["Wall Material"]
             rg_mod[wall_mat_id] = bpy.data.materials[self.room_wall_mat]
 
-            wall_mat.node_tree.interface_update(context)
+            update_node_tree(wall_mat.node_tree, context)
 
-            rg_node_group.interface_update(context)
+            update_node_tree(rg_node_group, context)
 
     def construct_random_floor(
         self,
@@ -3209,323 +3555,52 @@ class ProceduralRoom:
         amount_of_floor_cuts: int = 2,
         only_use_big_edges: bool = True,
     ):
+        """
+        Creates the floor object of the room from a random floor plan
 
-        if not bpy.context.object or bpy.context.object.mode == "OBJECT":
-
-            random.seed(random_seed)
-
-            # if there is more than one extrusions, the used floor area must be split over all sections
-            # the first section should be at least 60% - 80% big, after that the size depends on the amount of left
-            # floor values
-            if amount_of_extrusions > 1:
-                size_sequence = []
-                running_sum = 0.0
-                start_minimum = 0.0
-                for i in range(amount_of_extrusions - 1):
-                    if i == 0:
-                        size_sequence.append(random.uniform(0.6, 0.8))
-                        start_minimum = (1.0 - size_sequence[-1]) / amount_of_extrusions
-                    else:
-                        if start_minimum < 1.0 - running_sum:
-                            size_sequence.append(
-                                random.uniform(start_minimum, 1.0 - running_sum)
-                            )
-                        else:
-                            break
-                    running_sum += size_sequence[-1]
-                if 1.0 - running_sum > 1e-7:
-                    size_sequence.append(1.0 - running_sum)
-                if amount_of_extrusions != len(size_sequence):
-                    print(
-                        f"Amount of extrusions was reduced to: {len(size_sequence)}. To avoid rooms, "
-                        f"which are smaller than 1e-7"
-                    )
-                    self.report(
-                        {"WARNING"},
-                        f"Amount of extrusions was reduced to: {len(size_sequence)}. To avoid rooms, "
-                        f"which are smaller than 1e-7",
-                    )
-                    amount_of_extrusions = len(size_sequence)
-            else:
-                size_sequence = [1.0]
-
-            # this list of areas is then used to calculate the extrusions
-            # if there is only one element in there, it will create a rectangle
-            used_floor_areas = [size * used_floor_area for size in size_sequence]
-
-            # calculate the squared room length for the base room
-            squared_room_length = np.sqrt(used_floor_areas[0])
-
-            # create a new plane and rename it to Wall
-            bpy.ops.mesh.primitive_plane_add(location=(0, 0, 0))
-            room_obj = bpy.context.object
-            room_obj.name = "room"
-
-            # calculate the side length of the base room, for that the `fac_from_square_room` is used
-            room_length_x = (
-                fac_from_square_room * random.uniform(-1, 1) * squared_room_length
-                + squared_room_length
-            )
-            # make sure that the floor area is still used
-            room_length_y = used_floor_areas[0] / room_length_x
-
-            # change the plane to this size
-            bpy.ops.object.select_all(action="DESELECT")
-            room_obj.select_set(True)
-            bpy.context.view_layer.objects.active = room_obj
-            bpy.ops.object.mode_set(mode="EDIT")
-            bpy.ops.transform.resize(
-                value=(room_length_x * 0.5, room_length_y * 0.5, 1)
-            )
-            bpy.ops.object.mode_set(mode="OBJECT")
-
-            def cut_plane(plane: bpy.types.Object):
-
-                # save the size of the plane to determine a best split value
-                x_size = np.array(plane.scale)[0]
-                y_size = np.array(plane.scale)[1]
-
-                # switch to edit mode and select all faces
-                bpy.ops.object.mode_set(mode="EDIT")
-                bpy.ops.mesh.select_all(action="SELECT")
-                bpy.ops.object.mode_set(mode="OBJECT")
-
-                # convert plane to BMesh object
-                bm = bmesh.new()
-                bm.from_mesh(plane.data)
-                bm.faces.ensure_lookup_table()
-
-                # find all selected edges
-                edges = [edge for edge in bm.edges if edge.select]
-
-                biggest_face_id = np.argmax([f.calc_area() for f in bm.faces])
-                biggest_face = bm.faces[biggest_face_id]
-
-                # find the biggest face
-                faces = [face for face in bm.faces if face == biggest_face]
-                geom = []
-                geom.extend(edges)
-                geom.extend(faces)
-
-                # calculate cutting point
-                cutting_point = [
-                    x_size * random.uniform(-1, 1),
-                    y_size * random.uniform(-1, 1),
-                    0,
-                ]
-                # select a random axis to specify in which direction to cut
-                direction_axis = [1, 0, 0] if random.uniform(0, 1) < 0.5 else [0, 1, 0]
-
-                # cut the plane and update the final mesh
-                bmesh.ops.bisect_plane(
-                    bm,
-                    dist=0.01,
-                    geom=geom,
-                    plane_co=cutting_point,
-                    plane_no=direction_axis,
-                )
+        Args:
+        - random_seed (int): seed of the floor plan
+        - see drg_floor_plan.construct_random_floor for the other arguments
 
-                if bm.is_wrapped:
-                    bmesh.update_edit_mesh(plane.data)
-                else:
-                    bm.to_mesh(plane.data)
-                    bm.free()
-
-                plane.data.update()
-
-            # for each floor cut perform one cut_plane
-            for i in range(amount_of_floor_cuts):
-                cut_plane(room_obj)
-
-            # do several extrusions of the basic floor plan, the first one is always the basic one
-            for i in range(1, amount_of_extrusions):
-                # Change to edit mode of the selected floor
-                bpy.ops.object.select_all(action="DESELECT")
-                room_obj.select_set(True)
-                bpy.context.view_layer.objects.active = room_obj
-                bpy.ops.object.mode_set(mode="EDIT")
-                bpy.ops.mesh.select_all(action="DESELECT")
-                bm = bmesh.from_edit_mesh(room_obj.data)
-                bm.faces.ensure_lookup_table()
-                bm.edges.ensure_lookup_table()
-
-                # calculate the size of all edges and find all edges, which are wider than the minimum corridor_width
-                # to avoid that super small, super long pieces are created
-                boundary_edges = [edge for edge in bm.edges if edge.is_boundary]
-                boundary_sizes = [(edge, edge.calc_length()) for edge in boundary_edges]
-                boundary_sizes = [
-                    (edge, size)
-                    for edge, size in boundary_sizes
-                    if size > corridor_width
-                ]
-
-                if len(boundary_sizes) > 0:
-                    # sort the boundaries to focus oonly on the big ones
-                    boundary_sizes.sort(key=lambda edge: edge[1])
-                    if only_use_big_edges:
-                        # only select the bigger half of the selected boundaries
-                        half_size = len(boundary_sizes) // 2
-                    else:
-                        # use any of the selected boundaries
-                        half_size = 0
-                    used_edges = [edge for edge, s in boundary_sizes[half_size:]]
-
-                    random_edge = None
-                    shift_vec = None
-                    edge_counter = 0
-                    random_index = random.randrange(len(used_edges))
-
-                    while edge_counter < len(used_edges):
-                        # select a random edge from the choose edges
-                        random_edge = used_edges[random_index]
-
-                        # get the direction of the current edge
-                        direction = np.abs(
-                            random_edge.verts[0].co - random_edge.verts[1].co
-                        )
-                        # the shift value depends on the used_floor_area size
-                        shift_value = used_floor_areas[i] / random_edge.calc_length()
-
-                        # depending if the random edge is aligned with the x-axis or the y-axis,
-                        # the shift is the opposite direction
-                        if direction[0] == 0:
-                            x_shift, y_shift = shift_value, 0
-                        else:
-                            x_shift, y_shift = 0, shift_value
-
-                        # calculate the vertices for the new face
-                        shift_vec = mathutils.Vector([x_shift, y_shift, 0])
-                        dir_found = False
-                        for tested_dir in [1, -1]:
-                            shift_vec *= tested_dir
-                            new_verts = [edge.co for edge in random_edge.verts]
-                            new_verts.extend([edge + shift_vec for edge in new_verts])
-                            new_verts = np.array(new_verts)
-
-                            # check if the newly constructed face is colliding with one of the others
-                            # if so generate a new face
-                            collision_face_found = False
-
-                            for existing_face in bm.faces:
-                                existing_verts = np.array(
-                                    [vert.co for vert in existing_face.verts]
-                                )
-
-                                @staticmethod
-                                def check_bb_intersection_on_values(
-                                    min_b1: List[float],
-                                    max_b1: List[float],
-                                    min_b2: List[float],
-                                    max_b2: List[float],
-                                    used_check: Callable[
-                                        [float, float], bool
-                                    ] = lambda a, b: a
-                                    >= b,
-                                ):
-                                    """
-                                    Checks if there is an intersection of the given bounding box values. Here we use two different bounding boxes,
-                                    namely b1 and b2. Each of them has a corresponding set of min and max values, this works for 2 and 3 dimensional
-                                    problems.
-
-                                    :param min_b1: List of minimum bounding box points for b1.
-                                    :param max_b1: List of maximum bounding box points for b1.
-                                    :param min_b2: List of minimum bounding box points for b2.
-                                    :param max_b2: List of maximum bounding box points for b2.
-                                    :param used_check: The operation used inside the is_overlapping1D. With that it possible to change the \
-                                                    collision check from volume and surface check to pure surface or volume checks.
-                                    :return: True if the two bounding boxes intersect with each other
-                                    """
-                                    collide = True
-                                    for (
-                                        min_b1_val,
-                                        max_b1_val,
-                                        min_b2_val,
-                                        max_b2_val,
-                                    ) in zip(min_b1, max_b1, min_b2, max_b2):
-                                        # inspired by this:
-                                        # https://stackoverflow.com/questions/20925818/algorithm-to-check-if-two-boxes-overlap
-                                        # Checks in each dimension, if there is an overlap if this happens it must be an overlap in 3D, too.
-                                        def is_overlapping_1D(
-                                            x_min_1, x_max_1, x_min_2, x_max_2
-                                        ):
-                                            # returns true if the min and max values are overlapping
-                                            return used_check(
-                                                x_max_1, x_min_2
-                                            ) and used_check(x_max_2, x_min_1)
-
-                                        collide = collide and is_overlapping_1D(
-                                            min_b1_val,
-                                            max_b1_val,
-                                            min_b2_val,
-                                            max_b2_val,
-                                        )
-                                    return collide
-
-                                if check_bb_intersection_on_values(
-                                    np.min(existing_verts, axis=0)[:2],
-                                    np.max(existing_verts, axis=0)[:2],
-                                    np.min(new_verts, axis=0)[:2],
-                                    np.max(new_verts, axis=0)[:2],
-                                    # by using this check an edge collision is ignored
-                                    used_check=lambda a, b: a > b,
-                                ):
-                                    collision_face_found = True
-                                    break
-                            if not collision_face_found:
-                                dir_found = True
-                                break
-                        if dir_found:
-                            break
-
-                        random_index = (random_index + 1) % len(used_edges)
-                        edge_counter += 1
-                        random_edge = None
-
-                    if random_edge is None:
-                        for edge in used_edges:
-                            edge.select = True
-                        raise Exception(
-                            "No edge found to extrude up on! The reason might be that there are to many cuts"
-                            "in the basic room or that the corridor width is too high."
-                        )
+        Returns:
+        - room_obj (bpy.types.Object): the floor object "room"
+        """
 
-                    # extrude this edge with the calculated shift
-                    random_edge.select = True
-                    bpy.ops.mesh.extrude_region_move(
-                        MESH_OT_extrude_region={
-                            "use_normal_flip": False,
-                            "use_dissolve_ortho_edges": False,
-                            "mirror": False,
-                        },
-                        TRANSFORM_OT_translate={
-                            "value": shift_vec,
-                            "orient_type": "GLOBAL",
-                        },
-                    )
+        floor_plan = drg_floor_plan.construct_random_floor(
+            random_seed,
+            used_floor_area=used_floor_area,
+            amount_of_extrusions=amount_of_extrusions,
+            fac_from_square_room=fac_from_square_room,
+            corridor_width=corridor_width,
+            amount_of_floor_cuts=amount_of_floor_cuts,
+            only_use_big_edges=only_use_big_edges,
+        )
+        vertices, faces = floor_plan.mesh_data()
 
-                else:
-                    raise Exception(
-                        "The corridor width is so big that no edge could be selected, "
-                        "reduce the corridor width or reduce the amount of floor cuts."
-                    )
+        room_mesh = bpy.data.meshes.new("room")
+        room_mesh.from_pydata(vertices, [], faces)
 
-                # remove all double vertices, which might occur
-                bpy.ops.mesh.select_all(action="SELECT")
-                bpy.ops.mesh.remove_doubles()
-                bpy.ops.mesh.select_all(action="DESELECT")
-                if bm.is_wrapped:
-                    bmesh.update_edit_mesh(room_obj.data)
-                else:
-                    bm.to_mesh(room_obj.data)
-                    bm.free()
+        # planar uvs over the bounds of the floor, like the uvs of a plane
+        loop_vertices = np.empty(len(room_mesh.loops), dtype=np.int32)
+        room_mesh.loops.foreach_get("vertex_index", loop_vertices)
+        floor_min = vertices[:, :2].min(axis=0)
+        floor_size = np.maximum(vertices[:, :2].max(axis=0) - floor_min, 1e-7)
+        loop_uvs = (vertices[loop_vertices, :2] - floor_min) / floor_size
+        uv_layer = room_mesh.uv_layers.new(name="UVMap")
+        uv_layer.data.foreach_set("uv", loop_uvs.astype(np.float32).ravel())
+        room_mesh.update()
 
-                bpy.ops.object.mode_set(mode="OBJECT")
+        room_obj = bpy.data.objects.new("room", room_mesh)
+        bpy.context.view_layer.active_layer_collection.collection.objects.link(room_obj)
 
         return room_obj
 
-    def randomize_lighting(self, context):
-        if "Room Generator" in context.object.modifiers:
-            rg_mod = context.object.modifiers["Room Generator"]
+    def randomize_lighting(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Room Generator" in obj.modifiers:
+            rg_mod = obj.modifiers["Room Generator"]
             rg_node_group = rg_mod.node_group
 
             self.indoor_lighting = random.choice([True, False])
@@ -3533,19 +3608,18 @@ class ProceduralRoom:
             self.amount_of_lights = np.floor(
                 (self.room_lumen_per_sqm * self.room_area) / self.lumen_per_light_bulb
             )
+            self.apply_light_budget(context)
             self.light_distribution_random_seed = np.random.choice(
                 np.arange(0, 5000, 1)
             )
 
-            indoor_lighting_id = rg_node_group.interface.items_tree[
-                "Indoor Lighting"
-            ].identifier
-            amount_of_lights_id = rg_node_group.interface.items_tree[
+            indoor_lighting_id = interface_identifiers(rg_node_group)["Indoor Lighting"]
+            amount_of_lights_id = interface_identifiers(rg_node_group)[
                 "Amount of Lights"
-            ].identifier
-            light_distribution_random_seed_id = rg_node_group.interface.items_tree[
+            ]
+            light_distribution_random_seed_id = interface_identifiers(rg_node_group)[
                 "Light Distribution Random Seed"
-            ].identifier
+            ]
 
             rg_mod[indoor_lighting_id] = self.indoor_lighting
             rg_mod[amount_of_lights_id] = int(self.amount_of_lights)
@@ -3553,32 +3627,205 @@ class ProceduralRoom:
                 self.light_distribution_random_seed
             )
 
-            rg_node_group.interface_update(context)
+            update_node_tree(rg_node_group, context)
 
         else:
             print("Object does not have 'Room Generator' Modifier")
             self.report({"ERROR"}, "Object does not have 'Room Generator' Modifier")
 
+    def apply_light_budget(self, context):
+        """
+        Caps amount_of_lights at max_indoor_lights of the scene, 0 disables
+        the budget. Every light costs per sample, the Room Generator spreads
+        the capped amount over the ceiling instead and LightingRandomizer
+        scales their energy by light_energy_scale, so the total flux stays
+        the same.
+        """
 
-class DiningRoomDistributor:
-    _instance = None
+        self.nominal_amount_of_lights = self.amount_of_lights
+        max_indoor_lights = context.scene.max_indoor_lights
+        if max_indoor_lights and self.amount_of_lights > max_indoor_lights:
+            self.amount_of_lights = float(max_indoor_lights)
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DiningRoomDistributor, cls).__new__(cls)
+    @property
+    def light_energy_scale(self):
+        if not self.amount_of_lights:
+            return 1.0
 
-        return cls._instance
+        return self.nominal_amount_of_lights / self.amount_of_lights
 
-    def __init__(self):
-        self.distribution_random_seed = 0
-        self.tableware_rotation_random_seed = 0
-        self.chair_location_random_seed = 0
-        self.chair_rotation_random_seed = 0
-        self.amount_of_forks = 0
-        self.amount_of_glasses = 0
-        self.amount_of_knives = 0
-        self.amount_of_plates = 0
-        self.amount_of_spoons = 0
+    def find_window_panes(self, context, room_obj):
+        """
+        Reads the window glass of the evaluated room. Every connected part of
+        the glass faces is one pane, its size is measured in the plane of its
+        largest face.
+
+        Returns:
+        - window_panes (list): (center, normal, width, height) in world space,
+            the normal points into the room
+        """
+
+        room_mesh = room_obj.evaluated_get(evaluated_depsgraph(context)).data
+        glass_material_indices = [
+            i
+            for i, material in enumerate(room_mesh.materials)
+            if material is not None
+            and self.window_glass_material_keyword in material.name.lower()
+        ]
+        if not glass_material_indices:
+            return []
+
+        polygons = room_mesh.polygons
+        amount_of_polygons = len(polygons)
+        material_indices = np.empty(amount_of_polygons, dtype=np.int32)
+        polygons.foreach_get("material_index", material_indices)
+        normals = np.empty(amount_of_polygons * 3, dtype=np.float32)
+        polygons.foreach_get("normal", normals)
+        areas = np.empty(amount_of_polygons, dtype=np.float32)
+        polygons.foreach_get("area", areas)
+        loop_starts = np.empty(amount_of_polygons, dtype=np.int32)
+        polygons.foreach_get("loop_start", loop_starts)
+        loop_totals = np.empty(amount_of_polygons, dtype=np.int32)
+        polygons.foreach_get("loop_total", loop_totals)
+        loop_vertex_indices = np.empty(len(room_mesh.loops), dtype=np.int32)
+        room_mesh.loops.foreach_get("vertex_index", loop_vertex_indices)
+        vertex_coords = np.empty(len(room_mesh.vertices) * 3, dtype=np.float32)
+        room_mesh.vertices.foreach_get("co", vertex_coords)
+
+        # World space, the room object may be transformed
+        matrix_world = np.array(room_obj.matrix_world, dtype=np.float32)
+        vertex_coords = (
+            vertex_coords.reshape(-1, 3) @ matrix_world[:3, :3].T + matrix_world[:3, 3]
+        )
+        normals = normals.reshape(-1, 3) @ matrix_world[:3, :3].T
+
+        # The walls stand on the boundary of the floor plan, the mesh of the
+        # room object before its modifiers
+        floor_coords = np.empty(len(room_obj.data.vertices) * 3, dtype=np.float64)
+        room_obj.data.vertices.foreach_get("co", floor_coords)
+        floor_coords = (
+            floor_coords.reshape(-1, 3) @ matrix_world[:3, :3].T + matrix_world[:3, 3]
+        )
+        floor_plan = drg_floor_plan.FloorPlan(
+            floor_coords[:, :2],
+            [polygon.vertices for polygon in room_obj.data.polygons],
+        )
+
+        glass_polygons = np.flatnonzero(
+            np.isin(material_indices, glass_material_indices)
+        )
+
+        # Connected parts of the glass faces, union-find over their vertices
+        parents = {}
+
+        def find(vertex_index):
+            while parents.setdefault(vertex_index, vertex_index) != vertex_index:
+                parents[vertex_index] = parents[parents[vertex_index]]
+                vertex_index = parents[vertex_index]
+            return vertex_index
+
+        polygon_vertices = {}
+        for polygon_index in glass_polygons:
+            loop_start = loop_starts[polygon_index]
+            vertex_indices = loop_vertex_indices[
+                loop_start : loop_start + loop_totals[polygon_index]
+            ]
+            polygon_vertices[polygon_index] = vertex_indices
+            root = find(int(vertex_indices[0]))
+            for vertex_index in vertex_indices[1:]:
+                parents[find(int(vertex_index))] = root
+
+        panes = {}
+        for polygon_index, vertex_indices in polygon_vertices.items():
+            panes.setdefault(find(int(vertex_indices[0])), []).append(polygon_index)
+
+        window_panes = []
+        for pane_polygons in panes.values():
+            largest_polygon = max(pane_polygons, key=lambda index: areas[index])
+            normal = normals[largest_polygon].copy()
+            normal[2] = 0
+            if np.linalg.norm(normal) < 1e-6:
+                continue
+            normal /= np.linalg.norm(normal)
+
+            pane_coords = vertex_coords[
+                np.unique(
+                    np.concatenate([polygon_vertices[index] for index in pane_polygons])
+                )
+            ]
+            # Horizontal axis of the pane
+            tangent = np.array([-normal[1], normal[0], 0], dtype=np.float32)
+            tangent_coords = pane_coords @ tangent
+            width = tangent_coords.max() - tangent_coords.min()
+            height = pane_coords[:, 2].max() - pane_coords[:, 2].min()
+            if width < 1e-3 or height < 1e-3:
+                continue
+
+            center = (pane_coords.min(axis=0) + pane_coords.max(axis=0)) / 2
+            inward_normal = floor_plan.inward_normal(center[:2], normal[:2])
+            if inward_normal is not None and np.dot(normal[:2], inward_normal) < 0:
+                normal = -normal
+            window_panes.append((center, normal, float(width), float(height)))
+
+        return window_panes
+
+    def create_window_portals(self, context, room_obj):
+        """
+        Places a Cycles light portal in front of every window pane of the
+        evaluated room. Sky light then is sampled through the windows instead
+        of the whole sky, which reduces the noise of daylit rooms. The portals
+        are linked to the collection of the room and deleted with it.
+
+        Returns:
+        - amount_of_window_portals (int): amount of created portals
+        """
+
+        # Light data of the portals of deleted rooms
+        for light in list(bpy.data.lights):
+            if light.name.startswith("window_portal") and light.users == 0:
+                bpy.data.lights.remove(light)
+
+        window_panes = self.find_window_panes(context, room_obj)
+        for i, (center, normal, width, height) in enumerate(window_panes):
+            portal_light = bpy.data.lights.new(f"window_portal_{i}", type="AREA")
+            portal_light.shape = "RECTANGLE"
+            portal_light.size = width
+            portal_light.size_y = height
+            portal_light.cycles.is_portal = True
+
+            portal_obj = bpy.data.objects.new(f"window_portal_{i}", portal_light)
+            portal_obj.location = center + normal * self.window_portal_offset
+            # Area lights face their local -Z axis, portals face into the room
+            portal_obj.rotation_euler = (
+                mathutils.Vector(normal).to_track_quat("-Z", "Y").to_euler()
+            )
+            for collection in room_obj.users_collection:
+                collection.objects.link(portal_obj)
+
+        self.amount_of_window_portals = len(window_panes)
+
+        return self.amount_of_window_portals
+
+
+class DiningRoomDistributor:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DiningRoomDistributor, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.distribution_random_seed = 0
+        self.tableware_rotation_random_seed = 0
+        self.chair_location_random_seed = 0
+        self.chair_rotation_random_seed = 0
+        self.amount_of_forks = 0
+        self.amount_of_glasses = 0
+        self.amount_of_knives = 0
+        self.amount_of_plates = 0
+        self.amount_of_spoons = 0
         self.amount_of_distractors = 0
         self.amount_of_napkins = 0
 
@@ -3606,9 +3853,12 @@ class DiningRoomDistributor:
                 "Object does not have 'Table Generator' or does have 'Dining Room Distributor' Modifier already",
             )
 
-    def randomize_distribution(self, context):
-        if "Dining Room Distributor" in context.object.modifiers:
-            drd_mod = context.object.modifiers["Dining Room Distributor"]
+    def randomize_distribution(self, context, obj=None):
+        if obj is None:
+            obj = context.object
+
+        if "Dining Room Distributor" in obj.modifiers:
+            drd_mod = obj.modifiers["Dining Room Distributor"]
             drd_node_group = drd_mod.node_group
 
             self.distribution_random_seed = np.random.choice(np.arange(0, 5000, 1))
@@ -3618,18 +3868,18 @@ class DiningRoomDistributor:
             self.chair_location_random_seed = np.random.choice(np.arange(0, 5000, 1))
             self.chair_rotation_random_seed = np.random.choice(np.arange(0, 5000, 1))
 
-            distribution_random_seed_id = drd_node_group.interface.items_tree[
+            distribution_random_seed_id = interface_identifiers(drd_node_group)[
                 "Distribution Random Seed"
-            ].identifier
-            tableware_rotation_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            tableware_rotation_random_seed_id = interface_identifiers(drd_node_group)[
                 "Tableware Rotation Random Seed"
-            ].identifier
-            chair_location_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            chair_location_random_seed_id = interface_identifiers(drd_node_group)[
                 "Chair Location Random Seed"
-            ].identifier
-            chair_rotation_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            chair_rotation_random_seed_id = interface_identifiers(drd_node_group)[
                 "Chair Rotation Random Seed"
-            ].identifier
+            ]
 
             drd_mod[distribution_random_seed_id] = int(self.distribution_random_seed)
             drd_mod[tableware_rotation_random_seed_id] = int(
@@ -3642,83 +3892,33 @@ class DiningRoomDistributor:
                 self.chair_rotation_random_seed
             )
 
-            drd_node_group.interface_update(context)
+            update_node_tree(drd_node_group, context)
 
-            self.amount_of_forks = np.max(
+            distribution_attributes = read_evaluated_attributes(
+                context,
+                obj,
                 [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_forks"]
-                    .data
-                ]
+                    "amount_of_forks",
+                    "amount_of_glasses",
+                    "amount_of_knives",
+                    "amount_of_plates",
+                    "amount_of_spoons",
+                    "amount_of_distractors",
+                    "amount_of_napkins",
+                ],
             )
-
+            self.amount_of_forks = np.max(distribution_attributes["amount_of_forks"])
             self.amount_of_glasses = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_glasses"]
-                    .data
-                ]
-            )
-
-            self.amount_of_knives = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_knives"]
-                    .data
-                ]
-            )
-
-            self.amount_of_plates = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_plates"]
-                    .data
-                ]
+                distribution_attributes["amount_of_glasses"]
             )
-
-            self.amount_of_spoons = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_spoons"]
-                    .data
-                ]
-            )
-
+            self.amount_of_knives = np.max(distribution_attributes["amount_of_knives"])
+            self.amount_of_plates = np.max(distribution_attributes["amount_of_plates"])
+            self.amount_of_spoons = np.max(distribution_attributes["amount_of_spoons"])
             self.amount_of_distractors = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_distractors"]
-                    .data
-                ]
+                distribution_attributes["amount_of_distractors"]
             )
-
             self.amount_of_napkins = np.max(
-                [
-                    v.value
-                    for v in context.object.evaluated_get(
-                        context.evaluated_depsgraph_get()
-                    )
-                    .data.attributes["amount_of_napkins"]
-                    .data
-                ]
+                distribution_attributes["amount_of_napkins"]
             )
 
         else:
@@ -3728,240 +3928,1605 @@ class DiningRoomDistributor:
             )
 
 
-class SceneRenderer:
+# Node trees whose interface_update is deferred, None outside of
+# deferred_node_tree_updates
+_deferred_node_trees = None
+
+
+def update_node_tree(node_tree, context):
+    """
+    Calls interface_update of a node tree after its inputs or the inputs of
+    its modifiers were changed. While updates are deferred, the node tree is
+    only queued and updated once by flush_node_tree_updates.
+    """
+
+    if _deferred_node_trees is None:
+        node_tree.interface_update(context)
+    else:
+        _deferred_node_trees[node_tree.as_pointer()] = node_tree
+
+
+def flush_node_tree_updates(context=None):
+    if not _deferred_node_trees:
+        return
+
+    node_trees = list(_deferred_node_trees.values())
+    _deferred_node_trees.clear()
+    for node_tree in node_trees:
+        node_tree.interface_update(context or bpy.context)
+
+
+def evaluated_depsgraph(context):
+    """
+    Returns:
+    - depsgraph (bpy.types.Depsgraph): the evaluated depsgraph, including the
+        deferred node tree updates
+    """
+
+    flush_node_tree_updates(context)
+
+    return context.evaluated_depsgraph_get()
+
+
+# attribute data type -> (foreach_get property, components, read dtype, dtype)
+ATTRIBUTE_READBACK_TYPES = {
+    "FLOAT": ("value", 1, np.float32, np.float64),
+    "INT": ("value", 1, np.int32, np.int64),
+    "INT8": ("value", 1, np.int32, np.int64),
+    "BOOLEAN": ("value", 1, bool, bool),
+    "FLOAT2": ("vector", 2, np.float32, np.float64),
+    "INT32_2D": ("value", 2, np.int32, np.int64),
+    "FLOAT_VECTOR": ("vector", 3, np.float32, np.float64),
+    "FLOAT_COLOR": ("color", 4, np.float32, np.float64),
+    "BYTE_COLOR": ("color", 4, np.float32, np.float64),
+    "QUATERNION": ("value", 4, np.float32, np.float64),
+}
+
+
+def read_evaluated_attributes(context, obj, attribute_names):
+    """
+    Evaluates the depsgraph once and reads attributes of the evaluated mesh
+    of an object with foreach_get. The values equal the Python values of the
+    attribute elements, floats are returned as float64 and integers as int64.
+
+    Args:
+    - obj (bpy.types.Object): object with the attributes
+    - attribute_names (list): names of the attributes to read
+
+    Returns:
+    - attributes (dict): attribute name -> np.ndarray of shape (elements,)
+        or (elements, components)
+    """
+
+    attributes = obj.evaluated_get(evaluated_depsgraph(context)).data.attributes
+
+    values = {}
+    for attribute_name in attribute_names:
+        attribute = attributes[attribute_name]
+        property_name, components, read_dtype, dtype = ATTRIBUTE_READBACK_TYPES[
+            attribute.data_type
+        ]
+        buffer = np.empty(len(attribute.data) * components, dtype=read_dtype)
+        attribute.data.foreach_get(property_name, buffer)
+        if components > 1:
+            buffer = buffer.reshape(-1, components)
+        values[attribute_name] = buffer.astype(dtype)
+
+    return values
+
+
+@contextlib.contextmanager
+def deferred_node_tree_updates():
+    """
+    Defers the node tree updates of the generators for the duration of a
+    with-block or a decorated function. Every changed node tree is updated
+    once, when evaluated data is read and at the end of the block. Nested
+    blocks flush with the outermost one.
+    """
+
+    global _deferred_node_trees
+
+    if _deferred_node_trees is not None:
+        yield
+        return
+
+    _deferred_node_trees = {}
+    try:
+        yield
+        flush_node_tree_updates()
+    finally:
+        _deferred_node_trees = None
+
+
+# node group -> (signature, {socket name: identifier}), cleared on file load
+_interface_identifier_maps = {}
+
+
+def interface_identifiers(node_group):
+    """
+    Maps the socket names of the interface of a node group to their
+    identifiers, the keys of the modifier inputs. The map is built once per
+    node group and rebuilt if the interface changed.
+
+    Args:
+    - node_group (bpy.types.NodeTree): node group with the interface
+
+    Returns:
+    - identifiers (dict): socket name -> identifier
+    """
+
+    items_tree = node_group.interface.items_tree
+    key = node_group.as_pointer()
+    signature = (node_group.name_full, len(items_tree))
+    cached_signature, identifiers = _interface_identifier_maps.get(key, (None, None))
+    if cached_signature != signature:
+        identifiers = InterfaceIdentifiers(node_group)
+        _interface_identifier_maps[key] = (signature, identifiers)
+    # Only the node group of the current call is known to be valid
+    identifiers.node_group = node_group
+
+    return identifiers
+
+
+class InterfaceIdentifiers(dict):
+    """
+    Socket name -> identifier of a node group. A missing name rebuilds the
+    map once, e.g. after a socket was renamed.
+    """
+
+    def __init__(self, node_group):
+        super().__init__(self.read_identifiers(node_group))
+        self.node_group = node_group
+
+    @staticmethod
+    def read_identifiers(node_group):
+        return {
+            item.name: item.identifier
+            for item in node_group.interface.items_tree
+            if item.item_type == "SOCKET"
+        }
+
+    def __missing__(self, name):
+        self.update(self.read_identifiers(self.node_group))
+        if name not in self:
+            raise KeyError(name)
+
+        return self[name]
+
+
+@bpy.app.handlers.persistent
+def clear_interface_identifiers(*args):
+    """
+    load_post and undo_post handler, the node groups of the previous file or
+    undo step may share their pointers with new node groups
+    """
+
+    _interface_identifier_maps.clear()
+
+
+@contextlib.contextmanager
+def temporary_attributes(data, **values):
+    """
+    Sets attributes of a Blender data block for the duration of a with-block
+    and restores the previous values afterwards
+
+    Args:
+    - data (bpy_struct): data block to change, e.g. scene.render
+    - values: attribute names and their temporary values
+    """
+
+    previous_values = {name: getattr(data, name) for name in values}
+    try:
+        for name, value in values.items():
+            setattr(data, name, value)
+        yield data
+    finally:
+        for name, value in previous_values.items():
+            setattr(data, name, value)
+
+
+def read_image_pixels(filepath):
+    """
+    Loads an image file and returns its pixels
+
+    Args:
+    - filepath (str): path of the image file
+
+    Returns:
+    - pixels (np.ndarray): float32 array of shape (height, width, 4), RGBA
+    """
+
+    image = bpy.data.images.load(str(filepath), check_existing=False)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+
+    return pixels.reshape(height, width, 4)
+
+
+class ScreenSpaceLOD:
+    """
+    Selects the level of detail of the tableware from its projected size on
+    the image of camera_image. The tableware objects are instanced by the
+    Dining Room Distributor and one mesh serves all of its instances, so the
+    largest instance on the image decides. The levels of the .blend file are
+    saved in the image scene and restored when the level of detail is disabled.
+    """
+
     _instance = None
 
+    saved_settings_key = "drg_file_lod_settings"
+    # object name -> geometry nodes modifier with a "Level of Detail" input
+    geometry_lod_modifiers = {"spoon": "Spoon Generator", "glass": "Glass Generator"}
+
+    # (minimum projected size relative to lod_full_detail_size, value),
+    # checked from the top
+    geometry_lod_thresholds = ((1.0, 3), (0.375, 2), (0.0, 1))
+    plate_subdivision_thresholds = ((1.0, 2), (0.25, 1), (0.0, 0))
+
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(SceneRenderer, cls).__new__(cls)
+            cls._instance = super(ScreenSpaceLOD, cls).__new__(cls)
 
         return cls._instance
 
     def __init__(self):
-        self.main_scene_name = "image_scene"
-        self.exec_start_time = 0
-        self.curr_start_time = 0
-        self.render_time = 0
-        self.exec_time = 0
-
-    def select_scene_object(self, select_object):
-        bpy.ops.object.select_all(action="DESELECT")
-        select_object.select_set(True)
-        bpy.context.view_layer.objects.active = select_object
-
-    def randomize_scene(self, context, data_logger):
-
-        ### Generate Room
+        self.spoon_projected_size = 0
+        self.spoon_lod = 3
+        self.glass_projected_size = 0
+        self.glass_lod = 3
+        self.plate_projected_size = 0
+        self.plate_subdivision_levels = 2
+
+    @staticmethod
+    def select_level(relative_size, levels):
+        for min_relative_size, level in levels:
+            if relative_size >= min_relative_size:
+                return level
+
+        return levels[-1][1]
+
+    @staticmethod
+    def focal_length_pixels(render_scene, camera_data):
+        render = render_scene.render
+        width = render.resolution_x * render.resolution_percentage / 100
+        height = render.resolution_y * render.resolution_percentage / 100
+        if camera_data.sensor_fit == "VERTICAL":
+            return camera_data.lens / camera_data.sensor_height * height
+        if camera_data.sensor_fit == "HORIZONTAL":
+            return camera_data.lens / camera_data.sensor_width * width
+
+        return camera_data.lens / camera_data.sensor_width * max(width, height)
+
+    def projected_sizes(self, context, object_names):
+        """
+        Computes the projected diameter of the bounding sphere of the
+        instances of objects
 
-        # Delete Old Room
-        render_collection = bpy.data.collections["Render Collection"]
+        Args:
+        - object_names (list): names of the original objects
 
-        while render_collection.objects:
-            curr_ob = render_collection.objects[0]
-            render_collection.objects.unlink(curr_ob)
-            bpy.data.objects.remove(curr_ob, do_unlink=True)
+        Returns:
+        - projected_sizes (dict): object name -> largest projected diameter of
+            its instances in pixels, 0 if no instance is in front of the camera
+        """
 
-        # Create new Room
-        context.view_layer.active_layer_collection = (
-            bpy.data.scenes[self.main_scene_name]
-            .view_layers["ViewLayer"]
-            .layer_collection.children[render_collection.name]
+        depsgraph = evaluated_depsgraph(context)
+        camera_obj = bpy.data.objects["camera_image"].evaluated_get(depsgraph)
+        world_to_camera = np.array(camera_obj.matrix_world.inverted())
+        focal_length = self.focal_length_pixels(
+            bpy.data.scenes[SceneRenderer().main_scene_name], camera_obj.data
         )
 
-        ### Randomize Room
-        procedural_room = ProceduralRoom()
-        procedural_room.create_room(context)
-        room_obj = bpy.data.objects["room"]
-        self.select_scene_object(room_obj)
-        procedural_room.randomize_room(context)
-        procedural_room.randomize_material(context)
-        data_logger.datalog_room(procedural_room)
+        projected_sizes = dict.fromkeys(object_names, 0.0)
+        for object_instance in depsgraph.object_instances:
+            object_name = object_instance.object.original.name
+            if object_name not in projected_sizes:
+                continue
+
+            matrix_world = np.array(object_instance.matrix_world)
+            corners = (
+                np.array([corner[:] for corner in object_instance.object.bound_box])
+                @ matrix_world[:3, :3].T
+                + matrix_world[:3, 3]
+            )
+            center = corners.mean(axis=0)
+            radius = np.linalg.norm(corners - center, axis=1).max()
+            # The camera looks along its negative z-axis
+            depth = -(world_to_camera[2, :3] @ center + world_to_camera[2, 3])
+            if depth + radius <= camera_obj.data.clip_start:
+                continue
+
+            projected_size = (
+                2 * radius * focal_length / max(depth, camera_obj.data.clip_start)
+            )
+            projected_sizes[object_name] = max(
+                projected_sizes[object_name], projected_size
+            )
 
-        ### Randomize Lighting
-        room_obj = bpy.data.objects["room"]
-        self.select_scene_object(room_obj)
-        lighting_randomizer = LightingRandomizer()
-        lighting_randomizer.randomize_environment_lighting(context)
-        lighting_randomizer.randomize_indoor_lighting(context)
-        data_logger.datalog_lighting(procedural_room, lighting_randomizer)
+        return projected_sizes
 
-        ### Randomize Tableware Attributes
+    def get_geometry_lod(self, obj, modifier_name):
+        modifier = obj.modifiers[modifier_name]
+        return modifier[interface_identifiers(modifier.node_group)["Level of Detail"]]
 
-        # Fork
-        fork_obj = bpy.data.objects["fork"]
-        self.select_scene_object(fork_obj)
-        procedural_fork = ProceduralFork()
-        procedural_fork.randomize_fork(context)
-        data_logger.datalog_fork(procedural_fork)
+    def set_geometry_lod(self, context, obj, modifier_name, lod):
+        modifier = obj.modifiers[modifier_name]
+        lod_id = interface_identifiers(modifier.node_group)["Level of Detail"]
+        if modifier[lod_id] != lod:
+            modifier[lod_id] = lod
+            update_node_tree(modifier.node_group, context)
 
-        # Glass
-        glass_obj = bpy.data.objects["glass"]
-        self.select_scene_object(glass_obj)
-        procedural_glass = ProceduralGlass()
-        procedural_glass.randomize_glass(context)
-        data_logger.datalog_glass(procedural_glass)
+    def restore(self, context):
+        """
+        Restores the levels of detail of the .blend file, if they were changed
+        """
 
-        # Knife
-        knife_obj = bpy.data.objects["knife"]
-        self.select_scene_object(knife_obj)
-        procedural_knife = ProceduralKnife()
-        procedural_knife.randomize_knife(context)
-        data_logger.datalog_knife(procedural_knife)
+        render_scene = bpy.data.scenes[SceneRenderer().main_scene_name]
+        if self.saved_settings_key not in render_scene:
+            return
+
+        saved_settings = render_scene[self.saved_settings_key].to_dict()
+        for object_name, lod in saved_settings["geometry_lods"].items():
+            if object_name in bpy.data.objects:
+                self.set_geometry_lod(
+                    context,
+                    bpy.data.objects[object_name],
+                    self.geometry_lod_modifiers[object_name],
+                    lod,
+                )
+        for object_name, levels in saved_settings["subdivision_levels"].items():
+            if object_name in bpy.data.objects:
+                bpy.data.objects[object_name].modifiers[
+                    "Subdivision"
+                ].render_levels = levels
+        del render_scene[self.saved_settings_key]
+
+    def save_file_settings(self, plate_objs):
+        render_scene = bpy.data.scenes[SceneRenderer().main_scene_name]
+        if self.saved_settings_key not in render_scene:
+            render_scene[self.saved_settings_key] = {
+                "geometry_lods": {
+                    object_name: self.get_geometry_lod(
+                        bpy.data.objects[object_name], modifier_name
+                    )
+                    for object_name, modifier_name in self.geometry_lod_modifiers.items()
+                },
+                "subdivision_levels": {},
+            }
+
+        # Plates are added as they are seen, plate alternatives may be added later
+        saved_settings = render_scene[self.saved_settings_key]
+        for plate_obj in plate_objs:
+            if plate_obj.name not in saved_settings["subdivision_levels"]:
+                saved_settings["subdivision_levels"][plate_obj.name] = (
+                    plate_obj.modifiers["Subdivision"].render_levels
+                )
 
-        # Plate
-        plate_obj = bpy.data.objects["plate"]
-        self.select_scene_object(plate_obj)
-        procedural_plate = ProceduralPlate()
-        procedural_plate.randomize_plate(context)
-        procedural_plate.randomize_crumbs(context)
-        procedural_plate.randomize_tableware_on_plate(context)
-        procedural_plate.randomize_soil_material(context)
-        data_logger.datalog_plate(procedural_plate)
+    def apply(self, context):
+        """
+        Sets the Level of Detail of spoon and glass and the render subdivision
+        levels of the plates. Full detail is used from a projected size of
+        lod_full_detail_size pixels on. The soil of the plates is never
+        reduced, it decides whether a plate is clean or soiled and the Plate
+        Crumbs node group has no density input to thin it out.
+        """
 
-        # Randomize Objects on Plates
-        plate_alts_list = [
-            plate_alt
-            for plate_alt in bpy.data.objects
-            if plate_alt.name.startswith("plate_alt")
+        full_detail_size = context.scene.lod_full_detail_size
+        plate_objs = [
+            obj
+            for obj in bpy.data.objects
+            if obj.name == "plate" or obj.name.startswith("plate_alt")
         ]
-        procedural_plat_alt = ProceduralPlate()
-        for i, plate_alt in enumerate(plate_alts_list):
-            self.select_scene_object(plate_alt)
-            procedural_plat_alt.randomize_plate(context)
-            procedural_plat_alt.randomize_crumbs(context)
-            procedural_plat_alt.randomize_tableware_on_plate(context)
-            procedural_plat_alt.randomize_soil_material(context)
+        self.save_file_settings(plate_objs)
+        projected_sizes = self.projected_sizes(
+            context, ["spoon", "glass"] + [plate_obj.name for plate_obj in plate_objs]
+        )
 
-        # Spoon
-        spoon_obj = bpy.data.objects["spoon"]
-        self.select_scene_object(spoon_obj)
-        procedural_spoon = ProceduralSpoon()
-        procedural_spoon.randomize_spoon(context)
-        data_logger.datalog_spoon(procedural_spoon)
+        self.spoon_projected_size = projected_sizes["spoon"]
+        self.spoon_lod = self.select_level(
+            self.spoon_projected_size / full_detail_size, self.geometry_lod_thresholds
+        )
+        self.set_geometry_lod(
+            context,
+            bpy.data.objects["spoon"],
+            self.geometry_lod_modifiers["spoon"],
+            self.spoon_lod,
+        )
 
-        # Distractor
-        distractor_list = [
-            distractor
-            for distractor in bpy.data.objects
-            if distractor.name.startswith("distractor")
-        ]
-        procedural_distractor = ProceduralDistractor()
-        for i, distractor in enumerate(distractor_list):
-            self.select_scene_object(distractor)
-            procedural_distractor.randomize_distractor(context)
-            procedural_distractor.randomize_material(context)
-            data_logger.datalog_distractor(procedural_distractor, i)
+        self.glass_projected_size = projected_sizes["glass"]
+        self.glass_lod = self.select_level(
+            self.glass_projected_size / full_detail_size, self.geometry_lod_thresholds
+        )
+        self.set_geometry_lod(
+            context,
+            bpy.data.objects["glass"],
+            self.geometry_lod_modifiers["glass"],
+            self.glass_lod,
+        )
 
-        # Randomize Napkin Materials
-        napkin_mat_key_list = [
-            mat_key
-            for mat_key in bpy.data.materials.keys()
-            if mat_key.startswith("Napkin")
-        ]
+        for plate_obj in plate_objs:
+            relative_size = projected_sizes[plate_obj.name] / full_detail_size
+            subdivision_levels = self.select_level(
+                relative_size, self.plate_subdivision_thresholds
+            )
+            if plate_obj.modifiers["Subdivision"].render_levels != subdivision_levels:
+                plate_obj.modifiers["Subdivision"].render_levels = subdivision_levels
 
-        for i, mat_key in enumerate(napkin_mat_key_list):
-            napkin_mat = bpy.data.materials[mat_key]
+            if plate_obj.name == "plate":
+                self.plate_projected_size = projected_sizes[plate_obj.name]
+                self.plate_subdivision_levels = subdivision_levels
 
-            random_col = ColorPaletteRandomizer().get_random_rgba()
-            napkin_mat.node_tree.nodes["Group"].inputs[
-                "Color"
-            ].default_value = random_col
 
-            data_logger.datalog_napkin_mat(random_col, i)
+class ExposureEstimator:
+    _instance = None
 
-        ### Randomize Furniture Attributes + Material
+    # Rec. 709 luminance weights of linear RGB
+    luminance_weights = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
 
-        # Chair
-        chair_obj = bpy.data.objects["chair"]
-        self.select_scene_object(chair_obj)
-        procedural_chair = ProceduralChair()
-        procedural_chair.randomize_chair(context)
-        procedural_chair.randomize_material(context)
-        data_logger.datalog_chair(procedural_chair)
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExposureEstimator, cls).__new__(cls)
 
-        # Table
-        table_obj = bpy.data.objects["table"]
-        self.select_scene_object(table_obj)
-        procedural_table = ProceduralTable()
-        procedural_table.randomize_table(context)
-        procedural_table.randomize_material(context)
-        data_logger.datalog_table(procedural_table)
+        return cls._instance
 
-        # Randomize Dining Room Distribution
-        table_obj = bpy.data.objects["table"]
-        self.select_scene_object(table_obj)
-        dining_room_distributor = DiningRoomDistributor()
-        dining_room_distributor.randomize_distribution(context)
-        data_logger.datalog_table_distribution(dining_room_distributor)
+    def __init__(self):
+        self.exposure = 0
+        self.average_luminance = 0
 
-        ### Randomize Camera
-        # Set Table Top Material for Selection in Room to randomize Camera
-        rg_mod = room_obj.modifiers["Room Generator"]
-        rg_node_group = rg_mod.node_group
-        tg_mod = table_obj.modifiers["Table Generator"]
-        tg_node_group = tg_mod.node_group
+        # Part of the darkest and brightest pixels ignored for the average,
+        # e.g. the sun disc or shadowed corners
+        self.low_percentile = 0.05
+        self.high_percentile = 0.98
+        self.min_exposure = -10
+        self.max_exposure = 10
+
+    def render_preview(self, scene, resolution_percentage, samples):
+        """
+        Renders a tiny, low sample preview of the scene without compositing
 
-        rg_mod[rg_node_group.interface.items_tree["Table Top Material"].identifier] = (
-            tg_mod[tg_node_group.interface.items_tree["Table Top Material"].identifier]
+        Returns:
+        - pixels (np.ndarray): linear RGBA pixels of the preview
+        """
+
+        preview_path = (
+            pathlib.Path(tempfile.gettempdir())
+            / f"drg_exposure_preview_{os.getpid()}.exr"
         )
 
-        # Set Camera
-        room_obj = bpy.data.objects["room"]
-        self.select_scene_object(room_obj)
-        camera_randomizer = CameraRandomizer()
-        camera_randomizer.randomize_camera_position(context)
-        data_logger.datalog_camera(camera_randomizer)
+        with temporary_attributes(
+            scene.render,
+            resolution_percentage=resolution_percentage,
+            use_compositing=False,
+            filepath=str(preview_path),
+        ), temporary_attributes(
+            scene.render.image_settings, file_format="OPEN_EXR", color_depth="32"
+        ), temporary_attributes(
+            scene.cycles, samples=samples, use_denoising=False
+        ):
+            bpy.ops.render.render(write_still=True, scene=scene.name)
 
-    def time_seed(self, operator):
+        pixels = read_image_pixels(preview_path)
+        preview_path.unlink(missing_ok=True)
+
+        return pixels
+
+    def compute_exposure(self, pixels, key_value):
         """
-        Sets random seed based on the time and copies the seed into the clipboard.
+        Computes the exposure that maps the average scene luminance to the key value.
+        The average is taken in log2 space over the luminance histogram without the
+        darkest and brightest pixels.
+
+        Args:
+        - pixels (np.ndarray): linear RGBA pixels rendered with an exposure of 0
+        - key_value (float): target luminance of the average pixel, 0.18 is middle gray
 
         Returns:
-        - seed (int): The random seed based on the current time.
+        - exposure (float): exposure in stops
         """
 
-        seed = int(time.time())
-        print(f"Seed: {seed}")
-        operator.report({"INFO"}, f"Seed: {seed}")
-        random.seed(seed)
+        luminance = pixels.reshape(-1, 4)[:, :3] @ self.luminance_weights
+        log_luminance = np.log2(np.maximum(luminance, 1e-6))
 
-        bpy.context.window_manager.clipboard = str(seed)
+        histogram, bin_edges = np.histogram(log_luminance, bins=128, range=(-20, 12))
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
 
-        return seed
+        # Only keep the bins between the low and high percentile
+        cumulative = np.cumsum(histogram) / max(histogram.sum(), 1)
+        used_bins = (cumulative >= self.low_percentile) & (
+            cumulative - histogram / max(histogram.sum(), 1) <= self.high_percentile
+        )
+        if not np.any(histogram[used_bins]):
+            used_bins = histogram > 0
 
-    def setup_scene(self, operator, index, data_logger, random_seed=0):
-        """
-        Sets up the scene for rendering with specified index and seed
+        mean_log_luminance = np.average(
+            bin_centers[used_bins], weights=histogram[used_bins]
+        )
+        self.average_luminance = float(2**mean_log_luminance)
 
-        Args:
-        - index (int): index of the image
-        - seed (float, optional): The random seed to use.
-            If not provided a new seed will be generated based on the current time.
+        exposure = np.log2(key_value) - mean_log_luminance
+        return float(np.clip(exposure, self.min_exposure, self.max_exposure))
 
+    def auto_expose(self, context, scene):
         """
+        Determines the exposure from a preview render and sets it as the
+        exposure of the scene
 
-        if random_seed:
-            random.seed(random_seed)
-        else:
-            random_seed = self.time_seed(operator)
+        Returns:
+        - exposure (float): the new exposure of the scene
+        """
 
-        # project_name = "dirty_dining_room_dataset"
-        # render_dir_path = pathlib.Path.cwd() / project_name
-        # render_dir_path.parent.mkdir(parents=True, exist_ok=True)
+        with temporary_attributes(scene.view_settings, exposure=0):
+            pixels = self.render_preview(
+                scene,
+                resolution_percentage=context.scene.auto_exposure_resolution,
+                samples=context.scene.auto_exposure_samples,
+            )
 
-        render_dir_path = pathlib.Path(
-            f"{bpy.context.scene.render_filepath}"
-        )  # / project_name"
-        # render_dir_path.parent.mkdir(parents=True, exist_ok=True)
+        self.exposure = self.compute_exposure(
+            pixels, key_value=context.scene.auto_exposure_key
+        )
+        scene.view_settings.exposure = self.exposure
+
+        return self.exposure
+
+
+class RenderStatsCollector:
+    """
+    Reads the progress of a render from the render statistics, Cycles does not
+    expose it otherwise. The time until the first sample is the scene sync
+    (export, BVH, shaders), the time between the first and the last sample
+    update is path tracing. With adaptive sampling or a time limit the amount
+    of samples is lower than the configured maximum. Blender only calls the
+    render_stats handlers in background mode, in the UI the amount of samples
+    and the sync and sampling times stay None and are logged as empty values.
+    """
+
+    sample_pattern = re.compile(r"Sample (\d+)/(\d+)")
+
+    def __init__(self, scene_name):
+        self.scene_name = scene_name
+        self.reset()
+
+    def reset(self):
+        self.start_time = time.time()
+        self.samples = None
+        self.first_sample_time = None
+        self.last_sample_time = None
+
+    def on_render_stats(self, *args):
+        stats = next((arg for arg in args if isinstance(arg, str)), "")
+        # The mask scene is rendered in the same job, only count the image scene
+        if self.scene_name not in stats:
+            return
+
+        match = self.sample_pattern.search(stats)
+        if match:
+            self.samples = int(match.group(1))
+            self.last_sample_time = time.time()
+            if self.first_sample_time is None:
+                self.first_sample_time = self.last_sample_time
+
+    @property
+    def sync_time(self):
+        if self.first_sample_time is None:
+            return None
+
+        return self.first_sample_time - self.start_time
+
+    @property
+    def sampling_time(self):
+        if self.first_sample_time is None:
+            return None
+
+        return self.last_sample_time - self.first_sample_time
+
+    def start(self):
+        self.reset()
+        bpy.app.handlers.render_stats.append(self.on_render_stats)
+
+    def stop(self):
+        if self.on_render_stats in bpy.app.handlers.render_stats:
+            bpy.app.handlers.render_stats.remove(self.on_render_stats)
+
+
+class GroundTruthPass:
+    """
+    The ground truth mask is rendered by a dedicated scene with the camera
+    camera_segmentation, whose Render Layers node feeds File Output slot 1.
+    In the flat mode this scene is rendered with 1 sample, no light bounces and
+    a box filter of minimal width, the masks only consist of flat
+    emission/holdout materials and do not need path tracing.
+    """
 
-        img_name = f"{index}_{random_seed}_img"
-        gt_name = f"{index}_{random_seed}_gt"
+    _instance = None
 
-        bpy.context.scene.render.image_settings.file_format = "JPEG"
-        bpy.context.scene.render.filepath = str(render_dir_path)
+    # Stores the saved settings of the mask scene while the flat mode is active
+    saved_settings_key = "drg_full_mask_settings"
 
-        bpy.data.scenes[self.main_scene_name].node_tree.nodes[
-            "File Output"
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(GroundTruthPass, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.camera_name = "camera_segmentation"
+        # Transparent bounces are kept, a mask can be visible through
+        # transparent holdout surfaces
+        self.flat_cycles_settings = {
+            "samples": 1,
+            "use_adaptive_sampling": False,
+            "use_denoising": False,
+            "max_bounces": 0,
+            "diffuse_bounces": 0,
+            "glossy_bounces": 0,
+            "transmission_bounces": 0,
+            "volume_bounces": 0,
+            "caustics_reflective": False,
+            "caustics_refractive": False,
+            "pixel_filter_type": "BOX",
+            # Smallest width Cycles allows, no blending between neighbouring pixels
+            "filter_width": 0.01,
+        }
+
+    def find_mask_scenes(self):
+        return [
+            scene
+            for scene in bpy.data.scenes
+            if scene.camera is not None and scene.camera.name == self.camera_name
+        ]
+
+    def apply(self, mask_render_mode):
+        """
+        Switches the mask scenes between the flat mode and their saved settings
+
+        Args:
+        - mask_render_mode (str): "FLAT" or "FULL"
+        """
+
+        for mask_scene in self.find_mask_scenes():
+            if mask_render_mode == "FLAT":
+                if self.saved_settings_key not in mask_scene:
+                    mask_scene[self.saved_settings_key] = {
+                        "cycles": {
+                            name: getattr(mask_scene.cycles, name)
+                            for name in self.flat_cycles_settings
+                        },
+                        "view_layer_samples": {
+                            view_layer.name: view_layer.samples
+                            for view_layer in mask_scene.view_layers
+                        },
+                    }
+                for name, value in self.flat_cycles_settings.items():
+                    setattr(mask_scene.cycles, name, value)
+                for view_layer in mask_scene.view_layers:
+                    view_layer.samples = 1
+            elif self.saved_settings_key in mask_scene:
+                saved_settings = mask_scene[self.saved_settings_key].to_dict()
+                for name, value in saved_settings["cycles"].items():
+                    setattr(mask_scene.cycles, name, value)
+                for name, samples in saved_settings["view_layer_samples"].items():
+                    if name in mask_scene.view_layers:
+                        mask_scene.view_layers[name].samples = samples
+                del mask_scene[self.saved_settings_key]
+
+
+# Cycles light path settings per profile. Glass tableware and the window glass
+# of the room cause deep transmission paths, the profiles trade their accuracy
+# for render time. "FILE" keeps the settings saved in the .blend file.
+LIGHT_PATH_PROFILES = {
+    "QUALITY": {
+        "max_bounces": 16,
+        "glossy_bounces": 6,
+        "transmission_bounces": 12,
+        "transparent_max_bounces": 12,
+        "caustics_reflective": True,
+        "caustics_refractive": True,
+        "blur_glossy": 0.0,
+        "sample_clamp_direct": 0.0,
+        "sample_clamp_indirect": 10.0,
+    },
+    "BALANCED": {
+        "max_bounces": 12,
+        "glossy_bounces": 4,
+        "transmission_bounces": 8,
+        "transparent_max_bounces": 8,
+        "caustics_reflective": False,
+        "caustics_refractive": False,
+        "blur_glossy": 1.0,
+        "sample_clamp_direct": 0.0,
+        "sample_clamp_indirect": 10.0,
+    },
+    "FAST": {
+        "max_bounces": 8,
+        "glossy_bounces": 2,
+        "transmission_bounces": 4,
+        "transparent_max_bounces": 8,
+        "caustics_reflective": False,
+        "caustics_refractive": False,
+        "blur_glossy": 2.0,
+        "sample_clamp_direct": 10.0,
+        "sample_clamp_indirect": 3.0,
+    },
+}
+
+
+class LightPathProfile:
+    """
+    Applies the light path settings of LIGHT_PATH_PROFILES to the image scene.
+    The settings of the .blend file are saved in the scene before the first
+    profile is applied and restored by the profile "FILE".
+    """
+
+    _instance = None
+
+    saved_settings_key = "drg_file_light_path_settings"
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LightPathProfile, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.setting_names = sorted(
+            {name for settings in LIGHT_PATH_PROFILES.values() for name in settings}
+        )
+
+    def apply(self, render_scene, profile_name):
+        """
+        Args:
+        - render_scene (bpy.types.Scene): scene rendering the image
+        - profile_name (str): key of LIGHT_PATH_PROFILES or "FILE"
+        """
+
+        if profile_name == "FILE":
+            if self.saved_settings_key in render_scene:
+                for name, value in (
+                    render_scene[self.saved_settings_key].to_dict().items()
+                ):
+                    setattr(render_scene.cycles, name, value)
+                del render_scene[self.saved_settings_key]
+            return
+
+        if self.saved_settings_key not in render_scene:
+            render_scene[self.saved_settings_key] = {
+                name: getattr(render_scene.cycles, name) for name in self.setting_names
+            }
+        for name, value in LIGHT_PATH_PROFILES[profile_name].items():
+            setattr(render_scene.cycles, name, value)
+
+
+class FrustumCulling:
+    """
+    Excludes the instances of the distributed objects (chairs, tableware,
+    distractors, plate alternatives and napkins) outside of the view of the
+    image camera from the render with the camera culling of Cycles, which
+    tests the bounding box of every instance against the camera frustum.
+    The margin is a fraction of the image size, instances within it are kept
+    for their shadows and reflections. The settings of the .blend file are
+    saved in the scene and restored when the culling is disabled.
+    """
+
+    _instance = None
+
+    saved_settings_key = "drg_file_culling_settings"
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FrustumCulling, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.collection_names = (
+            "Table Distribution Objects",
+            "Plate Distribution Link Objects",
+            "Napkins",
+        )
+        self.object_names = ("chair",)
+
+    def find_candidates(self):
+        """
+        Returns:
+        - candidates (list): original objects whose instances may be culled
+        """
+
+        candidates = {
+            obj
+            for collection_name in self.collection_names
+            if collection_name in bpy.data.collections
+            for obj in bpy.data.collections[collection_name].all_objects
+        }
+        candidates.update(
+            bpy.data.objects[object_name]
+            for object_name in self.object_names
+            if object_name in bpy.data.objects
+        )
+
+        return sorted(candidates, key=lambda obj: obj.name)
+
+    def apply(self, render_scene, use_camera_culling, margin):
+        """
+        Args:
+        - render_scene (bpy.types.Scene): scene rendering the image
+        - use_camera_culling (bool): enables or restores the culling
+        - margin (float): margin of the camera frustum, fraction of the image
+        """
+
+        if not use_camera_culling:
+            if self.saved_settings_key in render_scene:
+                saved_settings = render_scene[self.saved_settings_key].to_dict()
+                render_scene.render.use_simplify = saved_settings["use_simplify"]
+                for name, value in saved_settings["cycles"].items():
+                    setattr(render_scene.cycles, name, value)
+                for object_name, value in saved_settings["objects"].items():
+                    if object_name in bpy.data.objects:
+                        bpy.data.objects[object_name].cycles.use_camera_cull = value
+                del render_scene[self.saved_settings_key]
+            return
+
+        candidates = self.find_candidates()
+        if self.saved_settings_key not in render_scene:
+            render_scene[self.saved_settings_key] = {
+                "use_simplify": render_scene.render.use_simplify,
+                "cycles": {
+                    "use_camera_cull": render_scene.cycles.use_camera_cull,
+                    "camera_cull_margin": render_scene.cycles.camera_cull_margin,
+                },
+                "objects": {obj.name: obj.cycles.use_camera_cull for obj in candidates},
+            }
+        render_scene.render.use_simplify = True
+        render_scene.cycles.use_camera_cull = True
+        render_scene.cycles.camera_cull_margin = margin
+        for obj in candidates:
+            obj.cycles.use_camera_cull = True
+
+    def count_culled_instances(self, context, render_scene, margin):
+        """
+        Estimates the culling of Cycles for the current camera with the same
+        bounding box test
+
+        Returns:
+        - amount_of_culled_instances (int): instances outside of the frustum
+        - amount_of_candidate_instances (int): instances that were tested
+        """
+
+        depsgraph = evaluated_depsgraph(context)
+        camera_obj = render_scene.camera.evaluated_get(depsgraph)
+        world_to_camera = np.array(camera_obj.matrix_world.inverted())
+        # Corners of the image at the depth frame_depth in camera space
+        view_frame = np.array(
+            [corner[:] for corner in camera_obj.data.view_frame(scene=render_scene)]
+        )
+        frame_min = view_frame[:, :2].min(axis=0)
+        frame_max = view_frame[:, :2].max(axis=0)
+        frame_depth = -view_frame[0, 2]
+
+        candidate_names = {obj.name for obj in self.find_candidates()}
+        instance_corners = []
+        for object_instance in depsgraph.object_instances:
+            if object_instance.object.original.name not in candidate_names:
+                continue
+            object_to_camera = world_to_camera @ np.array(object_instance.matrix_world)
+            corners = np.array(
+                [corner[:] for corner in object_instance.object.bound_box]
+            )
+            instance_corners.append(
+                corners @ object_to_camera[:3, :3].T + object_to_camera[:3, 3]
+            )
+        if not instance_corners:
+            return 0, 0
+
+        # (instances, 8 corners, xyz), the camera looks along its negative z-axis
+        instance_corners = np.array(instance_corners)
+        depth = -instance_corners[..., 2]
+        safe_depth = np.where(np.abs(depth) < 1e-6, 1e-6, depth)
+        frame_coordinates = (
+            instance_corners[..., :2] * (frame_depth / safe_depth)[..., None]
+            - frame_min
+        ) / (frame_max - frame_min)
+        # Corners behind the camera are mirrored like in Cycles
+        frame_coordinates = np.where(
+            (depth < 0)[..., None], 1 - frame_coordinates, frame_coordinates
+        )
+        culled = (
+            (depth < 0).all(axis=1)
+            | (frame_coordinates.min(axis=1) >= 1 + margin).any(axis=1)
+            | (frame_coordinates.max(axis=1) <= -margin).any(axis=1)
+        )
+
+        return int(culled.sum()), len(culled)
+
+
+def relative_rmse(pixels, reference_pixels):
+    """
+    Noise metric of a render against a converged reference render
+
+    Args:
+    - pixels (np.ndarray): linear RGBA pixels
+    - reference_pixels (np.ndarray): linear RGBA pixels of the same size
+
+    Returns:
+    - relative_rmse (float): RMSE of the RGB values divided by the mean
+        reference value, comparable between bright and dark scenes
+    """
+
+    difference = pixels[..., :3] - reference_pixels[..., :3]
+    rmse = np.sqrt(np.mean(difference**2))
+
+    return float(rmse / max(np.mean(reference_pixels[..., :3]), 1e-6))
+
+
+class SceneKeyframer:
+    """
+    Records the animatable values of consecutive randomized scenes and writes
+    the values that differ between them as constant keyframes, one frame per
+    scene. Candidates are the transforms of all objects, the numeric geometry
+    nodes inputs of all modifiers, the render visibility of modifiers and
+    the render levels of subdivisions, camera lenses, light settings, the unlinked
+    node inputs of materials, lights and worlds, sky texture settings and the
+    exposure of the image scene. ID inputs (materials, objects), meshes and
+    curve mapping points can not be keyframed and have to stay the same for
+    all recorded scenes.
+    """
+
+    object_properties = ("location", "rotation_euler", "scale")
+    light_properties = ("energy", "color", "shadow_soft_size")
+    sky_texture_properties = (
+        "sun_size",
+        "sun_intensity",
+        "sun_elevation",
+        "sun_rotation",
+        "altitude",
+        "air_density",
+        "dust_density",
+        "ozone_density",
+    )
+
+    def __init__(self, scene):
+        self.scene = scene
+        # (id_data, data_path) -> (owner, name, is_item, {frame: value})
+        self.recorded_values = {}
+        self.frames = []
+        self.keyframed_paths = {}
+        # id_data -> (created_action, {(data_path, index): saved keyframes})
+        self.saved_keyframes = {}
+
+    @staticmethod
+    def to_recorded_value(value):
+        if isinstance(value, (bool, int, float, str)):
+            return value
+        try:
+            return tuple(value)
+        except TypeError:
+            return None
+
+    def iter_node_tree_values(self, node_tree):
+        for node in node_tree.nodes:
+            node_path = f'nodes["{bpy.utils.escape_identifier(node.name)}"]'
+            for i, node_input in enumerate(node.inputs):
+                if node_input.is_linked or not hasattr(node_input, "default_value"):
+                    continue
+                yield (
+                    node_tree,
+                    f"{node_path}.inputs[{i}].default_value",
+                    node_input,
+                    "default_value",
+                    False,
+                )
+            if node.type == "TEX_SKY":
+                for name in self.sky_texture_properties:
+                    yield (node_tree, f"{node_path}.{name}", node, name, False)
+
+    def iter_animatable_values(self):
+        """
+        Yields:
+        - (id_data, data_path, owner, name, is_item): owner.name, or owner[name]
+            if is_item, is the value at data_path of id_data
+        """
+
+        for obj in bpy.data.objects:
+            for name in self.object_properties:
+                yield (obj, name, obj, name, False)
+            for modifier in obj.modifiers:
+                modifier_path = (
+                    f'modifiers["{bpy.utils.escape_identifier(modifier.name)}"]'
+                )
+                yield (
+                    obj,
+                    f"{modifier_path}.show_render",
+                    modifier,
+                    "show_render",
+                    False,
+                )
+                if modifier.type == "SUBSURF":
+                    yield (
+                        obj,
+                        f"{modifier_path}.render_levels",
+                        modifier,
+                        "render_levels",
+                        False,
+                    )
+                if modifier.type != "NODES" or modifier.node_group is None:
+                    continue
+                for item in modifier.node_group.interface.items_tree:
+                    if (
+                        item.item_type != "SOCKET"
+                        or item.in_out != "INPUT"
+                        or item.identifier not in modifier
+                        or isinstance(modifier[item.identifier], bpy.types.ID)
+                    ):
+                        continue
+                    yield (
+                        obj,
+                        f'{modifier_path}["{item.identifier}"]',
+                        modifier,
+                        item.identifier,
+                        True,
+                    )
+
+        for camera in bpy.data.cameras:
+            yield (camera, "lens", camera, "lens", False)
+
+        for light in bpy.data.lights:
+            for name in self.light_properties:
+                yield (light, name, light, name, False)
+
+        for id_collection in (bpy.data.materials, bpy.data.lights, bpy.data.worlds):
+            for id_data in id_collection:
+                if id_data.node_tree is not None:
+                    yield from self.iter_node_tree_values(id_data.node_tree)
+
+        yield (
+            self.scene,
+            "view_settings.exposure",
+            self.scene.view_settings,
+            "exposure",
+            False,
+        )
+
+    def record(self, frame):
+        """
+        Records the current values of the scene as the values of frame
+        """
+
+        self.frames.append(frame)
+        for id_data, data_path, owner, name, is_item in self.iter_animatable_values():
+            value = self.to_recorded_value(
+                owner[name] if is_item else getattr(owner, name)
+            )
+            if value is None or isinstance(value, str):
+                continue
+
+            key = (id_data, data_path)
+            if key not in self.recorded_values:
+                self.recorded_values[key] = (owner, name, is_item, {})
+            self.recorded_values[key][3][frame] = value
+
+    @staticmethod
+    def find_keyframe_points(fcurve, frames):
+        return [
+            keyframe_point
+            for keyframe_point in fcurve.keyframe_points
+            if keyframe_point.co[0] in frames
+        ]
+
+    def save_keyframes(self, id_data, data_path, value):
+        """
+        Saves which fcurves at data_path of id_data already exist and their
+        keyframes on the recorded frames, before they are overwritten
+
+        Args:
+        - id_data (bpy.types.ID): data-block that is animated
+        - data_path (str): path of the animated value
+        - value (bool, int, float or tuple): recorded value at data_path
+        """
+
+        animation_data = id_data.animation_data
+        action = animation_data.action if animation_data is not None else None
+        if id_data not in self.saved_keyframes:
+            self.saved_keyframes[id_data] = (action is None, {})
+        saved_fcurves = self.saved_keyframes[id_data][1]
+
+        for index in range(len(value) if isinstance(value, tuple) else 1):
+            fcurve = (
+                action.fcurves.find(data_path, index=index)
+                if action is not None
+                else None
+            )
+            if fcurve is None:
+                saved_fcurves[(data_path, index)] = None
+                continue
+            saved_fcurves[(data_path, index)] = [
+                (
+                    tuple(keyframe_point.co),
+                    keyframe_point.interpolation,
+                    keyframe_point.handle_left_type,
+                    keyframe_point.handle_right_type,
+                    tuple(keyframe_point.handle_left),
+                    tuple(keyframe_point.handle_right),
+                )
+                for keyframe_point in self.find_keyframe_points(fcurve, self.frames)
+            ]
+
+    def write_keyframes(self):
+        """
+        Inserts a constant keyframe on every recorded frame for all values that
+        differ between the frames
+
+        Returns:
+        - amount_of_keyframed_values (int): amount of animated values
+        """
+
+        amount_of_keyframed_values = 0
+        for (id_data, data_path), (
+            owner,
+            name,
+            is_item,
+            frame_values,
+        ) in self.recorded_values.items():
+            if len(set(frame_values.values())) < 2:
+                continue
+
+            self.save_keyframes(id_data, data_path, next(iter(frame_values.values())))
+            for frame, value in frame_values.items():
+                if is_item:
+                    owner[name] = value
+                else:
+                    setattr(owner, name, value)
+                id_data.keyframe_insert(data_path=data_path, frame=frame)
+
+            self.keyframed_paths.setdefault(id_data, set()).add(data_path)
+            amount_of_keyframed_values += 1
+
+        for id_data, (_, saved_fcurves) in self.saved_keyframes.items():
+            fcurves = id_data.animation_data.action.fcurves
+            for data_path, index in saved_fcurves:
+                fcurve = fcurves.find(data_path, index=index)
+                for keyframe_point in self.find_keyframe_points(fcurve, self.frames):
+                    keyframe_point.interpolation = "CONSTANT"
+
+        return amount_of_keyframed_values
+
+    def clear(self):
+        """
+        Removes the written keyframes and restores the keyframes of the .blend
+        file they replaced, the other animation data of the .blend file is kept
+        """
+
+        for id_data, (created_action, saved_fcurves) in self.saved_keyframes.items():
+            action = id_data.animation_data.action
+            for (data_path, index), saved_keyframe_points in saved_fcurves.items():
+                fcurve = action.fcurves.find(data_path, index=index)
+                if fcurve is None:
+                    continue
+                if saved_keyframe_points is None:
+                    action.fcurves.remove(fcurve)
+                    continue
+
+                for keyframe_point in reversed(
+                    self.find_keyframe_points(fcurve, self.frames)
+                ):
+                    fcurve.keyframe_points.remove(keyframe_point)
+                for (
+                    co,
+                    interpolation,
+                    handle_left_type,
+                    handle_right_type,
+                    handle_left,
+                    handle_right,
+                ) in saved_keyframe_points:
+                    keyframe_point = fcurve.keyframe_points.insert(co[0], co[1])
+                    keyframe_point.interpolation = interpolation
+                    keyframe_point.handle_left_type = handle_left_type
+                    keyframe_point.handle_right_type = handle_right_type
+                    keyframe_point.handle_left = handle_left
+                    keyframe_point.handle_right = handle_right
+                fcurve.update()
+
+            if created_action and not action.fcurves:
+                id_data.animation_data.action = None
+                bpy.data.actions.remove(action)
+
+        self.recorded_values = {}
+        self.frames = []
+        self.keyframed_paths = {}
+        self.saved_keyframes = {}
+
+
+class SceneRenderer:
+    _instance = None
+
+    # Stages of randomize_scene, each one is re-randomized at its own rate
+    variation_stages = (
+        "room",
+        "furniture",
+        "materials",
+        "lighting",
+        "tableware",
+        "camera",
+    )
+    # Meshes and material slots can not be keyframed, see render_keyframed_batch,
+    # the plate profiles of the tableware stage are kept as well
+    block_stages = {"room", "furniture", "materials"}
+
+    # Stores the Cycles settings of the .blend file while the render budget is active
+    render_budget_settings_key = "drg_file_render_budget_settings"
+    render_budget_setting_names = (
+        "use_adaptive_sampling",
+        "adaptive_threshold",
+        "adaptive_min_samples",
+        "samples",
+        "time_limit",
+    )
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SceneRenderer, cls).__new__(cls)
+
+        return cls._instance
+
+    def __init__(self):
+        self.main_scene_name = "image_scene"
+        self.exec_start_time = 0
+        self.curr_start_time = 0
+        self.render_time = 0
+        self.exec_time = 0
+
+    def get_randomizer(self, randomizer_cls, keep_values):
+        """
+        The randomizers are singletons whose constructor resets the values of
+        the previous scene. Kept stages are logged with the values of their
+        last randomization, so the instance is reused if keep_values is set.
+        """
+
+        if keep_values and randomizer_cls._instance is not None:
+            return randomizer_cls._instance
+
+        return randomizer_cls()
+
+    @deferred_node_tree_updates()
+    def randomize_scene(
+        self,
+        context,
+        data_logger,
+        stages=None,
+        stage_states=None,
+        keep_plate_profiles=False,
+    ):
+        """
+        Randomizes the stages of the scene, see variation_stages. The node
+        tree updates of the generators are deferred and every changed node
+        tree is updated once, see deferred_node_tree_updates.
+
+        Args:
+        - stages (set, optional): The stages to randomize, all stages if not
+            given. The other stages keep the objects, values and logged
+            values of the previous scene.
+        - stage_states (dict, optional): stage -> random state, every stage
+            then draws from its own random state, see stage_random_state
+        - keep_plate_profiles (bool, optional): The tableware stage keeps the
+            plate profiles, see render_keyframed_batch
+        """
+
+        keep_values = stages is not None
+        if stages is None:
+            stages = set(self.variation_stages)
+
+        if "room" in stages:
+            ### Generate Room
+
+            # Delete Old Room
+            render_collection = bpy.data.collections["Render Collection"]
+
+            while render_collection.objects:
+                curr_ob = render_collection.objects[0]
+                render_collection.objects.unlink(curr_ob)
+                bpy.data.objects.remove(curr_ob, do_unlink=True)
+
+            # Create new Room
+            context.view_layer.active_layer_collection = (
+                bpy.data.scenes[self.main_scene_name]
+                .view_layers["ViewLayer"]
+                .layer_collection.children[render_collection.name]
+            )
+
+        ### Randomize Room
+        procedural_room = self.get_randomizer(ProceduralRoom, keep_values)
+        room_obj = bpy.data.objects.get("room")
+        if "room" in stages:
+            with self.stage_random_state(stage_states, "room"):
+                procedural_room.create_room(context)
+                room_obj = bpy.data.objects["room"]
+                procedural_room.randomize_room(context, room_obj)
+            if context.scene.use_window_portals:
+                update_node_tree(
+                    room_obj.modifiers["Room Generator"].node_group, context
+                )
+                procedural_room.create_window_portals(context, room_obj)
+            else:
+                procedural_room.amount_of_window_portals = 0
+        if "materials" in stages:
+            with self.stage_random_state(stage_states, "materials"):
+                procedural_room.randomize_material(context, room_obj)
+        if stages & {"room", "materials"}:
+            data_logger.datalog_room(procedural_room)
+
+        ### Randomize Lighting
+        if stages & {"room", "lighting"}:
+            lighting_randomizer = self.get_randomizer(LightingRandomizer, keep_values)
+            if "lighting" in stages:
+                with self.stage_random_state(stage_states, "lighting"):
+                    lighting_randomizer.randomize_environment_lighting(context)
+                    lighting_randomizer.randomize_indoor_lighting(context)
+                SkyLibrary().apply_environment(
+                    context,
+                    lighting_randomizer,
+                    bpy.data.scenes[self.main_scene_name],
+                )
+            lighting_randomizer.apply_light_budget(procedural_room)
+            data_logger.datalog_lighting(procedural_room, lighting_randomizer)
+
+        ### Randomize Tableware Attributes
+        if "tableware" in stages:
+            with self.stage_random_state(stage_states, "tableware"):
+                self.randomize_tableware(
+                    context, data_logger, keep_plate_profiles=keep_plate_profiles
+                )
+
+        # Randomize Napkin Materials
+        if "materials" in stages:
+            napkin_mat_key_list = [
+                mat_key
+                for mat_key in bpy.data.materials.keys()
+                if mat_key.startswith("Napkin")
+            ]
+
+            with self.stage_random_state(stage_states, "materials"):
+                for i, mat_key in enumerate(napkin_mat_key_list):
+                    napkin_mat = bpy.data.materials[mat_key]
+
+                    random_col = ColorPaletteRandomizer().get_random_rgba()
+                    napkin_mat.node_tree.nodes["Group"].inputs[
+                        "Color"
+                    ].default_value = random_col
+
+                    data_logger.datalog_napkin_mat(random_col, i)
+
+        ### Randomize Furniture Attributes + Material
+
+        # Chair
+        if stages & {"furniture", "materials"}:
+            chair_obj = bpy.data.objects["chair"]
+            procedural_chair = self.get_randomizer(ProceduralChair, keep_values)
+            if "furniture" in stages:
+                with self.stage_random_state(stage_states, "furniture"):
+                    procedural_chair.randomize_chair(context, chair_obj)
+            if "materials" in stages:
+                with self.stage_random_state(stage_states, "materials"):
+                    procedural_chair.randomize_material(context, chair_obj)
+            data_logger.datalog_chair(procedural_chair)
+
+        # Table
+        table_obj = bpy.data.objects["table"]
+        if stages & {"furniture", "materials"}:
+            procedural_table = self.get_randomizer(ProceduralTable, keep_values)
+            if "furniture" in stages:
+                with self.stage_random_state(stage_states, "furniture"):
+                    procedural_table.randomize_table(context, table_obj)
+            if "materials" in stages:
+                with self.stage_random_state(stage_states, "materials"):
+                    procedural_table.randomize_material(context, table_obj)
+            data_logger.datalog_table(procedural_table)
+
+        # Randomize Dining Room Distribution
+        if "tableware" in stages:
+            dining_room_distributor = DiningRoomDistributor()
+            with self.stage_random_state(stage_states, "tableware"):
+                dining_room_distributor.randomize_distribution(context, table_obj)
+            data_logger.datalog_table_distribution(dining_room_distributor)
+
+        ### Randomize Camera
+        # Set Table Top Material for Selection in Room to randomize Camera
+        room_obj = bpy.data.objects["room"]
+        rg_mod = room_obj.modifiers["Room Generator"]
+        rg_node_group = rg_mod.node_group
+        tg_mod = table_obj.modifiers["Table Generator"]
+        tg_node_group = tg_mod.node_group
+
+        rg_mod[interface_identifiers(rg_node_group)["Table Top Material"]] = tg_mod[
+            interface_identifiers(tg_node_group)["Table Top Material"]
+        ]
+
+        # Set Camera
+        if "camera" in stages:
+            camera_randomizer = CameraRandomizer()
+            with self.stage_random_state(stage_states, "camera"):
+                camera_randomizer.randomize_camera_position(context, room_obj)
+            data_logger.datalog_camera(camera_randomizer)
+
+    def randomize_tableware(self, context, data_logger, keep_plate_profiles=False):
+        """
+        Args:
+        - keep_plate_profiles (bool, optional): Keeps the profiles of the
+            plates and their logged values, see render_keyframed_batch
+        """
+
+        # Fork
+        procedural_fork = ProceduralFork()
+        procedural_fork.randomize_fork(context, bpy.data.objects["fork"])
+        data_logger.datalog_fork(procedural_fork)
+
+        # Glass
+        procedural_glass = ProceduralGlass()
+        procedural_glass.randomize_glass(context, bpy.data.objects["glass"])
+        data_logger.datalog_glass(procedural_glass)
+
+        # Knife
+        procedural_knife = ProceduralKnife()
+        procedural_knife.randomize_knife(context, bpy.data.objects["knife"])
+        data_logger.datalog_knife(procedural_knife)
+
+        # Plate
+        plate_obj = bpy.data.objects["plate"]
+        procedural_plate = ProceduralPlate()
+        if not keep_plate_profiles:
+            procedural_plate.randomize_plate(context, plate_obj)
+        procedural_plate.randomize_crumbs(context, plate_obj)
+        procedural_plate.randomize_tableware_on_plate(context, plate_obj)
+        procedural_plate.randomize_soil_material(context)
+        if keep_plate_profiles:
+            data_logger.datalog_plate_crumbs(procedural_plate)
+        else:
+            data_logger.datalog_plate(procedural_plate)
+
+        # Randomize Objects on Plates
+        plate_alts_list = [
+            plate_alt
+            for plate_alt in bpy.data.objects
+            if plate_alt.name.startswith("plate_alt")
+        ]
+        procedural_plat_alt = ProceduralPlate()
+        for i, plate_alt in enumerate(plate_alts_list):
+            if not keep_plate_profiles:
+                procedural_plat_alt.randomize_plate(context, plate_alt)
+            procedural_plat_alt.randomize_crumbs(context, plate_alt)
+            procedural_plat_alt.randomize_tableware_on_plate(context, plate_alt)
+            procedural_plat_alt.randomize_soil_material(context)
+
+        # Spoon
+        procedural_spoon = ProceduralSpoon()
+        procedural_spoon.randomize_spoon(context, bpy.data.objects["spoon"])
+        data_logger.datalog_spoon(procedural_spoon)
+
+        # Distractor
+        distractor_list = [
+            distractor
+            for distractor in bpy.data.objects
+            if distractor.name.startswith("distractor")
+        ]
+        procedural_distractor = ProceduralDistractor()
+        for i, distractor in enumerate(distractor_list):
+            procedural_distractor.randomize_distractor(context, distractor)
+            procedural_distractor.randomize_material(context, distractor)
+            data_logger.datalog_distractor(procedural_distractor, i)
+
+    @contextlib.contextmanager
+    def stage_random_state(self, stage_states, stage):
+        """
+        Switches random and np.random to the random state of a stage for the
+        duration of a with-block. Without stage_states, the global random state
+        is used.
+        """
+
+        if stage_states is None:
+            yield
+            return
+
+        outer_state = (random.getstate(), np.random.get_state())
+        random.setstate(stage_states[stage][0])
+        np.random.set_state(stage_states[stage][1])
+        try:
+            yield
+        finally:
+            stage_states[stage] = (random.getstate(), np.random.get_state())
+            random.setstate(outer_state[0])
+            np.random.set_state(outer_state[1])
+
+    def create_stage_states(self, stage_seeds):
+        """
+        Args:
+        - stage_seeds (dict): stage -> seed
+
+        Returns:
+        - stage_states (dict): stage -> (random state, np.random state)
+        """
+
+        outer_state = (random.getstate(), np.random.get_state())
+        stage_states = {}
+        for stage, seed in stage_seeds.items():
+            # Stages with the same seed must not draw the same values
+            random.seed(f"{seed}_{stage}")
+            np.random.seed([seed % 2**32, self.variation_stages.index(stage)])
+            stage_states[stage] = (random.getstate(), np.random.get_state())
+        random.setstate(outer_state[0])
+        np.random.set_state(outer_state[1])
+
+        return stage_states
+
+    def time_seed(self, operator):
+        """
+        Sets random seed based on the time and copies the seed into the clipboard.
+
+        Returns:
+        - seed (int): The random seed based on the current time.
+        """
+
+        seed = int(time.time())
+        print(f"Seed: {seed}")
+        operator.report({"INFO"}, f"Seed: {seed}")
+        random.seed(seed)
+        np.random.seed(seed)
+
+        # There is no clipboard in background mode
+        if not bpy.app.background:
+            bpy.context.window_manager.clipboard = str(seed)
+
+        return seed
+
+    def setup_scene(self, operator, index, data_logger, random_seed=None):
+        """
+        Sets up the scene for rendering with specified index and seed
+
+        Args:
+        - index (int): index of the image
+        - seed (float, optional): The random seed to use, 0 is a valid seed.
+            If not provided a new seed will be generated based on the current time.
+
+        """
+
+        if random_seed is not None:
+            random.seed(random_seed)
+            np.random.seed(random_seed)
+        else:
+            random_seed = self.time_seed(operator)
+
+        # project_name = "dirty_dining_room_dataset"
+        # render_dir_path = pathlib.Path.cwd() / project_name
+        # render_dir_path.parent.mkdir(parents=True, exist_ok=True)
+
+        render_dir_path = pathlib.Path(
+            f"{bpy.context.scene.render_filepath}"
+        )  # / project_name"
+        # render_dir_path.parent.mkdir(parents=True, exist_ok=True)
+
+        img_name = f"{index}_{random_seed}_img"
+        gt_name = f"{index}_{random_seed}_gt"
+
+        bpy.context.scene.render.image_settings.file_format = "JPEG"
+        bpy.context.scene.render.filepath = str(render_dir_path)
+
+        GroundTruthPass().apply(bpy.context.scene.mask_render_mode)
+        self.apply_persistent_data(bpy.context.scene.use_persistent_data)
+        LightPathProfile().apply(
+            bpy.data.scenes[self.main_scene_name], bpy.context.scene.light_path_profile
+        )
+        FrustumCulling().apply(
+            bpy.data.scenes[self.main_scene_name],
+            bpy.context.scene.use_camera_culling,
+            bpy.context.scene.camera_cull_margin,
+        )
+        self.apply_render_budget(
+            bpy.context.scene, bpy.data.scenes[self.main_scene_name]
+        )
+
+        bpy.data.scenes[self.main_scene_name].node_tree.nodes[
+            "File Output"
         ].base_path = str(render_dir_path)
         bpy.data.scenes[self.main_scene_name].node_tree.nodes["File Output"].file_slots[
             0
@@ -3970,156 +5535,733 @@ class SceneRenderer:
             1
         ].path = gt_name
 
-        data_logger.scene_index = index
-        data_logger.scene_datetime = datetime.datetime.now()
-        data_logger.scene_seed = random_seed
+        data_logger.scene_index = index
+        data_logger.scene_datetime = datetime.datetime.now()
+        data_logger.scene_seed = random_seed
+        data_logger.scene_light_path_profile = bpy.context.scene.light_path_profile
+
+    def apply_persistent_data(self, use_persistent_data):
+        """
+        With persistent data, Cycles keeps the synchronized scene, BVH and
+        shaders between consecutive renders of the same Blender session and
+        only updates the data blocks that changed
+
+        Args:
+        - use_persistent_data (bool): keep the render data between renders
+        """
+
+        render_scenes = [bpy.data.scenes[self.main_scene_name]]
+        render_scenes.extend(GroundTruthPass().find_mask_scenes())
+        for render_scene in render_scenes:
+            render_scene.render.use_persistent_data = use_persistent_data
+
+    def apply_render_budget(self, settings_scene, render_scene):
+        """
+        Limits the samples and the time Cycles may spend on an image. The
+        settings of the .blend file are saved in the scene before the budget
+        is applied and restored as soon as it is disabled.
+
+        Args:
+        - settings_scene (bpy.types.Scene): scene holding the budget options
+        - render_scene (bpy.types.Scene): scene rendering the image
+        """
+
+        cycles = render_scene.cycles
+        if not settings_scene.use_render_budget:
+            if self.render_budget_settings_key in render_scene:
+                for name, value in (
+                    render_scene[self.render_budget_settings_key].to_dict().items()
+                ):
+                    setattr(cycles, name, value)
+                del render_scene[self.render_budget_settings_key]
+            return
+
+        if self.render_budget_settings_key not in render_scene:
+            render_scene[self.render_budget_settings_key] = {
+                name: getattr(cycles, name) for name in self.render_budget_setting_names
+            }
+        cycles.use_adaptive_sampling = True
+        cycles.adaptive_threshold = settings_scene.render_noise_threshold
+        cycles.adaptive_min_samples = settings_scene.render_min_samples
+        cycles.samples = max(
+            settings_scene.render_max_samples, settings_scene.render_min_samples
+        )
+        # 0 disables the time limit
+        cycles.time_limit = settings_scene.render_time_limit
+
+    def apply_exposure(self, context):
+        """
+        Sets the exposure with the built-in auto exposure if it is enabled,
+        otherwise the Photographer addon is responsible for the exposure
+        """
+
+        if context.scene.exposure_mode == "NATIVE":
+            exposure = ExposureEstimator().auto_expose(
+                context, bpy.data.scenes[self.main_scene_name]
+            )
+            print(f"Auto Exposure: {exposure:.2f}")
+
+    def is_scene_ready(self, ready_state):
+        """
+        Checks if the randomized scene can be rendered. The depsgraph has to be
+        evaluated and the exposure, which the Photographer addon determines from the
+        viewport preview, must not have changed for scene_ready_stable_time seconds.
+
+        Args:
+        - ready_state (dict): last seen exposure and the time since it is stable
+
+        Returns:
+        - ready (bool): True if the scene can be rendered
+        """
+
+        # Evaluates the depsgraph if there are pending updates
+        bpy.context.evaluated_depsgraph_get()
+
+        if bpy.context.scene.exposure_mode != "PHOTOGRAPHER":
+            return True
+
+        curr_time = time.time()
+        exposure = bpy.data.scenes[self.main_scene_name].view_settings.exposure
+        if exposure != ready_state["exposure"]:
+            ready_state["exposure"] = exposure
+            ready_state["stable_since"] = curr_time
+            return False
+
+        return (
+            curr_time - ready_state["stable_since"]
+            >= bpy.context.scene.scene_ready_stable_time
+        )
+
+    def setup_viewport_preview(self, context):
+        """
+        Switches every 3D viewport to the rendered camera view, the Photographer
+        addon determines the exposure from this preview
+        """
+
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:  # iterate through areas in current screen
+                if area.type == "VIEW_3D":
+                    for (
+                        space
+                    ) in area.spaces:  # iterate through spaces in current VIEW_3D area
+                        if space.type == "VIEW_3D":  # check if space is a 3D view
+                            space.shading.type = "RENDERED"
+                            bpy.ops.object.select_camera()
+                            bpy.ops.view3d.object_as_camera()
+
+    def get_block_stages(self, context):
+        """
+        Returns:
+        - block_stages (set): stages that are kept for all scenes of a
+            keyframed block. With a sky library, the lighting stage changes
+            the environment images, which can not be keyframed.
+        """
+
+        if context.scene.sky_library_path:
+            return self.block_stages | {"lighting"}
+
+        return self.block_stages
+
+    def setup_scene_view(
+        self,
+        operator,
+        context,
+        index,
+        session,
+        data_logger,
+        built_scene_index=None,
+        keep_block_stages=False,
+    ):
+        """
+        Sets up the image of an index as a camera view of a randomized scene.
+        With camera_views_per_scene K, the K consecutive indices starting at a
+        multiple of K share one scene, randomized with the seed of its first
+        index. Each view only randomizes the camera with the seed of its own
+        index, so every image can be reproduced without the others.
+
+        Args:
+        - index (int): index of the image
+        - session (drg_dataset.RenderSession): The render session of the image
+        - built_scene_index (int, optional): index of the scene that is already
+            randomized, it is reused if the image is one of its views
+        - keep_block_stages (bool, optional): Keeps the block_stages and the
+            plate profiles of the previous scene, see render_keyframed_batch
+
+        Returns:
+        - scene_index (int): index of the scene the image is a view of
+        """
+
+        views_per_scene = bpy.context.scene.camera_views_per_scene
+        scene_index = drg_dataset.view_scene_index(index, views_per_scene)
+
+        if scene_index != built_scene_index:
+            scene_seed = session.scene_seed(index, views_per_scene)
+            self.setup_scene(
+                operator=operator,
+                index=scene_index,
+                data_logger=data_logger,
+                random_seed=scene_seed,
+            )
+            stages, stage_states = self.schedule_variation_stages(
+                scene_index, scene_seed, built_scene_index
+            )
+            if keep_block_stages:
+                stages = set(stages or self.variation_stages) - self.get_block_stages(
+                    context
+                )
+            self.randomize_scene(
+                context=context,
+                data_logger=data_logger,
+                stages=stages,
+                stage_states=stage_states,
+                keep_plate_profiles=keep_block_stages,
+            )
+
+        if views_per_scene > 1:
+            self.setup_scene(
+                operator=operator,
+                index=index,
+                data_logger=data_logger,
+                random_seed=session.seed(index),
+            )
+            self.randomize_camera_view(context=context, data_logger=data_logger)
+
+        screen_space_lod = ScreenSpaceLOD()
+        if context.scene.use_screen_space_lod:
+            screen_space_lod.apply(context)
+            data_logger.datalog_level_of_detail(screen_space_lod)
+        else:
+            screen_space_lod.restore(context)
+        if context.scene.use_camera_culling:
+            (
+                data_logger.scene_culled_instances,
+                data_logger.scene_cull_candidates,
+            ) = FrustumCulling().count_culled_instances(
+                context,
+                bpy.data.scenes[self.main_scene_name],
+                context.scene.camera_cull_margin,
+            )
+
+        data_logger.scene_view_index = index - scene_index
+        data_logger.scene_view_scene_index = scene_index
+
+        return scene_index
+
+    def schedule_variation_stages(self, scene_index, scene_seed, built_scene_index):
+        """
+        Decides which stages are randomized again for a scene. A stage with the
+        rate variation_rate_<stage> N is randomized for the first scene of every
+        N images, the absolute scene index decides, and on the first scene of a
+        run. Each stage draws from its own random state, seeded with the seed
+        of the first image of its period, so a scene is reproducible from its
+        index and seed even if the run started in the middle of a period.
+        The camera stage is always randomized together with the room or the
+        furniture stage, its position is derived from the room and the table.
+
+        Args:
+        - scene_index (int): index of the scene
+        - scene_seed (int): seed of the scene, seeds of consecutive indices are
+            consecutive
+        - built_scene_index (int): index of the previous scene, None if the
+            scene is the first one of the run
+
+        Returns:
+        - stages (set): stages to randomize, None if all rates are 1, then
+            every stage is randomized with the global random state as before
+        - stage_states (dict): random state of every stage in stages
+        """
+
+        variation_rates = {
+            stage: getattr(bpy.context.scene, f"variation_rate_{stage}")
+            for stage in self.variation_stages
+        }
+        if all(rate == 1 for rate in variation_rates.values()):
+            return None, None
+
+        stage_seeds = {
+            stage: scene_seed - scene_index % rate
+            for stage, rate in variation_rates.items()
+            if built_scene_index is None
+            or scene_index // rate != built_scene_index // rate
+        }
+        # The camera is placed at the evaluated camera_position of the previous
+        # room and table, it could end up outside of the new room or in furniture
+        if stage_seeds.keys() & {"room", "furniture"}:
+            stage_seeds.setdefault(
+                "camera", scene_seed - scene_index % variation_rates["camera"]
+            )
+
+        return set(stage_seeds), self.create_stage_states(stage_seeds)
+
+    def randomize_camera_view(self, context, data_logger):
+        """
+        Only randomizes the camera of the current scene
+        """
+
+        camera_randomizer = CameraRandomizer()
+        camera_randomizer.randomize_camera_position(context, bpy.data.objects["room"])
+        data_logger.datalog_camera(camera_randomizer)
+
+    def render_image(
+        self,
+        operator,
+        context,
+        index,
+        session,
+        data_logger,
+        built_scene_index=None,
+        write_log=True,
+    ):
+        """
+        Randomizes, renders and logs a single image synchronously,
+        without timers, render handlers or any UI dependency
+
+        Args:
+        - index (int): index of the image
+        - session (drg_dataset.RenderSession): The render session of the image
+        - built_scene_index (int, optional): index of the scene that is
+            already randomized, see setup_scene_view
+        - write_log (bool, optional): Append the row of the image to the csv-file
+
+        Returns:
+        - scene_index (int): index of the scene the image is a view of
+        """
+
+        scene_index = self.setup_scene_view(
+            operator=operator,
+            context=context,
+            index=index,
+            session=session,
+            data_logger=data_logger,
+            built_scene_index=built_scene_index,
+        )
+
+        data_logger.scene_wait_time, data_logger.scene_render_time, render_stats = (
+            self.render_prepared_scene(operator=operator, context=context, index=index)
+        )
+        data_logger.datalog_render_stats(render_stats)
+        data_logger.camera_exposure = bpy.data.scenes[
+            self.main_scene_name
+        ].view_settings.exposure
+        if write_log:
+            data_logger.create_or_append_csv()
+
+        return scene_index
+
+    def render_prepared_scene(self, operator, context, index):
+        """
+        Renders the already randomized scene synchronously
+
+        Args:
+        - index (int): index of the image
+
+        Returns:
+        - wait_time (float): Time spent evaluating the scene and computing the exposure
+        - render_time (float): The time spent in the render call in seconds
+        - render_stats (RenderStatsCollector): samples, sync and sampling time
+        """
+
+        # Without a viewport there is nothing to wait for except the depsgraph
+        # and the built-in exposure
+        wait_start_time = time.time()
+        context.evaluated_depsgraph_get()
+        self.apply_exposure(context)
+        wait_time = time.time() - wait_start_time
+
+        self.curr_start_time = time.time()
+        print(f"Rendering Scene {index}: {time.asctime(time.gmtime(time.time()))}")
+        operator.report(
+            {"INFO"},
+            f"Rendering Scene {index}: {time.asctime(time.gmtime(time.time()))}",
+        )
+
+        render_stats = RenderStatsCollector(self.main_scene_name)
+        render_stats.start()
+        try:
+            bpy.ops.render.render()
+        finally:
+            render_stats.stop()
+
+        self.render_time = time.time() - self.curr_start_time
+
+        return wait_time, self.render_time, render_stats
+
+    def render_batch(self, operator, context, session):
+        """
+        Renders the incomplete images of a render session in a plain
+        synchronous loop, usable from `blender -b` runs
+
+        Args:
+        - session (drg_dataset.RenderSession): The new or resumed render session
+        """
+
+        bpy.context.scene.render.engine = "CYCLES"
+        data_logger = DataLogger()
+
+        self.exec_start_time = time.time()
+        print("##########################################")
+        print("Start Batch Rendering")
+        operator.report({"INFO"}, "Start Batch Rendering")
+        print("##########################################")
+        print(f"Start Time: {time.asctime(time.gmtime(self.exec_start_time))}")
+        data_logger.start_exec_render_time = self.exec_start_time
+
+        built_scene_index = None
+        for index in session.incomplete_indices():
+            built_scene_index = self.render_image(
+                operator=operator,
+                context=context,
+                index=index,
+                session=session,
+                data_logger=data_logger,
+                built_scene_index=built_scene_index,
+                # The row of a re-rendered image may already exist from before a crash
+                write_log=not session.status(index)["log"],
+            )
+            session.update(index, log=True)
+
+        self.exec_time = time.time() - self.exec_start_time
+        print(f"Execution Time: {time.asctime(time.gmtime(self.exec_time))}")
+        operator.report(
+            {"INFO"}, f"Execution Time: {time.asctime(time.gmtime(self.exec_time))}"
+        )
+
+    def render_keyframed_batch(self, operator, context, session, block_size):
+        """
+        Renders the incomplete images of a render session in blocks of
+        block_size scenes. The scenes of a block are randomized one after the
+        other and written as keyframes on consecutive frames, a single
+        animation render then produces the images and masks of the whole
+        block. Room, chair and table are only randomized once per block,
+        their meshes and materials can not be keyframed. The same holds for
+        the plate profiles, which are Float Curve points, the other tableware
+        is randomized for every scene.
+
+        Args:
+        - session (drg_dataset.RenderSession): The new or resumed render session
+        - block_size (int): amount of scenes per animation render
+        """
+
+        bpy.context.scene.render.engine = "CYCLES"
+        data_logger = DataLogger()
+        render_scene = bpy.data.scenes[self.main_scene_name]
+        file_output_node = render_scene.node_tree.nodes["File Output"]
+        render_dir_path = pathlib.Path(bpy.context.scene.render_filepath)
+        # Same frame suffix as the images of the other render modes
+        output_frame = render_scene.frame_current
+
+        self.exec_start_time = time.time()
+        print("##########################################")
+        print("Start Keyframed Batch Rendering")
+        operator.report({"INFO"}, "Start Keyframed Batch Rendering")
+        print("##########################################")
+        print(f"Start Time: {time.asctime(time.gmtime(self.exec_start_time))}")
+        data_logger.start_exec_render_time = self.exec_start_time
+
+        incomplete_indices = session.incomplete_indices()
+        for block_start in range(0, len(incomplete_indices), block_size):
+            block_indices = incomplete_indices[block_start : block_start + block_size]
+            scene_keyframer = SceneKeyframer(render_scene)
+
+            # frame -> (index, csv row)
+            frame_map = {}
+            built_scene_index = None
+            for frame, index in enumerate(block_indices, start=1):
+                built_scene_index = self.setup_scene_view(
+                    operator=operator,
+                    context=context,
+                    index=index,
+                    session=session,
+                    data_logger=data_logger,
+                    built_scene_index=built_scene_index,
+                    keep_block_stages=frame > 1,
+                )
+
+                wait_start_time = time.time()
+                context.evaluated_depsgraph_get()
+                self.apply_exposure(context)
+                data_logger.scene_wait_time = time.time() - wait_start_time
+                data_logger.camera_exposure = render_scene.view_settings.exposure
+
+                scene_keyframer.record(frame)
+                frame_map[frame] = (index, data_logger.get_csv_entry())
+
+            amount_of_keyframed_values = scene_keyframer.write_keyframes()
+            print(
+                f"Keyframed {amount_of_keyframed_values} values for "
+                f"{len(block_indices)} scenes"
+            )
+
+            block_name = f"keyframe_block_{block_indices[0]}"
+            file_output_node.file_slots[0].path = f"{block_name}_img"
+            file_output_node.file_slots[1].path = f"{block_name}_gt"
+
+            frame_stats = {}
+            render_stats = RenderStatsCollector(self.main_scene_name)
+
+            def on_render_pre(scene, *args):
+                if scene.name == self.main_scene_name:
+                    render_stats.reset()
+
+            def on_render_post(scene, *args):
+                if scene.name == self.main_scene_name:
+                    frame_stats[scene.frame_current] = (
+                        time.time() - render_stats.start_time,
+                        render_stats.samples,
+                        render_stats.sync_time,
+                        render_stats.sampling_time,
+                    )
+
+            print(
+                f"Rendering Scenes {block_indices[0]} - {block_indices[-1]}: "
+                f"{time.asctime(time.gmtime(time.time()))}"
+            )
+            operator.report(
+                {"INFO"},
+                f"Rendering Scenes {block_indices[0]} - {block_indices[-1]}",
+            )
+
+            render_stats.start()
+            bpy.app.handlers.render_pre.append(on_render_pre)
+            bpy.app.handlers.render_post.append(on_render_post)
+            try:
+                with temporary_attributes(
+                    render_scene,
+                    frame_start=1,
+                    frame_end=len(block_indices),
+                    frame_step=1,
+                ):
+                    bpy.ops.render.render(animation=True)
+            finally:
+                render_stats.stop()
+                bpy.app.handlers.render_pre.remove(on_render_pre)
+                bpy.app.handlers.render_post.remove(on_render_post)
+                scene_keyframer.clear()
+                render_scene.frame_set(output_frame)
+
+            for frame, (index, datapoint_entry_dict) in frame_map.items():
+                # The File Output node names the files of a block by frame
+                for output_name in ("img", "gt"):
+                    for output_path in render_dir_path.glob(
+                        f"{block_name}_{output_name}{frame:04d}.*"
+                    ):
+                        output_path.replace(
+                            output_path.with_name(
+                                f"{index}_{session.seed(index)}_{output_name}"
+                                f"{output_frame:04d}{output_path.suffix}"
+                            )
+                        )
+
+                render_time, samples, sync_time, sampling_time = frame_stats.get(
+                    frame, (0.0, None, None, None)
+                )
+                datapoint_entry_dict["render_time"] = render_time
+                datapoint_entry_dict["render_samples"] = samples
+                datapoint_entry_dict["sync_time"] = sync_time
+                datapoint_entry_dict["sampling_time"] = sampling_time
+                # The row of a re-rendered image may already exist from before a crash
+                if not session.status(index)["log"]:
+                    data_logger.create_or_append_csv(datapoint_entry_dict)
+                session.update(index, log=True)
+
+        self.exec_time = time.time() - self.exec_start_time
+        print(f"Execution Time: {time.asctime(time.gmtime(self.exec_time))}")
+        operator.report(
+            {"INFO"}, f"Execution Time: {time.asctime(time.gmtime(self.exec_time))}"
+        )
 
-    def prepare_and_render_scene(
-        self,
-        operator,
-        index,
-        start_idx,
-        amount_of_imgs,
-        context,
-        data_logger,
-        seed=None,
+    def synthesize_batch(
+        self, operator, context, scene_queue, session, render_time_model=None
     ):
         """
-        Prepares and renders the scene with the specified index and seed
+        Producer side of the pipeline mode: randomizes the incomplete scenes of
+        the render session and puts each one as a saved .blend snapshot into
+        the scene queue, without rendering it. Blocks while the queue is full.
 
         Args:
-        - index (int): index of the image
-        - seed(float, optional): The random seed to use.
-            If not provided, a new seed will be generated based on the current time
-
+        - scene_queue (drg_dataset.SceneQueue): The queue shared with the renderers
+        - session (drg_dataset.RenderSession): The new or resumed render session
+        - render_time_model (drg_render_cost.RenderTimeModel, optional): Predicts
+            the render time of every snapshot, renderers claim the most
+            expensive of the queued snapshots first
         """
-        print("Setting up and randomize the scene.")
-        operator.report({"INFO"}, "Setting up and randomize the scene.")
 
-        self.setup_scene(
-            operator=operator, index=index, data_logger=data_logger, random_seed=seed
-        )
-        self.randomize_scene(context=context, data_logger=data_logger)
+        bpy.context.scene.render.engine = "CYCLES"
+        data_logger = DataLogger()
+
+        built_scene_index = None
+        for index in session.incomplete_indices():
+            scene_queue.wait_for_space()
 
-        bpy.app.timers.register(
-            lambda: self.render_scene(
+            synthesis_start_time = time.time()
+            built_scene_index = self.setup_scene_view(
                 operator=operator,
                 context=context,
+                index=index,
+                session=session,
                 data_logger=data_logger,
-                curr_index=index,
-                start_idx=start_idx,
-                amount_of_imgs=amount_of_imgs,
-            ),
-            first_interval=20,
-        )
+                built_scene_index=built_scene_index,
+            )
+            context.evaluated_depsgraph_get()
+
+            # The csv-file only contains strings anyway
+            datapoint_entry_dict = {
+                key: str(value) for key, value in data_logger.get_csv_entry().items()
+            }
+            predicted_render_time = (
+                render_time_model.predict_row(datapoint_entry_dict)
+                if render_time_model is not None
+                else 0.0
+            )
 
-    def render_start(self, operator, context, start_idx, amount_of_imgs):
+            scene_queue.put(
+                index=index,
+                snapshot={
+                    "seed": data_logger.scene_seed,
+                    "synthesis_time": time.time() - synthesis_start_time,
+                    "predicted_render_time": predicted_render_time,
+                    "entry": datapoint_entry_dict,
+                },
+                save_blend=lambda filepath: bpy.ops.wm.save_as_mainfile(
+                    filepath=filepath, copy=True, compress=False
+                ),
+            )
+            print(f"Queued Scene {index}: {time.asctime(time.gmtime(time.time()))}")
+            operator.report({"INFO"}, f"Queued Scene {index}")
 
-        bpy.context.scene.render.engine = "CYCLES"
-        data_logger = DataLogger()
+    def consume_batch(self, operator, scene_queue, logger_name=None):
+        """
+        Consumer side of the pipeline mode: renders the snapshots of the scene
+        queue until the queue is closed and empty. Several consumers may share
+        one queue, each snapshot is rendered exactly once.
 
-        self.exec_start_time = time.time()
-        print("##########################################")
-        print("Start Rendering")
-        operator.report({"INFO"}, "Start Rendering")
-        print("##########################################")
-        print(f"Start Time: {time.asctime(time.gmtime(self.exec_start_time))}")
-        operator.report(
-            {"INFO"}, f"Start Time: {time.asctime(time.gmtime(self.exec_start_time))}"
-        )
-        data_logger.start_exec_render_time = self.exec_start_time
+        Args:
+        - scene_queue (drg_dataset.SceneQueue): The queue shared with the synthesizer
+        - logger_name (str, optional): Name of the csv-file, defaults to the
+            name stored in the snapshot
 
-        curr_index = start_idx
+        Returns:
+        - amount_of_rendered_imgs (int): amount of rendered snapshots
+        """
 
-        for window in context.window_manager.windows:
-            for area in window.screen.areas:  # iterate through areas in current screen
-                if area.type == "VIEW_3D":
-                    for (
-                        space
-                    ) in area.spaces:  # iterate through spaces in current VIEW_3D area
-                        if space.type == "VIEW_3D":  # check if space is a 3D view
-                            space.shading.type = "RENDERED"
-                            bpy.ops.object.select_camera()
-                            bpy.ops.view3d.object_as_camera()
+        amount_of_rendered_imgs = 0
+        while True:
+            snapshot = scene_queue.claim()
+            if snapshot is None:
+                if scene_queue.is_closed() and not scene_queue.pending():
+                    break
+                time.sleep(scene_queue.poll_interval)
+                continue
+
+            # Loading the snapshot replaces all scene data, the context has
+            # to be fetched again afterwards
+            bpy.ops.wm.open_mainfile(filepath=snapshot["blend_path"])
+            context = bpy.context
+            if logger_name:
+                context.scene.datalogger_name = logger_name
+
+            wait_time, render_time, render_stats = self.render_prepared_scene(
+                operator=operator, context=context, index=snapshot["index"]
+            )
 
-        # Render Image and Ground Truth
-        self.prepare_and_render_scene(
-            operator=operator,
-            index=curr_index,
-            start_idx=start_idx,
-            amount_of_imgs=amount_of_imgs,
-            context=context,
-            data_logger=data_logger,
-        )
+            datapoint_entry_dict = snapshot["entry"]
+            datapoint_entry_dict["scene_wait_time"] = wait_time
+            datapoint_entry_dict["render_time"] = render_time
+            datapoint_entry_dict["render_samples"] = render_stats.samples
+            datapoint_entry_dict["sync_time"] = render_stats.sync_time
+            datapoint_entry_dict["sampling_time"] = render_stats.sampling_time
+            datapoint_entry_dict["camera_exposure"] = bpy.data.scenes[
+                self.main_scene_name
+            ].view_settings.exposure
+            DataLogger().create_or_append_csv(datapoint_entry_dict)
 
-    def render_scene(
-        self,
-        operator,
-        context,
-        data_logger,
-        curr_index,
-        start_idx,
-        amount_of_imgs,
+            scene_queue.task_done(snapshot)
+            amount_of_rendered_imgs += 1
+
+        return amount_of_rendered_imgs
+
+    def benchmark_light_path_profiles(
+        self, operator, context, seeds, profile_names, reference_samples
     ):
-        self.curr_start_time = time.time()
+        """
+        Renders the scenes of fixed seeds under every light path profile and
+        compares each render with a reference render of the same scene, which
+        uses the QUALITY profile and reference_samples samples. Denoising is
+        disabled, so the noise of the profiles is compared. The results are
+        written to light_path_benchmark.csv in the export folder.
 
-        print(f"Rendering Scene: {time.asctime(time.gmtime(time.time()))}")
-        operator.report(
-            {"INFO"},
-            f"Rendering Scene {curr_index + 1}: {time.asctime(time.gmtime(time.time()))}",
-        )
+        Args:
+        - seeds (list): seeds of the benchmark scenes
+        - profile_names (list): keys of LIGHT_PATH_PROFILES or "FILE"
+        - reference_samples (int): samples of the reference render
+
+        Returns:
+        - results (list): dicts with seed, profile, render_time and relative_rmse
+        """
+
+        bpy.context.scene.render.engine = "CYCLES"
+        data_logger = DataLogger()
+        render_scene = bpy.data.scenes[self.main_scene_name]
+        resolution_percentage = render_scene.render.resolution_percentage
 
-        curr_index = curr_index + 1
-        bpy.app.handlers.render_post.append(
-            lambda *args, **kwargs: self.render_repeat(
+        results = []
+        for scene_idx, seed in enumerate(seeds):
+            self.setup_scene(
                 operator=operator,
+                index=scene_idx,
                 data_logger=data_logger,
-                context=context,
-                curr_index=curr_index,
-                start_idx=start_idx,
-                amount_of_imgs=amount_of_imgs,
+                random_seed=seed,
+            )
+            self.randomize_scene(context=context, data_logger=data_logger)
+            context.evaluated_depsgraph_get()
+
+            LightPathProfile().apply(render_scene, "QUALITY")
+            reference_pixels = ExposureEstimator().render_preview(
+                render_scene,
+                resolution_percentage=resolution_percentage,
+                samples=reference_samples,
             )
-        )
 
-        bpy.ops.render.render()
+            for profile_name in profile_names:
+                LightPathProfile().apply(render_scene, profile_name)
+                start_time = time.time()
+                pixels = ExposureEstimator().render_preview(
+                    render_scene,
+                    resolution_percentage=resolution_percentage,
+                    samples=render_scene.cycles.samples,
+                )
+                results.append(
+                    {
+                        "seed": seed,
+                        "profile": profile_name,
+                        "render_time": time.time() - start_time,
+                        "relative_rmse": relative_rmse(pixels, reference_pixels),
+                    }
+                )
+                print(
+                    f"Seed {seed}, profile {profile_name}: "
+                    f"{results[-1]['render_time']:.1f} s, "
+                    f"relative RMSE {results[-1]['relative_rmse']:.4f}"
+                )
+                operator.report(
+                    {"INFO"},
+                    f"Seed {seed}, profile {profile_name}: "
+                    f"{results[-1]['render_time']:.1f} s",
+                )
 
-    def render_repeat(
-        self,
-        operator,
-        data_logger,
-        context,
-        curr_index,
-        start_idx,
-        amount_of_imgs,
-    ):
-        self.render_time = time.time() - self.curr_start_time
-        data_logger.scene_render_time = self.render_time
-        data_logger.camera_exposure = bpy.data.scenes[
-            self.main_scene_name
-        ].view_settings.exposure
-        data_logger.create_or_append_csv()
-        bpy.app.handlers.render_post.clear()
-        print(f"Saving Scene: {time.asctime(time.gmtime(time.time()))}")
-        operator.report(
-            {"INFO"}, f"Saving Scene: {time.asctime(time.gmtime(time.time()))}"
-        )
+        LightPathProfile().apply(render_scene, context.scene.light_path_profile)
 
-        if curr_index < (start_idx + amount_of_imgs):
-            # Render Image and Ground Truth
-            self.prepare_and_render_scene(
-                operator=operator,
-                index=curr_index,
-                context=context,
-                data_logger=data_logger,
-                start_idx=start_idx,
-                amount_of_imgs=amount_of_imgs,
-            )
-        else:
-            exec_time = time.time() - data_logger.start_exec_render_time
-            print(f"Execution Time: {time.asctime(time.gmtime(exec_time))}")
-            operator.report(
-                {"INFO"}, f"Execution Time: {time.asctime(time.gmtime(exec_time))}"
+        csv_path = (
+            pathlib.Path(context.scene.render_filepath) / "light_path_benchmark.csv"
+        )
+        with open(csv_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(
+                csv_file, fieldnames=["seed", "profile", "render_time", "relative_rmse"]
             )
+            writer.writeheader()
+            writer.writerows(results)
+
+        return results
 
 
 ############################ PROPERTIES #############n###############
@@ -4564,6 +6706,274 @@ class DRG_OT_randomize_scene(bpy.types.Operator):
         return {"FINISHED"}
 
 
+class DRG_OT_render_job(bpy.types.Operator):
+    """
+    Renders the images of a render session as a modal job, so the UI stays
+    responsive. ESC cancels the job, the session can be resumed afterwards.
+    """
+
+    bl_idname = "drg.render_job"
+    bl_label = "Render Job"
+    bl_options = {"INTERNAL"}
+
+    resume: bpy.props.BoolProperty(default=False)  # type: ignore
+
+    # Seconds between two updates of the job
+    poll_interval = 0.25
+
+    # State of the running job shown in the panel, only one job runs at a time
+    stats = None
+    status_text = ""
+    cancel_requested = False
+
+    @classmethod
+    def is_running(cls):
+        return cls.stats is not None
+
+    def invoke(self, context, event):
+        if DRG_OT_render_job.is_running():
+            self.report({"ERROR"}, "A render job is already running")
+            return {"CANCELLED"}
+
+        if self.resume:
+            self.session = drg_dataset.RenderSession.load(
+                context.scene.render_filepath, context.scene.datalogger_name
+            )
+            if self.session is None:
+                self.report(
+                    {"ERROR"},
+                    f"No render session of {context.scene.datalogger_name} "
+                    f"in {context.scene.render_filepath}",
+                )
+                return {"CANCELLED"}
+        else:
+            self.session = drg_dataset.RenderSession.create(
+                context.scene.render_filepath,
+                context.scene.datalogger_name,
+                context.scene.render_index,
+                context.scene.amount_of_imgs,
+            )
+
+        context.scene.render.engine = "CYCLES"
+        self.data_logger = DataLogger()
+        self.data_logger.start_exec_render_time = time.time()
+        print("##########################################")
+        print("Start Rendering")
+        self.report({"INFO"}, "Start Rendering")
+        print("##########################################")
+        print(
+            f"Start Time: {time.asctime(time.gmtime(self.data_logger.start_exec_render_time))}"
+        )
+
+        SceneRenderer().setup_viewport_preview(context)
+
+        self.curr_index = None
+        self.built_scene_index = None
+        self.stage = "PREPARE"
+
+        # Render handlers only set the status, the job reacts on the next timer event
+        self.render_status = {"status": None, "end_time": 0}
+
+        def on_render_complete(*args):
+            self.render_status.update(status="COMPLETE", end_time=time.time())
+
+        def on_render_cancel(*args):
+            self.render_status.update(status="CANCELLED", end_time=time.time())
+
+        self.render_stats = RenderStatsCollector(SceneRenderer().main_scene_name)
+
+        self.handlers = [
+            (bpy.app.handlers.render_complete, on_render_complete),
+            (bpy.app.handlers.render_cancel, on_render_cancel),
+        ]
+        for handler_list, handler in self.handlers:
+            handler_list.append(handler)
+
+        DRG_OT_render_job.stats = drg_dataset.RenderJobStats(
+            len(self.session.incomplete_indices())
+        )
+        DRG_OT_render_job.cancel_requested = False
+
+        self.timer = context.window_manager.event_timer_add(
+            self.poll_interval, window=context.window
+        )
+        context.window_manager.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            DRG_OT_render_job.cancel_requested = True
+
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        if self.stage == "RENDERING":
+            if self.render_status["status"] == "RENDERING":
+                return {"PASS_THROUGH"}
+            self.render_stats.stop()
+            self.data_logger.datalog_render_stats(self.render_stats)
+            if self.render_status["status"] == "CANCELLED":
+                DRG_OT_render_job.cancel_requested = True
+            else:
+                self.save_image()
+            self.stage = "PREPARE"
+
+        if DRG_OT_render_job.cancel_requested:
+            print("Render job cancelled.")
+            self.report({"WARNING"}, "Render job cancelled.")
+            return self.finish(context, cancelled=True)
+
+        if self.stage == "PREPARE":
+            self.curr_index = self.session.next_incomplete_index(after=self.curr_index)
+            if self.curr_index is None:
+                return self.finish(context)
+            self.prepare_image(context)
+        elif self.stage == "WAIT":
+            if not self.wait_for_scene_ready(context):
+                return self.finish(context, cancelled=True)
+
+        self.update_status(context)
+
+        return {"PASS_THROUGH"}
+
+    def prepare_image(self, context):
+        print("Setting up and randomize the scene.")
+        self.report({"INFO"}, "Setting up and randomize the scene.")
+
+        start_time = time.time()
+        self.built_scene_index = SceneRenderer().setup_scene_view(
+            operator=self,
+            context=context,
+            index=self.curr_index,
+            session=self.session,
+            data_logger=self.data_logger,
+            built_scene_index=self.built_scene_index,
+        )
+        SceneRenderer().apply_exposure(context)
+        DRG_OT_render_job.stats.add_stage_time("synthesis", time.time() - start_time)
+
+        self.ready_state = {
+            "start_time": time.time(),
+            "exposure": None,
+            "stable_since": 0,
+        }
+        self.stage = "WAIT"
+
+    def wait_for_scene_ready(self, context):
+        """
+        Starts rendering as soon as the scene is ready or the timeout is reached
+
+        Returns:
+        - success (bool): False if the render could not be started
+        """
+
+        wait_time = time.time() - self.ready_state["start_time"]
+        timed_out = wait_time >= context.scene.scene_ready_timeout
+
+        if not SceneRenderer().is_scene_ready(self.ready_state) and not timed_out:
+            return True
+
+        if timed_out:
+            print(f"Scene not ready after {wait_time:.2f} s, rendering anyway.")
+            self.report(
+                {"WARNING"},
+                f"Scene not ready after {wait_time:.2f} s, rendering anyway.",
+            )
+        else:
+            print(f"Scene ready after {wait_time:.2f} s")
+
+        self.data_logger.scene_wait_time = wait_time
+        DRG_OT_render_job.stats.add_stage_time("wait", wait_time)
+
+        print(
+            f"Rendering Scene {self.curr_index}: {time.asctime(time.gmtime(time.time()))}"
+        )
+        self.render_status.update(status="RENDERING", end_time=0)
+        self.render_start_time = time.time()
+        self.render_stats.start()
+        if "CANCELLED" in bpy.ops.render.render("INVOKE_DEFAULT"):
+            self.render_stats.stop()
+            self.report({"ERROR"}, "Render could not be started")
+            return False
+
+        self.stage = "RENDERING"
+        return True
+
+    def save_image(self):
+        start_time = time.time()
+        render_time = self.render_status["end_time"] - self.render_start_time
+        self.data_logger.scene_render_time = render_time
+        self.data_logger.camera_exposure = bpy.data.scenes[
+            SceneRenderer().main_scene_name
+        ].view_settings.exposure
+        # The row of a re-rendered image may already exist from before a crash
+        if not self.session.status(self.curr_index)["log"]:
+            self.data_logger.create_or_append_csv()
+        self.session.update(self.curr_index, log=True)
+        print(f"Saving Scene: {time.asctime(time.gmtime(time.time()))}")
+
+        DRG_OT_render_job.stats.add_stage_time("render", render_time)
+        # Only known in background mode, see RenderStatsCollector
+        if self.render_stats.sync_time is not None:
+            DRG_OT_render_job.stats.add_stage_time("sync", self.render_stats.sync_time)
+            DRG_OT_render_job.stats.add_stage_time(
+                "sampling", self.render_stats.sampling_time
+            )
+        DRG_OT_render_job.stats.add_stage_time("save", time.time() - start_time)
+        DRG_OT_render_job.stats.image_done()
+        print(DRG_OT_render_job.stats.summary())
+
+    def update_status(self, context):
+        stats = DRG_OT_render_job.stats
+        DRG_OT_render_job.status_text = f"Image {self.curr_index}: {self.stage.lower()}"
+        context.workspace.status_text_set(
+            f"{DRG_OT_render_job.status_text} | {stats.summary()} | "
+            f"{stats.stage_summary()} | ESC to cancel"
+        )
+        self.redraw_panels(context)
+
+    def redraw_panels(self, context):
+        for window in context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == "VIEW_3D":
+                    area.tag_redraw()
+
+    def remove_job(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        self.render_stats.stop()
+        for handler_list, handler in self.handlers:
+            if handler in handler_list:
+                handler_list.remove(handler)
+        context.workspace.status_text_set(None)
+        DRG_OT_render_job.stats = None
+        self.redraw_panels(context)
+
+    def finish(self, context, cancelled=False):
+        exec_time = time.time() - self.data_logger.start_exec_render_time
+        print(f"Execution Time: {time.asctime(time.gmtime(exec_time))}")
+        self.report({"INFO"}, f"Execution Time: {time.asctime(time.gmtime(exec_time))}")
+        self.remove_job(context)
+
+        return {"CANCELLED"} if cancelled else {"FINISHED"}
+
+    def cancel(self, context):
+        # Called by Blender if the job is aborted from outside, e.g. by loading a file
+        self.remove_job(context)
+
+
+class DRG_OT_cancel_render_job(bpy.types.Operator):
+    """Cancel the running render job after the current image"""
+
+    bl_idname = "drg.cancel_render_job"
+    bl_label = "Cancel Rendering"
+
+    def execute(self, context):
+        DRG_OT_render_job.cancel_requested = True
+        self.report({"INFO"}, "Rendering stops after the current image")
+        return {"FINISHED"}
+
+
 class DRG_OT_render_scene(bpy.types.Operator):
     """Render randomized scene"""
 
@@ -4571,10 +6981,18 @@ class DRG_OT_render_scene(bpy.types.Operator):
     bl_label = "Render Randomized Scene"
 
     def execute(self, context):
-        SceneRenderer().render_start(
-            self, context, context.scene.render_index, context.scene.amount_of_imgs
-        )
-        bpy.ops.ed.undo_push()
+        bpy.ops.drg.render_job("INVOKE_DEFAULT")
+        return {"FINISHED"}
+
+
+class DRG_OT_resume_rendering(bpy.types.Operator):
+    """Continue the interrupted render session of the export folder"""
+
+    bl_idname = "drg.resume_rendering"
+    bl_label = "Resume Rendering"
+
+    def execute(self, context):
+        bpy.ops.drg.render_job("INVOKE_DEFAULT", resume=True)
         return {"FINISHED"}
 
 
@@ -4688,12 +7106,12 @@ class DRG_PT_plate_characteristics_sub_panel(bpy.types.Panel):
         pcg_modifier = context.object.modifiers["Plate Curve Generator"]
         pcg_node_group = pcg_modifier.node_group
 
-        base_id = pcg_node_group.interface.items_tree["Base"].identifier
-        diameter_id = pcg_node_group.interface.items_tree["Diameter"].identifier
-        thickness_id = pcg_node_group.interface.items_tree["Thickness"].identifier
-        base_radius_id = pcg_node_group.interface.items_tree["Base Radius"].identifier
-        base_height_id = pcg_node_group.interface.items_tree["Base Height"].identifier
-        base_width_id = pcg_node_group.interface.items_tree["Base Width"].identifier
+        base_id = interface_identifiers(pcg_node_group)["Base"]
+        diameter_id = interface_identifiers(pcg_node_group)["Diameter"]
+        thickness_id = interface_identifiers(pcg_node_group)["Thickness"]
+        base_radius_id = interface_identifiers(pcg_node_group)["Base Radius"]
+        base_height_id = interface_identifiers(pcg_node_group)["Base Height"]
+        base_width_id = interface_identifiers(pcg_node_group)["Base Width"]
 
         self.layout.label(text="Plate Characteristics")
         self.layout.prop(pcg_modifier, f'["{diameter_id}"]', text="Diameter")
@@ -4751,27 +7169,23 @@ class DRG_PT_spoon_characteristics_sub_panel(bpy.types.Panel):
         sg_modifier = context.object.modifiers["Spoon Generator"]
         sg_node_group = sg_modifier.node_group
 
-        length_id = sg_node_group.interface.items_tree["Length"].identifier
+        length_id = interface_identifiers(sg_node_group)["Length"]
 
-        lod_id = sg_node_group.interface.items_tree["Level of Detail"].identifier
+        lod_id = interface_identifiers(sg_node_group)["Level of Detail"]
 
-        bowl_length_id = sg_node_group.interface.items_tree["Bowl Length"].identifier
-        bowl_width_id = sg_node_group.interface.items_tree["Bowl Width"].identifier
-        bowl_depth_id = sg_node_group.interface.items_tree["Bowl Depth"].identifier
+        bowl_length_id = interface_identifiers(sg_node_group)["Bowl Length"]
+        bowl_width_id = interface_identifiers(sg_node_group)["Bowl Width"]
+        bowl_depth_id = interface_identifiers(sg_node_group)["Bowl Depth"]
 
-        neck_length_id = sg_node_group.interface.items_tree["Neck Length"].identifier
-        neck_height_id = sg_node_group.interface.items_tree["Neck Height"].identifier
+        neck_length_id = interface_identifiers(sg_node_group)["Neck Length"]
+        neck_height_id = interface_identifiers(sg_node_group)["Neck Height"]
 
-        handle_width_id = sg_node_group.interface.items_tree["Handle Width"].identifier
-        handle_end_height_id = sg_node_group.interface.items_tree[
-            "Handle End Height"
-        ].identifier
-        handle_end_width_id = sg_node_group.interface.items_tree[
-            "Handle End Width"
-        ].identifier
-        handle_end_curvature_id = sg_node_group.interface.items_tree[
+        handle_width_id = interface_identifiers(sg_node_group)["Handle Width"]
+        handle_end_height_id = interface_identifiers(sg_node_group)["Handle End Height"]
+        handle_end_width_id = interface_identifiers(sg_node_group)["Handle End Width"]
+        handle_end_curvature_id = interface_identifiers(sg_node_group)[
             "Handle End Curvature"
-        ].identifier
+        ]
 
         self.layout.label(text="Spoon Characteristics")
         self.layout.prop(sg_modifier, f'["{lod_id}"]', text="Level of Detail")
@@ -4816,40 +7230,30 @@ class DRG_PT_fork_characteristics_sub_panel(bpy.types.Panel):
         fg_modifier = context.object.modifiers["Fork Generator"]
         fg_node_group = fg_modifier.node_group
 
-        length_id = fg_node_group.interface.items_tree["Length"].identifier
+        length_id = interface_identifiers(fg_node_group)["Length"]
 
-        amount_of_prongs_id = fg_node_group.interface.items_tree[
-            "Amount of Prongs"
-        ].identifier
+        amount_of_prongs_id = interface_identifiers(fg_node_group)["Amount of Prongs"]
 
-        prong_length_id = fg_node_group.interface.items_tree["Prong Length"].identifier
-        prong_tip_curvature_id = fg_node_group.interface.items_tree[
+        prong_length_id = interface_identifiers(fg_node_group)["Prong Length"]
+        prong_tip_curvature_id = interface_identifiers(fg_node_group)[
             "Prong Tip Curvature"
-        ].identifier
-
-        eyes_curvature_id = fg_node_group.interface.items_tree[
-            "Eyes Curvature"
-        ].identifier
-
-        bowl_length_id = fg_node_group.interface.items_tree["Bowl Length"].identifier
-        bowl_width_id = fg_node_group.interface.items_tree["Bowl Width"].identifier
-        bowl_curvature_id = fg_node_group.interface.items_tree[
-            "Bowl Curvature"
-        ].identifier
-
-        neck_length_id = fg_node_group.interface.items_tree["Neck Length"].identifier
-        neck_height_id = fg_node_group.interface.items_tree["Neck Height"].identifier
-
-        handle_width_id = fg_node_group.interface.items_tree["Handle Width"].identifier
-        handle_end_height_id = fg_node_group.interface.items_tree[
-            "Handle End Height"
-        ].identifier
-        handle_end_width_id = fg_node_group.interface.items_tree[
-            "Handle End Width"
-        ].identifier
-        handle_end_curvature_id = fg_node_group.interface.items_tree[
+        ]
+
+        eyes_curvature_id = interface_identifiers(fg_node_group)["Eyes Curvature"]
+
+        bowl_length_id = interface_identifiers(fg_node_group)["Bowl Length"]
+        bowl_width_id = interface_identifiers(fg_node_group)["Bowl Width"]
+        bowl_curvature_id = interface_identifiers(fg_node_group)["Bowl Curvature"]
+
+        neck_length_id = interface_identifiers(fg_node_group)["Neck Length"]
+        neck_height_id = interface_identifiers(fg_node_group)["Neck Height"]
+
+        handle_width_id = interface_identifiers(fg_node_group)["Handle Width"]
+        handle_end_height_id = interface_identifiers(fg_node_group)["Handle End Height"]
+        handle_end_width_id = interface_identifiers(fg_node_group)["Handle End Width"]
+        handle_end_curvature_id = interface_identifiers(fg_node_group)[
             "Handle End Curvature"
-        ].identifier
+        ]
 
         self.layout.label(text="Fork Characteristics")
         self.layout.prop(fg_modifier, f'["{length_id}"]', text="Length")
@@ -4901,36 +7305,32 @@ class DRG_PT_knife_characteristics_sub_panel(bpy.types.Panel):
         kg_modifier = context.object.modifiers["Knife Generator"]
         kg_node_group = kg_modifier.node_group
 
-        length_id = kg_node_group.interface.items_tree["Length"].identifier
-        width_id = kg_node_group.interface.items_tree["Width"].identifier
-        thickness_id = kg_node_group.interface.items_tree["Thickness"].identifier
+        length_id = interface_identifiers(kg_node_group)["Length"]
+        width_id = interface_identifiers(kg_node_group)["Width"]
+        thickness_id = interface_identifiers(kg_node_group)["Thickness"]
 
-        blade_length_id = kg_node_group.interface.items_tree["Blade Length"].identifier
-        blade_thickness_id = kg_node_group.interface.items_tree[
-            "Blade Thickness"
-        ].identifier
+        blade_length_id = interface_identifiers(kg_node_group)["Blade Length"]
+        blade_thickness_id = interface_identifiers(kg_node_group)["Blade Thickness"]
 
-        blade_tip_curvature_id = kg_node_group.interface.items_tree[
+        blade_tip_curvature_id = interface_identifiers(kg_node_group)[
             "Blade Tip Curvature"
-        ].identifier
-        blade_tip_intensity_id = kg_node_group.interface.items_tree[
+        ]
+        blade_tip_intensity_id = interface_identifiers(kg_node_group)[
             "Blade Tip Intensity"
-        ].identifier
+        ]
 
-        blade_base_curvature_id = kg_node_group.interface.items_tree[
+        blade_base_curvature_id = interface_identifiers(kg_node_group)[
             "Blade Base Curvature"
-        ].identifier
-        blade_base_intensity_id = kg_node_group.interface.items_tree[
+        ]
+        blade_base_intensity_id = interface_identifiers(kg_node_group)[
             "Blade Base Intensity"
-        ].identifier
+        ]
 
-        handle_width_id = kg_node_group.interface.items_tree["Handle Width"].identifier
-        handle_end_width_id = kg_node_group.interface.items_tree[
-            "Handle End Width"
-        ].identifier
-        handle_end_curvature_id = kg_node_group.interface.items_tree[
+        handle_width_id = interface_identifiers(kg_node_group)["Handle Width"]
+        handle_end_width_id = interface_identifiers(kg_node_group)["Handle End Width"]
+        handle_end_curvature_id = interface_identifiers(kg_node_group)[
             "Handle End Curvature"
-        ].identifier
+        ]
 
         self.layout.label(text="Knife Characteristics")
         self.layout.prop(kg_modifier, f'["{length_id}"]', text="Length")
@@ -4983,36 +7383,26 @@ class DRG_PT_glass_characteristics_sub_panel(bpy.types.Panel):
         gg_modifier = context.object.modifiers["Glass Generator"]
         gg_node_group = gg_modifier.node_group
 
-        lod_id = gg_node_group.interface.items_tree["Level of Detail"].identifier
+        lod_id = interface_identifiers(gg_node_group)["Level of Detail"]
 
-        height_id = gg_node_group.interface.items_tree["Height"].identifier
-        thickness_id = gg_node_group.interface.items_tree["Thickness"].identifier
+        height_id = interface_identifiers(gg_node_group)["Height"]
+        thickness_id = interface_identifiers(gg_node_group)["Thickness"]
 
-        base_diameter_id = gg_node_group.interface.items_tree[
-            "Base Diameter"
-        ].identifier
-        base_curvature_id = gg_node_group.interface.items_tree[
-            "Base Curvature"
-        ].identifier
-        base_thickness_id = gg_node_group.interface.items_tree[
-            "Base Thickness"
-        ].identifier
+        base_diameter_id = interface_identifiers(gg_node_group)["Base Diameter"]
+        base_curvature_id = interface_identifiers(gg_node_group)["Base Curvature"]
+        base_thickness_id = interface_identifiers(gg_node_group)["Base Thickness"]
 
-        mid_curvature_height_id = gg_node_group.interface.items_tree[
+        mid_curvature_height_id = interface_identifiers(gg_node_group)[
             "Mid Curvature Height"
-        ].identifier
-        mid_curvature_diameter_id = gg_node_group.interface.items_tree[
+        ]
+        mid_curvature_diameter_id = interface_identifiers(gg_node_group)[
             "Mid Curvature Diameter"
-        ].identifier
+        ]
 
-        rim_diameter_id = gg_node_group.interface.items_tree["Rim Diameter"].identifier
-        rim_curvature_id = gg_node_group.interface.items_tree[
-            "Rim Curvature"
-        ].identifier
+        rim_diameter_id = interface_identifiers(gg_node_group)["Rim Diameter"]
+        rim_curvature_id = interface_identifiers(gg_node_group)["Rim Curvature"]
 
-        bowl_curvature_id = gg_node_group.interface.items_tree[
-            "Bowl Curvature"
-        ].identifier
+        bowl_curvature_id = interface_identifiers(gg_node_group)["Bowl Curvature"]
 
         self.layout.label(text="Glass Characteristics")
         self.layout.prop(gg_modifier, f'["{lod_id}"]', text="Level of Detail")
@@ -5056,17 +7446,15 @@ class DRG_PT_placemat_characteristics_sub_panel(bpy.types.Panel):
         pmg_modifier = context.object.modifiers["Placemat Generator"]
         pmg_node_group = pmg_modifier.node_group
 
-        round_tablecloth_id = pmg_node_group.interface.items_tree[
-            "Round Tablecloth"
-        ].identifier
+        round_tablecloth_id = interface_identifiers(pmg_node_group)["Round Tablecloth"]
 
-        height_id = pmg_node_group.interface.items_tree["Height"].identifier
-        width_id = pmg_node_group.interface.items_tree["Width"].identifier
-        depth_id = pmg_node_group.interface.items_tree["Depth"].identifier
+        height_id = interface_identifiers(pmg_node_group)["Height"]
+        width_id = interface_identifiers(pmg_node_group)["Width"]
+        depth_id = interface_identifiers(pmg_node_group)["Depth"]
 
-        square_placemat_curvature = pmg_node_group.interface.items_tree[
+        square_placemat_curvature = interface_identifiers(pmg_node_group)[
             "Square Placemat Curvature"
-        ].identifier
+        ]
 
         self.layout.label(text="Placemat Characteristics")
         self.layout.prop(
@@ -5105,72 +7493,52 @@ class DRG_PT_chair_characteristics_sub_panel(bpy.types.Panel):
         cg_modifier = context.object.modifiers["Chair Generator"]
         cg_node_group = cg_modifier.node_group
 
-        curved_backrest_id = cg_node_group.interface.items_tree[
-            "Curved Backrest"
-        ].identifier
-        round_seat_id = cg_node_group.interface.items_tree["Round Seat"].identifier
-        round_rail_id = cg_node_group.interface.items_tree["Round Rail"].identifier
+        curved_backrest_id = interface_identifiers(cg_node_group)["Curved Backrest"]
+        round_seat_id = interface_identifiers(cg_node_group)["Round Seat"]
+        round_rail_id = interface_identifiers(cg_node_group)["Round Rail"]
 
-        height_id = cg_node_group.interface.items_tree["Height"].identifier
-        width_id = cg_node_group.interface.items_tree["Width"].identifier
-        depth_id = cg_node_group.interface.items_tree["Depth"].identifier
+        height_id = interface_identifiers(cg_node_group)["Height"]
+        width_id = interface_identifiers(cg_node_group)["Width"]
+        depth_id = interface_identifiers(cg_node_group)["Depth"]
 
-        backrest_angle_id = cg_node_group.interface.items_tree[
-            "Backrest Angle"
-        ].identifier
+        backrest_angle_id = interface_identifiers(cg_node_group)["Backrest Angle"]
 
-        top_rail_height_id = cg_node_group.interface.items_tree[
-            "Top Rail Height"
-        ].identifier
-        top_rail_thickness_id = cg_node_group.interface.items_tree[
+        top_rail_height_id = interface_identifiers(cg_node_group)["Top Rail Height"]
+        top_rail_thickness_id = interface_identifiers(cg_node_group)[
             "Top Rail Thickness"
-        ].identifier
+        ]
 
-        backpost_width_id = cg_node_group.interface.items_tree[
-            "Backpost Width"
-        ].identifier
-        backpost_thickness_id = cg_node_group.interface.items_tree[
+        backpost_width_id = interface_identifiers(cg_node_group)["Backpost Width"]
+        backpost_thickness_id = interface_identifiers(cg_node_group)[
             "Backpost Thickness"
-        ].identifier
+        ]
 
-        amount_of_crossrails_id = cg_node_group.interface.items_tree[
+        amount_of_crossrails_id = interface_identifiers(cg_node_group)[
             "Amount of Crossrails"
-        ].identifier
-        crossrail_height_id = cg_node_group.interface.items_tree[
-            "Crossrail Height"
-        ].identifier
-        crossrail_thickness_id = cg_node_group.interface.items_tree[
+        ]
+        crossrail_height_id = interface_identifiers(cg_node_group)["Crossrail Height"]
+        crossrail_thickness_id = interface_identifiers(cg_node_group)[
             "Crossrail Thickness"
-        ].identifier
-
-        amount_of_slats_id = cg_node_group.interface.items_tree[
-            "Amount of Slats"
-        ].identifier
-        slat_width_id = cg_node_group.interface.items_tree["Slat Width"].identifier
-        slat_thickness_id = cg_node_group.interface.items_tree[
-            "Slat Thickness"
-        ].identifier
-
-        seat_height_id = cg_node_group.interface.items_tree["Seat Height"].identifier
-        seat_thickness_id = cg_node_group.interface.items_tree[
-            "Seat Thickness"
-        ].identifier
-        seat_curvature_id = cg_node_group.interface.items_tree[
-            "Seat Curvature"
-        ].identifier
-
-        seat_rail_reduction_id = cg_node_group.interface.items_tree[
+        ]
+
+        amount_of_slats_id = interface_identifiers(cg_node_group)["Amount of Slats"]
+        slat_width_id = interface_identifiers(cg_node_group)["Slat Width"]
+        slat_thickness_id = interface_identifiers(cg_node_group)["Slat Thickness"]
+
+        seat_height_id = interface_identifiers(cg_node_group)["Seat Height"]
+        seat_thickness_id = interface_identifiers(cg_node_group)["Seat Thickness"]
+        seat_curvature_id = interface_identifiers(cg_node_group)["Seat Curvature"]
+
+        seat_rail_reduction_id = interface_identifiers(cg_node_group)[
             "Seat Rail Reduction"
-        ].identifier
-        seat_rail_thickness_id = cg_node_group.interface.items_tree[
+        ]
+        seat_rail_thickness_id = interface_identifiers(cg_node_group)[
             "Seat Rail Thickness"
-        ].identifier
+        ]
 
-        leg_width_id = cg_node_group.interface.items_tree["Leg Width"].identifier
-        leg_thickness_id = cg_node_group.interface.items_tree[
-            "Leg Thickness"
-        ].identifier
-        leg_angle_id = cg_node_group.interface.items_tree["Leg Angle"].identifier
+        leg_width_id = interface_identifiers(cg_node_group)["Leg Width"]
+        leg_thickness_id = interface_identifiers(cg_node_group)["Leg Thickness"]
+        leg_angle_id = interface_identifiers(cg_node_group)["Leg Angle"]
 
         self.layout.label(text="Chair Characteristics")
         self.layout.prop(
@@ -5243,32 +7611,24 @@ class DRG_PT_table_characteristics_sub_panel(bpy.types.Panel):
         tg_modifier = context.object.modifiers["Table Generator"]
         tg_node_group = tg_modifier.node_group
 
-        round_table_id = tg_node_group.interface.items_tree["Round Table"].identifier
-        round_apron_id = tg_node_group.interface.items_tree["Round Apron"].identifier
+        round_table_id = interface_identifiers(tg_node_group)["Round Table"]
+        round_apron_id = interface_identifiers(tg_node_group)["Round Apron"]
 
-        height_id = tg_node_group.interface.items_tree["Height"].identifier
-        width_id = tg_node_group.interface.items_tree["Width"].identifier
-        depth_id = tg_node_group.interface.items_tree["Depth"].identifier
+        height_id = interface_identifiers(tg_node_group)["Height"]
+        width_id = interface_identifiers(tg_node_group)["Width"]
+        depth_id = interface_identifiers(tg_node_group)["Depth"]
 
-        top_thickness_id = tg_node_group.interface.items_tree[
-            "Top Thickness"
-        ].identifier
-        top_curvature_id = tg_node_group.interface.items_tree[
-            "Top Curvature"
-        ].identifier
+        top_thickness_id = interface_identifiers(tg_node_group)["Top Thickness"]
+        top_curvature_id = interface_identifiers(tg_node_group)["Top Curvature"]
 
-        apron_size_reduction_id = tg_node_group.interface.items_tree[
+        apron_size_reduction_id = interface_identifiers(tg_node_group)[
             "Apron Size Reduction"
-        ].identifier
-        apron_thickness_id = tg_node_group.interface.items_tree[
-            "Apron Thickness"
-        ].identifier
+        ]
+        apron_thickness_id = interface_identifiers(tg_node_group)["Apron Thickness"]
 
-        leg_width_id = tg_node_group.interface.items_tree["Leg Width"].identifier
-        leg_thickness_id = tg_node_group.interface.items_tree[
-            "Leg Thickness"
-        ].identifier
-        leg_angle_id = tg_node_group.interface.items_tree["Leg Angle"].identifier
+        leg_width_id = interface_identifiers(tg_node_group)["Leg Width"]
+        leg_thickness_id = interface_identifiers(tg_node_group)["Leg Thickness"]
+        leg_angle_id = interface_identifiers(tg_node_group)["Leg Angle"]
 
         self.layout.label(text="Table Characteristics")
         self.layout.prop(tg_modifier, f'["{round_table_id}"]', text="Round Table")
@@ -5312,65 +7672,45 @@ class DRG_PT_room_characteristics_sub_panel(bpy.types.Panel):
         rg_modifier = context.object.modifiers["Room Generator"]
         rg_node_group = rg_modifier.node_group
 
-        wall_height_id = rg_node_group.interface.items_tree["Wall Height"].identifier
-        wall_thickness_id = rg_node_group.interface.items_tree[
-            "Wall Thickness"
-        ].identifier
-
-        baseboard_height_id = rg_node_group.interface.items_tree[
-            "Baseboard Height"
-        ].identifier
-        baseboard_width_id = rg_node_group.interface.items_tree[
-            "Baseboard Width"
-        ].identifier
-        table_location_random_seed_id = rg_node_group.interface.items_tree[
+        wall_height_id = interface_identifiers(rg_node_group)["Wall Height"]
+        wall_thickness_id = interface_identifiers(rg_node_group)["Wall Thickness"]
+
+        baseboard_height_id = interface_identifiers(rg_node_group)["Baseboard Height"]
+        baseboard_width_id = interface_identifiers(rg_node_group)["Baseboard Width"]
+        table_location_random_seed_id = interface_identifiers(rg_node_group)[
             "Table Location Random Seed"
-        ].identifier
-
-        amount_of_windows_id = rg_node_group.interface.items_tree[
-            "Amount of Windows"
-        ].identifier
-        window_height_id = rg_node_group.interface.items_tree[
-            "Window Height"
-        ].identifier
-        window_width_id = rg_node_group.interface.items_tree["Window Width"].identifier
-        window_frame_thickness_id = rg_node_group.interface.items_tree[
+        ]
+
+        amount_of_windows_id = interface_identifiers(rg_node_group)["Amount of Windows"]
+        window_height_id = interface_identifiers(rg_node_group)["Window Height"]
+        window_width_id = interface_identifiers(rg_node_group)["Window Width"]
+        window_frame_thickness_id = interface_identifiers(rg_node_group)[
             "Window Frame Thickness"
-        ].identifier
-        window_frame_depth_id = rg_node_group.interface.items_tree[
+        ]
+        window_frame_depth_id = interface_identifiers(rg_node_group)[
             "Window Frame Depth"
-        ].identifier
-        window_thickness_id = rg_node_group.interface.items_tree[
-            "Window Thickness"
-        ].identifier
-        window_depth_id = rg_node_group.interface.items_tree["Window Depth"].identifier
-        glass_thickness_id = rg_node_group.interface.items_tree[
-            "Glass Thickness"
-        ].identifier
-        window_height_pos_id = rg_node_group.interface.items_tree[
+        ]
+        window_thickness_id = interface_identifiers(rg_node_group)["Window Thickness"]
+        window_depth_id = interface_identifiers(rg_node_group)["Window Depth"]
+        glass_thickness_id = interface_identifiers(rg_node_group)["Glass Thickness"]
+        window_height_pos_id = interface_identifiers(rg_node_group)[
             "Window Height Position"
-        ].identifier
-        window_distribution_random_seed = rg_node_group.interface.items_tree[
+        ]
+        window_distribution_random_seed = interface_identifiers(rg_node_group)[
             "Window Distribution Random Seed"
-        ].identifier
-
-        indoor_lighting_id = rg_node_group.interface.items_tree[
-            "Indoor Lighting"
-        ].identifier
-        amount_of_lights_id = rg_node_group.interface.items_tree[
-            "Amount of Lights"
-        ].identifier
-        light_distribution_random_seed_id = rg_node_group.interface.items_tree[
+        ]
+
+        indoor_lighting_id = interface_identifiers(rg_node_group)["Indoor Lighting"]
+        amount_of_lights_id = interface_identifiers(rg_node_group)["Amount of Lights"]
+        light_distribution_random_seed_id = interface_identifiers(rg_node_group)[
             "Window Height Position"
-        ].identifier
+        ]
 
-        table_distributor_object_id = rg_node_group.interface.items_tree[
+        table_distributor_object_id = interface_identifiers(rg_node_group)[
             "Table Distributor Object"
-        ].identifier
+        ]
 
-        camera_object_id = rg_node_group.interface.items_tree[
-            "Camera Object"
-        ].identifier
+        camera_object_id = interface_identifiers(rg_node_group)["Camera Object"]
 
         self.layout.label(text="Room Characteristics")
         self.layout.prop(rg_modifier, f'["{wall_height_id}"]', text="Wall Height")
@@ -5473,18 +7813,18 @@ class DRG_PT_dining_room_distribution_sub_panel(bpy.types.Panel):
             drd_modifier = context.object.modifiers["Dining Room Distributor"]
             drd_node_group = drd_modifier.node_group
 
-            distribution_random_seed_id = drd_node_group.interface.items_tree[
+            distribution_random_seed_id = interface_identifiers(drd_node_group)[
                 "Distribution Random Seed"
-            ].identifier
-            tableware_rotation_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            tableware_rotation_random_seed_id = interface_identifiers(drd_node_group)[
                 "Tableware Rotation Random Seed"
-            ].identifier
-            chair_location_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            chair_location_random_seed_id = interface_identifiers(drd_node_group)[
                 "Chair Location Random Seed"
-            ].identifier
-            chair_rotation_random_seed_id = drd_node_group.interface.items_tree[
+            ]
+            chair_rotation_random_seed_id = interface_identifiers(drd_node_group)[
                 "Chair Rotation Random Seed"
-            ].identifier
+            ]
 
             self.layout.label(text="Dining Room Distribution")
             self.layout.prop(
@@ -5570,9 +7910,78 @@ class DRG_PT_viewport_panel(DRG_viewport_panel, bpy.types.Panel):
         self.layout.prop(context.scene, "render_index", text="Start Image Index")
         self.layout.prop(context.scene, "amount_of_imgs", text="Amount of Images")
         self.layout.prop(context.scene, "datalogger_name", text="Datalogger File Name")
+        self.layout.prop(context.scene, "exposure_mode", text="Exposure")
+        if context.scene.exposure_mode == "NATIVE":
+            self.layout.prop(context.scene, "auto_exposure_key", text="Key Value")
+            self.layout.prop(
+                context.scene, "auto_exposure_resolution", text="Preview Resolution %"
+            )
+            self.layout.prop(
+                context.scene, "auto_exposure_samples", text="Preview Samples"
+            )
+        else:
+            self.layout.prop(
+                context.scene,
+                "scene_ready_stable_time",
+                text="Exposure Stable Time (s)",
+            )
+        self.layout.prop(
+            context.scene, "scene_ready_timeout", text="Scene Ready Timeout (s)"
+        )
+        self.layout.prop(
+            context.scene, "camera_views_per_scene", text="Views per Scene"
+        )
+        self.layout.label(text="Re-randomize every N Images:")
+        for stage in SceneRenderer.variation_stages:
+            self.layout.prop(
+                context.scene, f"variation_rate_{stage}", text=stage.capitalize()
+            )
+        self.layout.prop(context.scene, "use_window_portals", text="Window Portals")
+        self.layout.prop(
+            context.scene, "max_indoor_lights", text="Max Indoor Lights (0 = all)"
+        )
+        self.layout.prop(
+            context.scene, "use_screen_space_lod", text="Screen-Space Level of Detail"
+        )
+        if context.scene.use_screen_space_lod:
+            self.layout.prop(
+                context.scene, "lod_full_detail_size", text="Full Detail Size (px)"
+            )
+        self.layout.prop(context.scene, "use_camera_culling", text="Camera Culling")
+        if context.scene.use_camera_culling:
+            self.layout.prop(context.scene, "camera_cull_margin", text="Cull Margin")
+        self.layout.prop(context.scene, "mask_render_mode", text="Mask Rendering")
+        self.layout.prop(context.scene, "light_path_profile", text="Light Path Profile")
+        self.layout.prop(context.scene, "sky_library_path", text="Sky Library")
+        if context.scene.sky_library_path:
+            self.layout.prop(
+                context.scene, "sky_library_memory_mb", text="Sky Library Memory (MB)"
+            )
+        self.layout.prop(
+            context.scene, "use_persistent_data", text="Persistent Render Data"
+        )
+        self.layout.prop(context.scene, "use_render_budget", text="Render Budget")
+        if context.scene.use_render_budget:
+            self.layout.prop(
+                context.scene, "render_noise_threshold", text="Noise Threshold"
+            )
+            self.layout.prop(context.scene, "render_min_samples", text="Min Samples")
+            self.layout.prop(context.scene, "render_max_samples", text="Max Samples")
+            self.layout.prop(context.scene, "render_time_limit", text="Time Limit (s)")
         self.layout.separator()
+        if DRG_OT_render_job.is_running():
+            stats = DRG_OT_render_job.stats
+            box = self.layout.box()
+            box.label(text=DRG_OT_render_job.status_text, icon="RENDER_STILL")
+            box.label(text=stats.summary())
+            for stage, seconds in stats.mean_stage_times().items():
+                box.label(text=f"Mean {stage} time: {seconds:.1f} s")
+            box.operator(DRG_OT_cancel_render_job.bl_idname, icon="CANCEL")
+            return
+
         # self.layout.operator(DRG_OT_render_scene.bl_idname, text="Render")
         self.layout.operator(DRG_OT_confirm_rendering.bl_idname, text="Render Images")
+        self.layout.operator(DRG_OT_resume_rendering.bl_idname)
         # self.layout.operator(DRG_OT_test.bl_idname)
 
 
@@ -0,0 +1,438 @@
+"""
+Headless batch rendering entry point for the Dining Room Generator.
+
+Usage:
+    blender -b dining_scene_render.blend -P drg_batch.py -- --start 0 --count 5000 --out /data/run1
+
+Pipeline mode, one synthesizer and any amount of renderers sharing a queue folder:
+    blender -b dining_scene_render.blend -P drg_batch.py -- --mode synthesize --queue /data/queue --start 0 --count 5000 --out /data/run1
+    blender -b dining_scene_render.blend -P drg_batch.py -- --mode consume --queue /data/queue --out /data/run1
+
+Light path profile benchmark on 10 fixed scenes:
+    blender -b dining_scene_render.blend -P drg_batch.py -- --mode benchmark --count 10 --seed 1 --out /data/benchmark --max-noise 0.05
+
+Bake the sky library once, then render with it:
+    blender -b dining_scene_render.blend -P drg_batch.py -- --mode bake-sky --sky-library /data/sky
+    blender -b dining_scene_render.blend -P drg_batch.py -- --sky-library /data/sky --start 0 --count 5000 --out /data/run1
+"""
+
+import argparse
+import importlib
+import pathlib
+import sys
+
+import bpy
+
+
+class BatchReporter:
+    """Stand-in for an operator in background mode, report() prints the message"""
+
+    def report(self, type, message):
+        print(f"[{', '.join(sorted(type))}] {message}")
+
+
+def load_addon():
+    """
+    Returns the addon module. Uses the installed addon if it is registered,
+    otherwise imports the package next to this script and registers it.
+    """
+
+    if __package__:
+        return importlib.import_module(".drg_addon", __package__)
+
+    package_dir = pathlib.Path(__file__).resolve().parent
+    if str(package_dir.parent) not in sys.path:
+        sys.path.insert(0, str(package_dir.parent))
+
+    package = importlib.import_module(package_dir.name)
+    if not hasattr(bpy.types.Scene, "render_index"):
+        package.register()
+
+    return package.drg_addon
+
+
+def parse_args(argv):
+    # Blender passes its own arguments, ours follow after "--"
+    argv = argv[argv.index("--") + 1 :] if "--" in argv else []
+
+    parser = argparse.ArgumentParser(
+        prog="drg_batch.py", description="Render a randomized dining room dataset."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["render", "synthesize", "consume", "benchmark", "bake-sky"],
+        default="render",
+        help="render randomizes and renders, synthesize only puts randomized scenes "
+        "into the queue, consume renders the scenes of the queue, benchmark "
+        "compares the light path profiles on --count scenes, bake-sky bakes the "
+        "sky library of --sky-library",
+    )
+    parser.add_argument(
+        "--queue", help="Queue folder of the synthesize and consume modes"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=4,
+        help="Amount of unrendered scenes after which the synthesizer waits",
+    )
+    parser.add_argument(
+        "--cost-model",
+        help="Render time model of drg_render_cost.py, the renderers of the queue "
+        "then claim the queued scene with the highest predicted render time first",
+    )
+    parser.add_argument(
+        "--close-queue",
+        action="store_true",
+        help="Mark the queue as closed after synthesizing, so the renderers exit",
+    )
+    parser.add_argument("--start", type=int, default=0, help="Index of the first image")
+    parser.add_argument(
+        "--count", type=int, default=1, help="Amount of images to render"
+    )
+    parser.add_argument(
+        "--out",
+        help="Export folder for the images and the csv-file. "
+        "In the consume mode, the folder of the synthesizer is used",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Base seed, image i uses seed + i. A random base seed if not set",
+    )
+    parser.add_argument(
+        "--exposure",
+        choices=["native", "photographer"],
+        default="native",
+        help="native computes the exposure from a preview render, "
+        "photographer keeps the exposure of the Photographer addon",
+    )
+    parser.add_argument(
+        "--mask",
+        choices=["full", "flat"],
+        default="full",
+        help="flat renders the ground truth masks with 1 sample, no bounces and "
+        "a box filter, full with the settings of the .blend file",
+    )
+    parser.add_argument(
+        "--persistent-data",
+        action="store_true",
+        help="Keep the Cycles render data between images, only changed data "
+        "blocks are synchronized again. Has no effect in the consume mode, "
+        "which loads a new file per image",
+    )
+    parser.add_argument(
+        "--window-portals",
+        action="store_true",
+        help="Place light portals in front of the windows of every room",
+    )
+    parser.add_argument(
+        "--max-lights",
+        type=int,
+        default=0,
+        help="Light budget: caps the indoor lights of a room, their energy is "
+        "scaled to keep the total flux. 0 keeps all lights",
+    )
+    parser.add_argument(
+        "--screen-space-lod",
+        type=int,
+        nargs="?",
+        const=256,
+        default=0,
+        metavar="PIXELS",
+        help="Select the level of detail of spoon, glass and plates from their "
+        "projected size, full detail from PIXELS (default 256) on",
+    )
+    parser.add_argument(
+        "--camera-culling",
+        type=float,
+        nargs="?",
+        const=0.1,
+        default=None,
+        metavar="MARGIN",
+        help="Exclude distributed objects outside of the camera view from the "
+        "render, MARGIN (default 0.1) is a fraction of the image size",
+    )
+    parser.add_argument(
+        "--light-path-profile",
+        choices=["file", "quality", "balanced", "fast"],
+        default="file",
+        help="Light path settings of the image scene, file keeps the .blend settings",
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=["file", "quality", "balanced", "fast"],
+        default=["file", "quality", "balanced", "fast"],
+        help="Benchmark mode: the compared light path profiles",
+    )
+    parser.add_argument(
+        "--reference-samples",
+        type=int,
+        default=2048,
+        help="Benchmark mode: samples of the reference render of every scene",
+    )
+    parser.add_argument(
+        "--max-noise",
+        type=float,
+        default=None,
+        help="Benchmark mode: highest acceptable relative RMSE, the fastest "
+        "profile below it is reported",
+    )
+    parser.add_argument(
+        "--sky-library",
+        help="Folder of the pre-baked sky library, the environment lighting uses "
+        "its nearest entry instead of the sky texture",
+    )
+    parser.add_argument(
+        "--sky-memory",
+        type=int,
+        default=512,
+        help="Megabytes of sky library images kept loaded",
+    )
+    parser.add_argument(
+        "--sky-grid",
+        nargs="+",
+        default=[],
+        metavar="PARAMETER=STEPS",
+        help="Bake-sky mode: steps of a sky parameter, parameters: sun_elevation, "
+        "air_density, dust_density, ozone_density. E.g. sun_elevation=32",
+    )
+    parser.add_argument(
+        "--sky-resolution",
+        type=int,
+        default=512,
+        help="Bake-sky mode: width of the equirectangular images",
+    )
+    parser.add_argument(
+        "--sky-samples",
+        type=int,
+        default=16,
+        help="Bake-sky mode: samples per image",
+    )
+    parser.add_argument(
+        "--noise-threshold",
+        type=float,
+        default=None,
+        help="Enables the render budget with this adaptive sampling noise threshold",
+    )
+    parser.add_argument(
+        "--min-samples", type=int, default=0, help="Render budget: minimum samples"
+    )
+    parser.add_argument(
+        "--max-samples", type=int, default=1024, help="Render budget: maximum samples"
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=0.0,
+        help="Render budget: seconds per image, 0 disables the limit",
+    )
+    parser.add_argument(
+        "--views",
+        type=int,
+        default=1,
+        help="Camera views per randomized scene, each view is an image with its "
+        "own index",
+    )
+    parser.add_argument(
+        "--variation-rates",
+        nargs="+",
+        default=[],
+        metavar="STAGE=N",
+        help="Re-randomize a stage only every N images, stages: room, furniture, "
+        "materials, lighting, tableware, camera. E.g. room=50 furniture=10",
+    )
+    parser.add_argument(
+        "--keyframe-block",
+        type=int,
+        default=1,
+        help="Render mode: scenes per animation render. The scenes of a block are "
+        "written as keyframes on consecutive frames and share room, chair and table",
+    )
+    parser.add_argument(
+        "--logger-name",
+        default=None,
+        help="Name of the csv-file without extension",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the interrupted session of --out and --logger-name with its "
+        "planned seeds, --start, --count and --seed are taken from the session",
+    )
+
+    args = parser.parse_args(argv)
+    if args.mode in ("synthesize", "consume") and not args.queue:
+        parser.error(f"--queue is required in the {args.mode} mode")
+    if args.mode not in ("consume", "bake-sky") and not args.out:
+        parser.error(f"--out is required in the {args.mode} mode")
+    if args.mode == "bake-sky" and not args.sky_library:
+        parser.error("--sky-library is required in the bake-sky mode")
+    if args.views < 1:
+        parser.error("--views must be at least 1")
+    if args.seed is not None and not (
+        # np.random.seed only accepts seeds up to 2**32 - 1
+        0 <= args.seed
+        and args.seed + args.start + args.count - 1 <= 2**32 - 1
+    ):
+        parser.error(
+            "--seed must be at least 0 and seed + start + count - 1 at most 2**32 - 1"
+        )
+    variation_rates = {}
+    for variation_rate in args.variation_rates:
+        stage, _, rate = variation_rate.partition("=")
+        if not rate.isdigit() or int(rate) < 1:
+            parser.error(f"Invalid variation rate {variation_rate}, expected STAGE=N")
+        variation_rates[stage] = int(rate)
+    args.variation_rates = variation_rates
+    if args.keyframe_block < 1:
+        parser.error("--keyframe-block must be at least 1")
+    if args.keyframe_block > 1 and args.mode != "render":
+        parser.error("--keyframe-block is only supported in the render mode")
+
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    drg_addon = load_addon()
+
+    drg_dataset = importlib.import_module(".drg_dataset", drg_addon.__package__)
+
+    if args.mode == "bake-sky":
+        drg_sky_library = importlib.import_module(
+            ".drg_sky_library", drg_addon.__package__
+        )
+        try:
+            grid = drg_sky_library.parse_grid_steps(args.sky_grid)
+        except ValueError as error:
+            sys.exit(str(error))
+        sky_library_index = drg_addon.SkyLibrary().bake(
+            library_path=pathlib.Path(args.sky_library).resolve(),
+            grid=grid,
+            resolution=args.sky_resolution,
+            samples=args.sky_samples,
+        )
+        print(f"Sky library has {len(sky_library_index.entries)} entries")
+        return
+
+    if args.mode == "consume":
+        # Export folder, exposure mode etc. are part of every snapshot
+        drg_addon.SceneRenderer().consume_batch(
+            operator=BatchReporter(),
+            scene_queue=drg_dataset.SceneQueue(args.queue),
+            logger_name=args.logger_name,
+        )
+        return
+
+    out_path = pathlib.Path(args.out).resolve()
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    scene = bpy.context.scene
+    scene.render_filepath = str(out_path)
+    scene.render_index = args.start
+    scene.amount_of_imgs = args.count
+    scene.exposure_mode = args.exposure.upper()
+    scene.mask_render_mode = args.mask.upper()
+    scene.light_path_profile = args.light_path_profile.upper()
+    scene.use_window_portals = args.window_portals
+    scene.sky_library_path = (
+        str(pathlib.Path(args.sky_library).resolve()) if args.sky_library else ""
+    )
+    scene.sky_library_memory_mb = args.sky_memory
+    scene.max_indoor_lights = args.max_lights
+    scene.use_camera_culling = args.camera_culling is not None
+    if scene.use_camera_culling:
+        scene.camera_cull_margin = args.camera_culling
+    scene.use_screen_space_lod = args.screen_space_lod > 0
+    if scene.use_screen_space_lod:
+        scene.lod_full_detail_size = args.screen_space_lod
+    scene.camera_views_per_scene = args.views
+    for stage, rate in args.variation_rates.items():
+        if stage not in drg_addon.SceneRenderer.variation_stages:
+            raise ValueError(f"Unknown stage {stage} of --variation-rates")
+        setattr(scene, f"variation_rate_{stage}", rate)
+    scene.use_persistent_data = args.persistent_data
+    scene.use_render_budget = args.noise_threshold is not None
+    if scene.use_render_budget:
+        scene.render_noise_threshold = args.noise_threshold
+        scene.render_min_samples = args.min_samples
+        scene.render_max_samples = args.max_samples
+        scene.render_time_limit = args.time_limit
+    if args.logger_name:
+        scene.datalogger_name = args.logger_name
+
+    if args.mode == "benchmark":
+        # Fixed seeds, so that the benchmarks are comparable
+        base_seed = 1 if args.seed is None else args.seed
+        results = drg_addon.SceneRenderer().benchmark_light_path_profiles(
+            operator=BatchReporter(),
+            context=bpy.context,
+            seeds=[
+                base_seed + index
+                for index in range(args.start, args.start + args.count)
+            ],
+            profile_names=[profile.upper() for profile in args.profiles],
+            reference_samples=args.reference_samples,
+        )
+        summary, fastest_acceptable_profile = drg_dataset.summarize_profile_benchmark(
+            results, max_noise=args.max_noise
+        )
+        for profile_summary in summary:
+            print(
+                f"{profile_summary['profile']}: {profile_summary['render_time']:.1f} s, "
+                f"relative RMSE {profile_summary['relative_rmse']:.4f}"
+            )
+        if args.max_noise is not None:
+            print(f"Fastest acceptable profile: {fastest_acceptable_profile}")
+        return
+
+    session = None
+    if args.resume:
+        session = drg_dataset.RenderSession.load(out_path, scene.datalogger_name)
+    if session is None:
+        session = drg_dataset.RenderSession.create(
+            out_path, scene.datalogger_name, args.start, args.count, args.seed
+        )
+    else:
+        print(
+            f"Resuming session with {len(session.incomplete_indices())} "
+            "incomplete images"
+        )
+
+    if args.mode == "render" and args.keyframe_block > 1:
+        drg_addon.SceneRenderer().render_keyframed_batch(
+            operator=BatchReporter(),
+            context=bpy.context,
+            session=session,
+            block_size=args.keyframe_block,
+        )
+        return
+    if args.mode == "render":
+        drg_addon.SceneRenderer().render_batch(
+            operator=BatchReporter(), context=bpy.context, session=session
+        )
+        return
+
+    render_time_model = None
+    if args.cost_model:
+        drg_render_cost = importlib.import_module(
+            ".drg_render_cost", drg_addon.__package__
+        )
+        render_time_model = drg_render_cost.RenderTimeModel.load(args.cost_model)
+
+    scene_queue = drg_dataset.SceneQueue(args.queue, max_size=args.max_queue)
+    drg_addon.SceneRenderer().synthesize_batch(
+        operator=BatchReporter(),
+        context=bpy.context,
+        scene_queue=scene_queue,
+        session=session,
+        render_time_model=render_time_model,
+    )
+    if args.close_queue:
+        scene_queue.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,559 @@
+"""
+Dataset bookkeeping shared between the Blender workers and the launcher.
+
+This module must not import bpy, it is also used by plain Python processes.
+"""
+
+import csv
+import datetime
+import json
+import os
+import pathlib
+import random
+import time
+
+DEFAULT_LOGGER_NAME = "dining_room_dataset_logger"
+# Base seeds are drawn below this bound, so that base seed + index still fits
+# the 32 bit seed of np.random.seed
+MAX_BASE_SEED = 2**31
+
+
+def random_base_seed():
+    """
+    Draws the base seed of a run without a given seed. It is drawn from the
+    operating system, so runs and shards started at the same time differ.
+
+    Returns:
+    - base_seed (int): seed in [1, MAX_BASE_SEED)
+    """
+
+    return random.SystemRandom().randrange(1, MAX_BASE_SEED)
+
+
+def split_index_range(start_idx, amount_of_imgs, amount_of_shards):
+    """
+    Splits the image indices into disjoint, contiguous slices
+
+    Args:
+    - start_idx (int): index of the first image
+    - amount_of_imgs (int): amount of images of the whole run
+    - amount_of_shards (int): amount of slices to create
+
+    Returns:
+    - slices (list): (start_idx, amount_of_imgs) per slice, empty slices are dropped
+    """
+
+    base, remainder = divmod(amount_of_imgs, amount_of_shards)
+    slices = []
+    curr_idx = start_idx
+    for i in range(amount_of_shards):
+        size = base + (1 if i < remainder else 0)
+        if size > 0:
+            slices.append((curr_idx, size))
+        curr_idx += size
+
+    return slices
+
+
+def shard_logger_name(logger_name, start_idx, amount_of_imgs):
+    """
+    Returns the csv-file name of the shard owning the given index slice.
+    The name contains the slice, so shards of different machines never collide.
+    """
+
+    return f"{logger_name}_shard_{start_idx}-{start_idx + amount_of_imgs - 1}"
+
+
+def view_scene_index(index, views_per_scene):
+    """
+    The images of views_per_scene consecutive indices, starting at a multiple
+    of views_per_scene, are camera views of the same scene. Independent of the
+    start of a session, so workers of a split run build the same scenes.
+
+    Returns:
+    - scene_index (int): index of the first view of the scene
+    """
+
+    return index - index % views_per_scene
+
+
+def read_csv_rows(csv_path):
+    with open(csv_path, "r", newline="") as csvfile:
+        reader = csv.DictReader(csvfile)
+        return reader.fieldnames or [], list(reader)
+
+
+def merge_csv_shards(folder_path, logger_name, remove_shards=False):
+    """
+    Merges all shard csv-files of a run into the canonical csv-file sorted by index.
+    Rows of an already existing canonical csv-file are kept, rows with the same
+    index are replaced by the shard row.
+
+    Args:
+    - folder_path (str): export folder containing the shard csv-files
+    - logger_name (str): name of the canonical csv-file without extension
+    - remove_shards (bool): delete the shard csv-files after merging
+
+    Returns:
+    - amount_of_rows (int): amount of rows in the merged csv-file
+    """
+
+    folder_path = pathlib.Path(folder_path)
+    canonical_path = folder_path / f"{logger_name}.csv"
+    shard_paths = sorted(folder_path.glob(f"{logger_name}_shard_*.csv"))
+
+    fieldnames = []
+    rows_by_index = {}
+
+    csv_paths = [canonical_path] if canonical_path.exists() else []
+    csv_paths.extend(shard_paths)
+
+    if not csv_paths:
+        return 0
+
+    for csv_path in csv_paths:
+        csv_fieldnames, rows = read_csv_rows(csv_path)
+        for fieldname in csv_fieldnames:
+            if fieldname not in fieldnames:
+                fieldnames.append(fieldname)
+        for row in rows:
+            rows_by_index[int(row["index"])] = row
+
+    with open(canonical_path, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for index in sorted(rows_by_index):
+            writer.writerow(rows_by_index[index])
+
+    if remove_shards:
+        for shard_path in shard_paths:
+            shard_path.unlink()
+
+    return len(rows_by_index)
+
+
+class SceneQueue:
+    """
+    Bounded queue of randomized scene snapshots in a folder, shared by one or
+    more synthesizer processes and one or more renderer processes.
+
+    A snapshot consists of scene_{index}.blend and the sidecar scene_{index}.json,
+    which is written last and marks the snapshot as complete. Renderers claim a
+    snapshot by renaming its sidecar, which is atomic, so every snapshot is
+    rendered exactly once. The file CLOSED marks that no more snapshots follow.
+    """
+
+    closed_marker_name = "CLOSED"
+
+    def __init__(self, folder_path, max_size=4, poll_interval=1.0):
+        self.folder_path = pathlib.Path(folder_path)
+        self.folder_path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.poll_interval = poll_interval
+
+    def pending(self):
+        """
+        Returns:
+        - sidecar_paths (list): sidecars of the complete, unclaimed snapshots
+        """
+
+        return sorted(self.folder_path.glob("scene_*.json"))
+
+    def wait_for_space(self):
+        """Blocks until the queue holds less than max_size unclaimed snapshots"""
+
+        while len(self.pending()) >= self.max_size:
+            time.sleep(self.poll_interval)
+
+    def put(self, index, snapshot, save_blend):
+        """
+        Adds a snapshot to the queue
+
+        Args:
+        - index (int): index of the image
+        - snapshot (dict): JSON serializable data that is passed to the renderer
+        - save_blend (Callable[[str], None]): Saves the scene to the given .blend path
+        """
+
+        blend_path = self.folder_path / f"scene_{index}.blend"
+        sidecar_path = self.folder_path / f"scene_{index}.json"
+        partial_sidecar_path = self.folder_path / f"scene_{index}.json.partial"
+
+        save_blend(str(blend_path))
+
+        with open(partial_sidecar_path, "w") as sidecar_file:
+            json.dump(dict(snapshot, index=index), sidecar_file)
+        os.replace(partial_sidecar_path, sidecar_path)
+
+    def pending_by_cost(self):
+        """
+        Returns:
+        - sidecar_paths (list): sidecars of the unclaimed snapshots, the snapshot
+            with the highest predicted_render_time first
+        """
+
+        costs = {}
+        for sidecar_path in self.pending():
+            try:
+                with open(sidecar_path, "r") as sidecar_file:
+                    costs[sidecar_path] = json.load(sidecar_file).get(
+                        "predicted_render_time", 0.0
+                    )
+            except FileNotFoundError:
+                # Claimed by another renderer in the meantime
+                continue
+
+        return sorted(costs, key=lambda sidecar_path: -costs[sidecar_path])
+
+    def claim(self):
+        """
+        Claims the unclaimed snapshot with the highest predicted render time,
+        so expensive scenes do not end up as stragglers at the end of a run
+
+        Returns:
+        - snapshot (dict): The snapshot data with the additional keys
+            blend_path and sidecar_path, None if the queue is empty
+        """
+
+        for sidecar_path in self.pending_by_cost():
+            claimed_path = sidecar_path.with_name(
+                f"{sidecar_path.name}.claimed_{os.getpid()}"
+            )
+            try:
+                os.rename(sidecar_path, claimed_path)
+            except FileNotFoundError:
+                # Another renderer was faster
+                continue
+
+            with open(claimed_path, "r") as sidecar_file:
+                snapshot = json.load(sidecar_file)
+            snapshot["blend_path"] = str(
+                self.folder_path / f"scene_{snapshot['index']}.blend"
+            )
+            snapshot["sidecar_path"] = str(claimed_path)
+
+            return snapshot
+
+        return None
+
+    def task_done(self, snapshot):
+        """Removes the files of a rendered snapshot"""
+
+        for path in (snapshot["blend_path"], snapshot["sidecar_path"]):
+            pathlib.Path(path).unlink(missing_ok=True)
+
+    def close(self):
+        """Marks that no more snapshots will be added"""
+
+        (self.folder_path / self.closed_marker_name).touch()
+
+    def reset(self):
+        """
+        Removes the close marker and the snapshots left over by a previous,
+        possibly interrupted run using the same folder
+        """
+
+        (self.folder_path / self.closed_marker_name).unlink(missing_ok=True)
+        for path in self.folder_path.glob("scene_*"):
+            path.unlink()
+
+    def is_closed(self):
+        return (self.folder_path / self.closed_marker_name).exists()
+
+
+class RenderSession:
+    """
+    Checkpoint manifest of a render session, stored next to the csv-file as
+    {logger_name}_session.json. It contains the planned seed of every index and
+    whether the image, the ground truth and the csv row of an index exist, so an
+    interrupted session can be resumed without re-rendering finished images.
+    """
+
+    status_keys = ("img", "gt", "log")
+
+    def __init__(self, manifest_path, manifest):
+        self.manifest_path = pathlib.Path(manifest_path)
+        self.manifest = manifest
+
+    @staticmethod
+    def get_manifest_path(folder_path, logger_name):
+        return pathlib.Path(folder_path) / f"{logger_name}_session.json"
+
+    @classmethod
+    def create(
+        cls, folder_path, logger_name, start_idx, amount_of_imgs, base_seed=None
+    ):
+        """
+        Plans a new session and writes its manifest, an existing manifest is replaced
+
+        Args:
+        - folder_path (str): export folder of the session
+        - logger_name (str): name of the csv-file without extension
+        - start_idx (int): index of the first image
+        - amount_of_imgs (int): amount of images of the session
+        - base_seed (int, optional): Image i uses the seed base_seed + i. If
+            not set, a random base seed is drawn and stored in the manifest
+        """
+
+        if base_seed is None:
+            base_seed = random_base_seed()
+        first_seed = base_seed + start_idx
+        session = cls(
+            cls.get_manifest_path(folder_path, logger_name),
+            {
+                "logger_name": logger_name,
+                "start_idx": start_idx,
+                "amount_of_imgs": amount_of_imgs,
+                "base_seed": base_seed,
+                "seeds": [first_seed + i for i in range(amount_of_imgs)],
+                "status": {},
+            },
+        )
+        session.save()
+
+        return session
+
+    @classmethod
+    def load(cls, folder_path, logger_name):
+        """
+        Returns:
+        - session (RenderSession): The session of the manifest, None if there is none
+        """
+
+        manifest_path = cls.get_manifest_path(folder_path, logger_name)
+        if not manifest_path.exists():
+            return None
+
+        with open(manifest_path, "r") as manifest_file:
+            session = cls(manifest_path, json.load(manifest_file))
+        session.reconcile()
+
+        return session
+
+    def save(self):
+        # Written to a temporary file first, a crash never leaves a broken manifest
+        partial_path = self.manifest_path.with_name(
+            f"{self.manifest_path.name}.partial"
+        )
+        with open(partial_path, "w") as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        os.replace(partial_path, self.manifest_path)
+
+    @property
+    def start_idx(self):
+        return self.manifest["start_idx"]
+
+    @property
+    def amount_of_imgs(self):
+        return self.manifest["amount_of_imgs"]
+
+    def indices(self):
+        return range(self.start_idx, self.start_idx + self.amount_of_imgs)
+
+    def seed(self, index):
+        return self.manifest["seeds"][index - self.start_idx]
+
+    def scene_seed(self, index, views_per_scene):
+        """
+        Returns:
+        - seed (int): The seed of the scene that the image of index is a view
+            of, see view_scene_index. Seeds are consecutive, so the scene seed
+            is the same in every session containing one of its views.
+        """
+
+        return self.seed(index) - (index - view_scene_index(index, views_per_scene))
+
+    def status(self, index):
+        status = self.manifest["status"].get(str(index), {})
+        return {key: status.get(key, False) for key in self.status_keys}
+
+    def is_complete(self, index):
+        return all(self.status(index).values())
+
+    def incomplete_indices(self):
+        return [index for index in self.indices() if not self.is_complete(index)]
+
+    def next_incomplete_index(self, after=None):
+        """
+        Returns:
+        - index (int): The first incomplete index greater than after,
+            None if the session is finished
+        """
+
+        for index in self.indices():
+            if (after is None or index > after) and not self.is_complete(index):
+                return index
+
+        return None
+
+    def find_output_files(self, index, output_name):
+        """Returns the files of the File Output slot output_name ("img" or "gt")"""
+
+        folder_path = self.manifest_path.parent
+        return list(folder_path.glob(f"{index}_{self.seed(index)}_{output_name}*"))
+
+    def update(self, index, log=None):
+        """
+        Records the status of an index, the image and ground truth status is read
+        from the export folder. The manifest is saved afterwards.
+
+        Args:
+        - index (int): index of the image
+        - log (bool, optional): True if the csv row was written, keeps the
+            recorded status if not given
+        """
+
+        status = self.status(index)
+        status["img"] = bool(self.find_output_files(index, "img"))
+        status["gt"] = bool(self.find_output_files(index, "gt"))
+        if log is not None:
+            status["log"] = log
+        self.manifest["status"][str(index)] = status
+        self.save()
+
+    def reconcile(self):
+        """
+        Brings the manifest in sync with the export folder, e.g. after a crash
+        between writing the images and saving the manifest
+        """
+
+        folder_path = self.manifest_path.parent
+
+        # File Output names are {index}_{seed}_{output_name}{frame}.{extension}
+        output_files = set()
+        for path in folder_path.iterdir():
+            name_parts = path.name.split("_", 2)
+            if len(name_parts) == 3:
+                for output_name in ("img", "gt"):
+                    if name_parts[2].startswith(output_name):
+                        output_files.add((name_parts[0], name_parts[1], output_name))
+
+        # Renderers of the pipeline mode log into shards of the session csv-file
+        logger_name = self.manifest["logger_name"]
+        csv_paths = list(folder_path.glob(f"{logger_name}_shard_*.csv"))
+        if (folder_path / f"{logger_name}.csv").exists():
+            csv_paths.append(folder_path / f"{logger_name}.csv")
+
+        logged_indices = set()
+        for csv_path in csv_paths:
+            _, rows = read_csv_rows(csv_path)
+            logged_indices.update(int(row["index"]) for row in rows)
+
+        for index in self.indices():
+            status = self.status(index)
+            for output_name in ("img", "gt"):
+                status[output_name] = (
+                    str(index),
+                    str(self.seed(index)),
+                    output_name,
+                ) in output_files
+            status["log"] = status["log"] or index in logged_indices
+            self.manifest["status"][str(index)] = status
+        self.save()
+
+
+def format_duration(seconds):
+    return str(datetime.timedelta(seconds=int(seconds)))
+
+
+class RenderJobStats:
+    """Live throughput, mean time per stage and ETA of a running render job"""
+
+    def __init__(self, amount_of_imgs):
+        self.amount_of_imgs = amount_of_imgs
+        self.amount_of_done_imgs = 0
+        self.start_time = time.time()
+        self.stage_time_sums = {}
+        self.stage_time_counts = {}
+
+    def add_stage_time(self, stage, seconds):
+        self.stage_time_sums[stage] = self.stage_time_sums.get(stage, 0) + seconds
+        self.stage_time_counts[stage] = self.stage_time_counts.get(stage, 0) + 1
+
+    def mean_stage_times(self):
+        return {
+            stage: self.stage_time_sums[stage] / self.stage_time_counts[stage]
+            for stage in self.stage_time_sums
+        }
+
+    def image_done(self):
+        self.amount_of_done_imgs += 1
+
+    def images_per_hour(self):
+        elapsed_time = time.time() - self.start_time
+        if not self.amount_of_done_imgs or elapsed_time <= 0:
+            return 0.0
+
+        return self.amount_of_done_imgs / elapsed_time * 3600
+
+    def eta(self):
+        """
+        Returns:
+        - eta (float): Estimated seconds until the job is finished,
+            None until the first image is done
+        """
+
+        images_per_hour = self.images_per_hour()
+        if not images_per_hour:
+            return None
+
+        return (self.amount_of_imgs - self.amount_of_done_imgs) / images_per_hour * 3600
+
+    def summary(self):
+        eta = self.eta()
+        return (
+            f"{self.amount_of_done_imgs}/{self.amount_of_imgs} images, "
+            f"{self.images_per_hour():.1f} images/h, "
+            f"ETA {format_duration(eta) if eta is not None else '-'}"
+        )
+
+    def stage_summary(self):
+        return ", ".join(
+            f"{stage} {seconds:.1f} s"
+            for stage, seconds in self.mean_stage_times().items()
+        )
+
+
+def summarize_profile_benchmark(results, max_noise=None):
+    """
+    Averages the results of a light path profile benchmark per profile
+
+    Args:
+    - results (list): dicts with profile, render_time and relative_rmse
+    - max_noise (float, optional): highest acceptable mean relative_rmse
+
+    Returns:
+    - summary (list): dicts with profile, render_time, relative_rmse and
+        amount_of_scenes, the fastest profile first
+    - fastest_acceptable_profile (str): fastest profile whose mean noise is at
+        most max_noise, None if there is none or max_noise is not given
+    """
+
+    profile_results = {}
+    for result in results:
+        profile_results.setdefault(result["profile"], []).append(result)
+
+    summary = [
+        {
+            "profile": profile,
+            "render_time": sum(result["render_time"] for result in rows) / len(rows),
+            "relative_rmse": sum(result["relative_rmse"] for result in rows)
+            / len(rows),
+            "amount_of_scenes": len(rows),
+        }
+        for profile, rows in profile_results.items()
+    ]
+    summary.sort(key=lambda profile_summary: profile_summary["render_time"])
+
+    fastest_acceptable_profile = None
+    if max_noise is not None:
+        fastest_acceptable_profile = next(
+            (
+                profile_summary["profile"]
+                for profile_summary in summary
+                if profile_summary["relative_rmse"] <= max_noise
+            ),
+            None,
+        )
+
+    return summary, fastest_acceptable_profile
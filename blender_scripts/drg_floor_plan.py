@@ -0,0 +1,411 @@
+"""
+Random floor plans of the procedural room, computed on plain arrays.
+
+This module must not import bpy, it is also used by plain Python processes.
+
+A floor plan is a flat polygon mesh in the xy-plane: a rectangular base room,
+which is cut into several faces, and rectangular extrusions along its
+boundary edges. Blender only creates the final mesh from the vertices and
+faces of the plan.
+"""
+
+import random
+
+import numpy as np
+
+# Distance from the cutting plane below which a vertex counts as on the plane,
+# the dist of the former bmesh.ops.bisect_plane
+BISECT_DISTANCE = 0.01
+# Vertices closer than this are merged, the threshold of bpy.ops.mesh.remove_doubles
+MERGE_DISTANCE = 1e-4
+
+
+class FloorPlan:
+    """
+    Vertices and faces of a flat floor mesh
+
+    Args:
+    - vertices (np.ndarray): (N, 2) xy coordinates
+    - faces (list): vertex index loops, counterclockwise seen from above
+    """
+
+    def __init__(self, vertices, faces):
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.faces = [list(face) for face in faces]
+
+    @classmethod
+    def rectangle(cls, length_x, length_y):
+        half_x, half_y = length_x * 0.5, length_y * 0.5
+        return cls(
+            [
+                (-half_x, -half_y),
+                (half_x, -half_y),
+                (half_x, half_y),
+                (-half_x, half_y),
+            ],
+            [[0, 1, 2, 3]],
+        )
+
+    def face_areas(self):
+        areas = []
+        for face in self.faces:
+            x, y = self.vertices[face].T
+            areas.append(
+                0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+            )
+
+        return np.array(areas)
+
+    def face_bounds(self):
+        """
+        Returns:
+        - (face_min, face_max) (np.ndarray, np.ndarray): (M, 2) axis aligned
+            bounding boxes of all faces
+        """
+
+        face_min = np.array([self.vertices[face].min(axis=0) for face in self.faces])
+        face_max = np.array([self.vertices[face].max(axis=0) for face in self.faces])
+
+        return face_min, face_max
+
+    def edges(self):
+        """
+        Yields:
+        - (a, b): every edge of every face in the direction of the face loop
+        """
+
+        for face in self.faces:
+            yield from zip(face, face[1:] + face[:1])
+
+    def boundary_edges(self):
+        """
+        Returns:
+        - boundary_edges (list): (a, b) of all edges used by only one face, in
+            the direction of their face loop
+        """
+
+        edge_users = {}
+        for a, b in self.edges():
+            edge_users.setdefault(frozenset((a, b)), []).append((a, b))
+
+        return [users[0] for users in edge_users.values() if len(users) == 1]
+
+    def edge_lengths(self, edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        return np.linalg.norm(
+            self.vertices[edges[:, 0]] - self.vertices[edges[:, 1]], axis=1
+        )
+
+    def bisect(self, axis, coordinate, face_index, dist=BISECT_DISTANCE):
+        """
+        Cuts the mesh with the line axis = coordinate. Every edge crossing the
+        line gets a vertex on it, only the given face is split into two.
+
+        Args:
+        - axis (int): 0 cuts along x = coordinate, 1 along y = coordinate
+        - coordinate (float): position of the cutting line
+        - face_index (int): index of the face to split
+        - dist (float): vertices closer to the line count as on the line
+        """
+
+        offsets = self.vertices[:, axis] - coordinate
+        sides = np.where(offsets > dist, 1, np.where(offsets < -dist, -1, 0))
+
+        # one new vertex for every edge, whose vertices are on different sides
+        edge_vertices = {}
+        new_vertices = []
+        for a, b in self.edges():
+            edge_key = frozenset((a, b))
+            if sides[a] * sides[b] < 0 and edge_key not in edge_vertices:
+                edge_vertices[edge_key] = len(self.vertices) + len(new_vertices)
+                factor = offsets[a] / (offsets[a] - offsets[b])
+                new_vertex = self.vertices[a] + factor * (
+                    self.vertices[b] - self.vertices[a]
+                )
+                new_vertex[axis] = coordinate
+                new_vertices.append(new_vertex)
+
+        if new_vertices:
+            self.vertices = np.vstack([self.vertices, new_vertices])
+            sides = np.concatenate([sides, np.zeros(len(new_vertices), dtype=int)])
+
+        # insert the new vertices into all faces sharing the split edges
+        for i, face in enumerate(self.faces):
+            new_face = []
+            for a, b in zip(face, face[1:] + face[:1]):
+                new_face.append(a)
+                if frozenset((a, b)) in edge_vertices:
+                    new_face.append(edge_vertices[frozenset((a, b))])
+            self.faces[i] = new_face
+
+        face = self.faces[face_index]
+        face_sides = sides[face]
+        on_line = np.flatnonzero(face_sides == 0)
+        if (face_sides > 0).any() and (face_sides < 0).any() and len(on_line) == 2:
+            start, end = on_line
+            self.faces[face_index] = face[start : end + 1]
+            self.faces.append(face[end:] + face[: start + 1])
+
+    def overlaps_faces(self, box_min, box_max):
+        """
+        Checks if a bounding box overlaps the bounding box of any face,
+        touching edges are no overlap
+
+        Args:
+        - box_min (np.ndarray): (2,) minimum of the bounding box
+        - box_max (np.ndarray): (2,) maximum of the bounding box
+
+        Returns:
+        - overlap (bool): True if any face is overlapped
+        """
+
+        face_min, face_max = self.face_bounds()
+        return bool(((face_max > box_min) & (box_max > face_min)).all(axis=1).any())
+
+    def extrude_edge(self, edge, shift):
+        """
+        Adds a face between a boundary edge and its copy moved by shift
+
+        Args:
+        - edge (tuple): (a, b) in the direction of its face loop
+        - shift (np.ndarray): (2,) translation of the copied edge
+        """
+
+        a, b = edge
+        shifted_a, shifted_b = len(self.vertices), len(self.vertices) + 1
+        self.vertices = np.vstack(
+            [self.vertices, self.vertices[[a, b]] + np.asarray(shift)]
+        )
+        # the new face runs along the edge in the opposite direction of the
+        # existing face, so both have the same winding
+        self.faces.append([a, shifted_a, shifted_b, b])
+
+    def merge_doubles(self, threshold=MERGE_DISTANCE):
+        """
+        Merges vertices closer than threshold into the one with the lowest
+        index and removes unused vertices
+        """
+
+        distances = np.linalg.norm(
+            self.vertices[:, None, :] - self.vertices[None, :, :], axis=2
+        )
+        # argmax returns the first, lowest index, every vertex is close to itself
+        targets = (distances < threshold).argmax(axis=1)
+        used_vertices, new_indices = np.unique(targets, return_inverse=True)
+
+        faces = []
+        for face in self.faces:
+            new_face = []
+            for vertex in new_indices[face].tolist():
+                if not new_face or new_face[-1] != vertex:
+                    new_face.append(vertex)
+            if len(new_face) > 1 and new_face[0] == new_face[-1]:
+                new_face.pop()
+            if len(new_face) >= 3:
+                faces.append(new_face)
+
+        self.vertices = self.vertices[used_vertices]
+        self.faces = faces
+
+    def inward_normal(self, point, direction=None):
+        """
+        Finds the boundary edge closest to a point, e.g. the wall of a window,
+        and returns its normal pointing into the floor. Unlike the direction to
+        the center of the floor, it also holds for the walls of L- and
+        T-shaped floor plans.
+
+        Args:
+        - point (np.ndarray): (2,) xy coordinates
+        - direction (np.ndarray, optional): (2,) only edges roughly orthogonal
+            to it are used, if there are any
+
+        Returns:
+        - inward_normal (np.ndarray): (2,) unit normal, None without boundary edges
+        """
+
+        boundary_edges = np.array(self.boundary_edges(), dtype=np.int64)
+        if len(boundary_edges) == 0:
+            return None
+
+        starts = self.vertices[boundary_edges[:, 0]]
+        edge_directions = self.vertices[boundary_edges[:, 1]] - starts
+        edge_lengths = np.maximum(np.linalg.norm(edge_directions, axis=1), 1e-12)
+        # The faces are counterclockwise, the floor is left of every boundary edge
+        inward_normals = (
+            np.stack([-edge_directions[:, 1], edge_directions[:, 0]], axis=1)
+            / edge_lengths[:, None]
+        )
+
+        factors = np.clip(
+            ((point - starts) * edge_directions).sum(axis=1) / edge_lengths**2,
+            0.0,
+            1.0,
+        )
+        distances = np.linalg.norm(
+            starts + factors[:, None] * edge_directions - point, axis=1
+        )
+        if direction is not None:
+            orthogonal = np.abs(inward_normals @ direction) > 0.5
+            if orthogonal.any():
+                distances[~orthogonal] = np.inf
+
+        return inward_normals[np.argmin(distances)]
+
+    def mesh_data(self):
+        """
+        Returns:
+        - vertices (np.ndarray): (N, 3) coordinates at z = 0
+        - faces (list): vertex index loops
+        """
+
+        vertices = np.zeros((len(self.vertices), 3))
+        vertices[:, :2] = self.vertices
+
+        return vertices, self.faces
+
+
+def floor_area_sequence(used_floor_area, amount_of_extrusions):
+    """
+    Splits the floor area over the base room and its extrusions. The base room
+    gets 60% - 80%, after that the size depends on the amount of left floor.
+
+    Returns:
+    - used_floor_areas (list): area of the base room and of every extrusion
+    """
+
+    if amount_of_extrusions > 1:
+        size_sequence = []
+        running_sum = 0.0
+        start_minimum = 0.0
+        for i in range(amount_of_extrusions - 1):
+            if i == 0:
+                size_sequence.append(random.uniform(0.6, 0.8))
+                start_minimum = (1.0 - size_sequence[-1]) / amount_of_extrusions
+            else:
+                if start_minimum < 1.0 - running_sum:
+                    size_sequence.append(
+                        random.uniform(start_minimum, 1.0 - running_sum)
+                    )
+                else:
+                    break
+            running_sum += size_sequence[-1]
+        if 1.0 - running_sum > 1e-7:
+            size_sequence.append(1.0 - running_sum)
+        if amount_of_extrusions != len(size_sequence):
+            print(
+                f"Amount of extrusions was reduced to: {len(size_sequence)}. To avoid rooms, "
+                f"which are smaller than 1e-7"
+            )
+    else:
+        size_sequence = [1.0]
+
+    return [size * used_floor_area for size in size_sequence]
+
+
+def construct_random_floor(
+    random_seed,
+    used_floor_area=40,
+    amount_of_extrusions=3,
+    fac_from_square_room=0.0,
+    corridor_width=1.5,
+    amount_of_floor_cuts=2,
+    only_use_big_edges=True,
+):
+    """
+    Creates a random floor plan: a base room, which is cut a few times, and
+    extrusions along its bigger boundary edges. Seeds the random module, the
+    amount of random draws is the same as the one of the former bpy.ops
+    implementation.
+
+    Args:
+    - random_seed (int): seed of the random module
+    - used_floor_area (float): floor area of the whole room
+    - amount_of_extrusions (int): amount of sections, the base room included
+    - fac_from_square_room (float): how far the base room may deviate from a square
+    - corridor_width (float): boundary edges must be longer to be extruded
+    - amount_of_floor_cuts (int): amount of cuts of the biggest face
+    - only_use_big_edges (bool): only extrude the longer half of the edges
+
+    Returns:
+    - floor_plan (FloorPlan): the floor plan centered at the origin
+    """
+
+    random.seed(random_seed)
+
+    used_floor_areas = floor_area_sequence(used_floor_area, amount_of_extrusions)
+    amount_of_extrusions = len(used_floor_areas)
+
+    # the side lengths of the base room, for that the `fac_from_square_room` is used
+    squared_room_length = np.sqrt(used_floor_areas[0])
+    room_length_x = (
+        fac_from_square_room * random.uniform(-1, 1) * squared_room_length
+        + squared_room_length
+    )
+    # make sure that the floor area is still used
+    room_length_y = used_floor_areas[0] / room_length_x
+    floor_plan = FloorPlan.rectangle(room_length_x, room_length_y)
+
+    for _ in range(amount_of_floor_cuts):
+        # the face to cut is chosen before the new vertices are added
+        biggest_face_index = int(np.argmax(floor_plan.face_areas()))
+        cutting_point = (random.uniform(-1, 1), random.uniform(-1, 1))
+        # select a random axis to specify in which direction to cut
+        axis = 0 if random.uniform(0, 1) < 0.5 else 1
+        floor_plan.bisect(axis, cutting_point[axis], biggest_face_index)
+
+    # the first section is always the base room
+    for i in range(1, amount_of_extrusions):
+        # only edges wider than the corridor width are extruded, to avoid super
+        # small, super long pieces
+        boundary_edges = floor_plan.boundary_edges()
+        boundary_sizes = floor_plan.edge_lengths(boundary_edges)
+        wide_edges = np.flatnonzero(boundary_sizes > corridor_width)
+        if len(wide_edges) == 0:
+            raise RuntimeError(
+                "The corridor width is so big that no edge could be selected, "
+                "reduce the corridor width or reduce the amount of floor cuts."
+            )
+
+        wide_edges = wide_edges[np.argsort(boundary_sizes[wide_edges], kind="stable")]
+        # only use the bigger half of the boundaries
+        half_size = len(wide_edges) // 2 if only_use_big_edges else 0
+        used_edges = wide_edges[half_size:]
+
+        random_index = random.randrange(len(used_edges))
+        extrusion = None
+        for edge_counter in range(len(used_edges)):
+            edge_index = used_edges[(random_index + edge_counter) % len(used_edges)]
+            a, b = boundary_edges[edge_index]
+            direction = np.abs(floor_plan.vertices[a] - floor_plan.vertices[b])
+            # the shift value depends on the used_floor_area size
+            shift_value = used_floor_areas[i] / boundary_sizes[edge_index]
+
+            # the edges are aligned with the x-axis or the y-axis, the shift
+            # is orthogonal to it
+            if direction[0] < direction[1]:
+                shift = np.array([shift_value, 0.0])
+            else:
+                shift = np.array([0.0, shift_value])
+
+            edge_vertices = floor_plan.vertices[[a, b]]
+            for tested_shift in (shift, -shift):
+                new_vertices = np.vstack([edge_vertices, edge_vertices + tested_shift])
+                if not floor_plan.overlaps_faces(
+                    new_vertices.min(axis=0), new_vertices.max(axis=0)
+                ):
+                    extrusion = ((a, b), tested_shift)
+                    break
+            if extrusion is not None:
+                break
+
+        if extrusion is None:
+            raise RuntimeError(
+                "No edge found to extrude up on! The reason might be that there are to many cuts"
+                "in the basic room or that the corridor width is too high."
+            )
+
+        floor_plan.extrude_edge(*extrusion)
+        # remove all double vertices, which might occur
+        floor_plan.merge_doubles()
+
+    return floor_plan
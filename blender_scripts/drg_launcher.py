@@ -0,0 +1,341 @@
+"""
+Starts several headless Blender workers for one dataset run and merges their logs.
+Runs with a plain Python interpreter, Blender is only started as a subprocess.
+
+Usage:
+    python drg_launcher.py --blend dining_scene_render.blend --workers 8 --start 0 --count 5000 --out /data/run1
+    python drg_launcher.py --pipeline --blend dining_scene_render.blend --workers 2 --start 0 --count 5000 --out /data/run1
+"""
+
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+import drg_dataset
+
+BATCH_SCRIPT = pathlib.Path(__file__).resolve().parent / "drg_batch.py"
+
+
+def build_blender_command(args, threads=0):
+    command = [args.blender, "-b", args.blend]
+    if threads:
+        command.extend(["-t", str(threads)])
+    command.extend(
+        [
+            # Without it, Blender exits with 0 even if the script raised an error
+            "--python-exit-code",
+            "1",
+            "-P",
+            str(BATCH_SCRIPT),
+            "--",
+        ]
+    )
+
+    return command
+
+
+def build_worker_command(args, start_idx, amount_of_imgs):
+    command = build_blender_command(args, args.threads)
+    command.extend(
+        [
+            "--start",
+            str(start_idx),
+            "--count",
+            str(amount_of_imgs),
+            "--out",
+            args.out,
+            "--logger-name",
+            drg_dataset.shard_logger_name(args.logger_name, start_idx, amount_of_imgs),
+        ]
+    )
+    command.extend(["--seed", str(args.seed)])
+    if args.resume:
+        command.append("--resume")
+
+    return command
+
+
+def build_synthesizer_command(args):
+    # The synthesizer does not render, a single thread keeps the cores free
+    # for the renderers
+    command = build_blender_command(args, threads=1)
+    command.extend(
+        [
+            "--mode",
+            "synthesize",
+            "--queue",
+            args.queue,
+            "--max-queue",
+            str(args.max_queue),
+            "--start",
+            str(args.start),
+            "--count",
+            str(args.count),
+            "--out",
+            args.out,
+            "--logger-name",
+            args.logger_name,
+        ]
+    )
+    command.extend(["--seed", str(args.seed)])
+    if args.resume:
+        command.append("--resume")
+    if args.cost_model:
+        command.extend(["--cost-model", args.cost_model])
+
+    return command
+
+
+def build_renderer_command(args, renderer_idx):
+    command = build_blender_command(args, args.threads)
+    command.extend(
+        [
+            "--mode",
+            "consume",
+            "--queue",
+            args.queue,
+            "--logger-name",
+            f"{args.logger_name}_shard_renderer{renderer_idx}",
+        ]
+    )
+
+    return command
+
+
+def start_worker(command, log_path):
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+
+    return process, log_file
+
+
+def wait_for_worker(process, log_file):
+    """
+    Returns:
+    - success (bool): True if the worker exited with return code 0
+    """
+
+    return_code = process.wait()
+    log_file.close()
+    if return_code != 0:
+        print(f"Worker {process.pid} failed with return code {return_code}")
+
+    return return_code == 0
+
+
+def launch_workers(args):
+    """
+    Starts one Blender process per index slice and waits for all of them
+
+    Returns:
+    - failed_slices (list): (start_idx, amount_of_imgs) of every worker that failed
+    """
+
+    out_path = pathlib.Path(args.out)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    workers = []
+    for start_idx, amount_of_imgs in drg_dataset.split_index_range(
+        args.start, args.count, args.workers
+    ):
+        log_path = out_path / f"worker_{start_idx}-{start_idx + amount_of_imgs - 1}.log"
+        process, log_file = start_worker(
+            build_worker_command(args, start_idx, amount_of_imgs), log_path
+        )
+        print(
+            f"Started worker {process.pid} for images {start_idx} - "
+            f"{start_idx + amount_of_imgs - 1}, log: {log_path}"
+        )
+        workers.append((process, log_file, start_idx, amount_of_imgs))
+
+    failed_slices = []
+    for process, log_file, start_idx, amount_of_imgs in workers:
+        if not wait_for_worker(process, log_file):
+            failed_slices.append((start_idx, amount_of_imgs))
+
+    return failed_slices
+
+
+def launch_pipeline(args):
+    """
+    Starts one synthesizer, which randomizes the scenes into the queue folder,
+    and several renderers, which render them. Scene construction and path
+    tracing overlap instead of alternating.
+
+    Returns:
+    - failed_slices (list): (start_idx, amount_of_imgs), the whole run if any
+        worker failed, because the failed scenes are not known
+    """
+
+    out_path = pathlib.Path(args.out)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    scene_queue = drg_dataset.SceneQueue(args.queue, max_size=args.max_queue)
+    scene_queue.reset()
+
+    synthesizer = start_worker(
+        build_synthesizer_command(args), out_path / "synthesizer.log"
+    )
+    print(f"Started synthesizer {synthesizer[0].pid}, queue: {args.queue}")
+
+    renderers = []
+    for renderer_idx in range(args.workers):
+        renderers.append(
+            start_worker(
+                build_renderer_command(args, renderer_idx),
+                out_path / f"renderer_{renderer_idx}.log",
+            )
+        )
+        print(f"Started renderer {renderers[-1][0].pid}")
+
+    success = wait_for_worker(*synthesizer)
+    # Renderers exit as soon as the closed queue is empty
+    scene_queue.close()
+    for process, log_file in renderers:
+        success = wait_for_worker(process, log_file) and success
+
+    if not success or scene_queue.pending():
+        return [(args.start, args.count)]
+
+    return []
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="drg_launcher.py",
+        description="Render a randomized dining room dataset with several Blender workers.",
+    )
+    parser.add_argument("--blender", default="blender", help="Blender executable")
+    parser.add_argument("--blend", help="The dining_scene_render.blend file")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Amount of Blender workers",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Render threads per worker, 0 lets Blender decide",
+    )
+    parser.add_argument("--start", type=int, default=0, help="Index of the first image")
+    parser.add_argument(
+        "--count", type=int, default=1, help="Amount of images to render"
+    )
+    parser.add_argument(
+        "--out", required=True, help="Export folder for the images and the csv-file"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Base seed, image i uses seed + i. A random base seed is drawn and "
+        "shared by all workers if not set",
+    )
+    parser.add_argument(
+        "--logger-name",
+        default=drg_dataset.DEFAULT_LOGGER_NAME,
+        help="Name of the merged csv-file without extension",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="One synthesizer process randomizes the scenes, --workers renderer "
+        "processes render them",
+    )
+    parser.add_argument(
+        "--queue",
+        help="Queue folder of the pipeline mode, defaults to <out>/queue",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=4,
+        help="Amount of unrendered scenes after which the synthesizer waits",
+    )
+    parser.add_argument(
+        "--cost-model",
+        help="Render time model of drg_render_cost.py. Prints the estimated "
+        "duration before the run from the mean render time of the model. In the "
+        "pipeline mode the renderers take the queued scene with the highest "
+        "predicted render time first",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run, the other arguments must be the same "
+        "as in the interrupted run",
+    )
+    parser.add_argument(
+        "--keep-shards",
+        action="store_true",
+        help="Keep the shard csv-files after merging",
+    )
+    parser.add_argument(
+        "--merge-only",
+        action="store_true",
+        help="Only merge the shard csv-files in the export folder, e.g. from other machines",
+    )
+
+    args = parser.parse_args(argv)
+    if not args.merge_only and not args.blend:
+        parser.error("--blend is required unless --merge-only is set")
+    if args.seed is not None and not (
+        # np.random.seed only accepts seeds up to 2**32 - 1
+        0 <= args.seed
+        and args.seed + args.start + args.count - 1 <= 2**32 - 1
+    ):
+        parser.error(
+            "--seed must be at least 0 and seed + start + count - 1 at most 2**32 - 1"
+        )
+
+    return args
+
+
+def main(argv):
+    args = parse_args(argv)
+    args.out = str(pathlib.Path(args.out).resolve())
+    args.queue = str(pathlib.Path(args.queue or f"{args.out}/queue").resolve())
+    if args.seed is None:
+        # One base seed for all workers, so their seed ranges do not overlap
+        args.seed = drg_dataset.random_base_seed()
+        print(f"Base seed: {args.seed}")
+
+    if args.cost_model:
+        # numpy is only needed for the model
+        import drg_render_cost
+
+        args.cost_model = str(pathlib.Path(args.cost_model).resolve())
+        estimated_time = drg_render_cost.RenderTimeModel.load(
+            args.cost_model
+        ).estimate_total_time(args.count, args.workers)
+        print(f"Estimated render time: {estimated_time / 3600:.1f} h")
+
+    failed_slices = []
+    if not args.merge_only:
+        start_time = time.time()
+        if args.pipeline:
+            failed_slices = launch_pipeline(args)
+        else:
+            failed_slices = launch_workers(args)
+        print(f"Workers finished after {time.time() - start_time:.1f} s")
+
+    amount_of_rows = drg_dataset.merge_csv_shards(
+        args.out,
+        args.logger_name,
+        # Keep the shards of failed workers, so they can be inspected
+        remove_shards=not args.keep_shards and not failed_slices,
+    )
+    print(f"Merged {amount_of_rows} rows into {args.logger_name}.csv")
+
+    for start_idx, amount_of_imgs in failed_slices:
+        print(f"Images {start_idx} - {start_idx + amount_of_imgs - 1} are incomplete")
+
+    return 1 if failed_slices else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
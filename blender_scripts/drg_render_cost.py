@@ -0,0 +1,256 @@
+"""
+Render time prediction from the scene parameters logged by the DataLogger.
+
+This module must not import bpy, it is also used by plain Python processes.
+
+Usage:
+    python drg_render_cost.py fit --csv /data/run1/dining_room_dataset_logger.csv --out render_cost.json
+    python drg_render_cost.py estimate --model render_cost.json --count 5000 --workers 8
+"""
+
+import argparse
+import json
+import sys
+import warnings
+
+import numpy as np
+
+try:
+    from . import drg_dataset
+except ImportError:
+    import drg_dataset
+
+# Scene parameters that are known before rendering and influence the render time
+DEFAULT_FEATURES = [
+    "indoor_lighting",
+    "amount_of_lights",
+    "sun_intensity",
+    "sun_elevation",
+    "camera_focal_length",
+    "room_area",
+    "amount_of_windows",
+    "window_height",
+    "window_width",
+    "table_distribution_amount_of_knives",
+    "table_distribution_amount_of_spoons",
+    "table_distribution_amount_of_forks",
+    "table_distribution_amount_of_glasses",
+    "table_distribution_amount_of_plates",
+    "table_distribution_amount_of_distractors",
+    "table_distribution_amount_of_napkins",
+    "glass_lod",
+    "spoon_lod",
+]
+
+
+def parse_feature_value(value):
+    """
+    Converts a csv value into a number
+
+    Returns:
+    - number (float): The value, NaN if it is not numeric
+    """
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value in ("True", "False"):
+        return float(value == "True")
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class RenderTimeModel:
+    """Linear least squares model of the render time over scene parameters"""
+
+    def __init__(self, features=None, target="render_time"):
+        self.features = list(features or DEFAULT_FEATURES)
+        self.target = target
+        self.coefficients = np.zeros(len(self.features) + 1)
+        # Used for missing values of a row
+        self.feature_means = np.zeros(len(self.features))
+        self.mean_target = 0.0
+        self.rmse = 0.0
+        self.amount_of_samples = 0
+
+    def feature_matrix(self, rows):
+        features = np.array(
+            [
+                [parse_feature_value(row.get(feature)) for feature in self.features]
+                for row in rows
+            ],
+            dtype=np.float64,
+        ).reshape(len(rows), len(self.features))
+
+        missing = np.isnan(features)
+        features[missing] = np.take(self.feature_means, np.nonzero(missing)[1])
+
+        return np.hstack([np.ones((len(rows), 1)), features])
+
+    def fit(self, rows):
+        """
+        Fits the model to logged rows, rows without a valid target are skipped
+
+        Args:
+        - rows (list): csv rows as dicts, e.g. from drg_dataset.read_csv_rows
+
+        Returns:
+        - model (RenderTimeModel): self
+        """
+
+        rows = [
+            row
+            for row in rows
+            if np.isfinite(parse_feature_value(row.get(self.target)))
+        ]
+        if not rows:
+            raise ValueError(f"No rows with a valid {self.target} value")
+
+        targets = np.array([parse_feature_value(row[self.target]) for row in rows])
+
+        raw_features = np.array(
+            [
+                [parse_feature_value(row.get(feature)) for feature in self.features]
+                for row in rows
+            ],
+            dtype=np.float64,
+        ).reshape(len(rows), len(self.features))
+        with warnings.catch_warnings():
+            # Features without any numeric value get the mean 0
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.feature_means = np.nan_to_num(np.nanmean(raw_features, axis=0))
+
+        design_matrix = self.feature_matrix(rows)
+        # rcond=None drops directions without variance, e.g. constant features
+        self.coefficients = np.linalg.lstsq(design_matrix, targets, rcond=None)[0]
+
+        residuals = design_matrix @ self.coefficients - targets
+        self.rmse = float(np.sqrt(np.mean(residuals**2)))
+        self.mean_target = float(np.mean(targets))
+        self.amount_of_samples = len(rows)
+
+        return self
+
+    def predict(self, rows):
+        """
+        Returns:
+        - render_times (np.ndarray): The predicted render time of every row in seconds
+        """
+
+        if not rows:
+            return np.zeros(0)
+
+        return np.maximum(self.feature_matrix(rows) @ self.coefficients, 0.0)
+
+    def predict_row(self, row):
+        return float(self.predict([row])[0])
+
+    def estimate_total_time(self, amount_of_imgs, amount_of_workers=1):
+        """
+        Estimates the wall clock time of a run before its scenes are known, the
+        randomized scenes follow the distribution of the training rows. The
+        scene parameters do not exist before the scenes are randomized, so the
+        feature model can not be applied per image. The mean render time of the
+        training rows is used, which is also the mean prediction of the fitted
+        model over them. The workers are assumed to be loaded evenly.
+
+        Returns:
+        - seconds (float): Estimated render time of the whole run
+        """
+
+        return self.mean_target * amount_of_imgs / max(amount_of_workers, 1)
+
+    def to_dict(self):
+        return {
+            "features": self.features,
+            "target": self.target,
+            "coefficients": self.coefficients.tolist(),
+            "feature_means": self.feature_means.tolist(),
+            "mean_target": self.mean_target,
+            "rmse": self.rmse,
+            "amount_of_samples": self.amount_of_samples,
+        }
+
+    def save(self, filepath):
+        with open(filepath, "w") as model_file:
+            json.dump(self.to_dict(), model_file, indent=2)
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, "r") as model_file:
+            model_dict = json.load(model_file)
+
+        model = cls(features=model_dict["features"], target=model_dict["target"])
+        model.coefficients = np.array(model_dict["coefficients"])
+        model.feature_means = np.array(model_dict["feature_means"])
+        model.mean_target = model_dict["mean_target"]
+        model.rmse = model_dict["rmse"]
+        model.amount_of_samples = model_dict["amount_of_samples"]
+
+        return model
+
+
+def fit_from_csv_files(csv_paths, features=None):
+    rows = []
+    for csv_path in csv_paths:
+        rows.extend(drg_dataset.read_csv_rows(csv_path)[1])
+
+    return RenderTimeModel(features=features).fit(rows)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="drg_render_cost.py",
+        description="Fit and apply a render time model of the dining room dataset.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fit_parser = subparsers.add_parser("fit", help="Fit a model to logged runs")
+    fit_parser.add_argument(
+        "--csv", nargs="+", required=True, help="csv-files of previous runs"
+    )
+    fit_parser.add_argument("--out", required=True, help="json-file of the model")
+    fit_parser.add_argument(
+        "--features",
+        nargs="+",
+        default=None,
+        help="csv columns used as features, defaults to a set of cost relevant ones",
+    )
+
+    estimate_parser = subparsers.add_parser(
+        "estimate", help="Estimate the duration of a run"
+    )
+    estimate_parser.add_argument(
+        "--model", required=True, help="json-file of the model"
+    )
+    estimate_parser.add_argument("--count", type=int, required=True)
+    estimate_parser.add_argument("--workers", type=int, default=1)
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+
+    if args.command == "fit":
+        model = fit_from_csv_files(args.csv, features=args.features)
+        model.save(args.out)
+        print(
+            f"Fitted on {model.amount_of_samples} images: mean render time "
+            f"{model.mean_target:.1f} s, RMSE {model.rmse:.1f} s"
+        )
+    else:
+        model = RenderTimeModel.load(args.model)
+        seconds = model.estimate_total_time(args.count, args.workers)
+        print(
+            f"Estimated duration of {args.count} images with {args.workers} "
+            f"workers: {seconds / 3600:.1f} h"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,149 @@
+"""
+Index of a pre-baked library of sky environment images.
+
+This module must not import bpy, it is also used by plain Python processes.
+
+Every entry of the library is one point of a quantized grid over the
+parameters of the Nishita sky texture. The sun rotation is not part of the
+grid, it is applied by rotating the environment image, and the sun intensity
+only scales the sun disc, which is baked into its own image.
+"""
+
+import itertools
+import json
+import math
+import pathlib
+
+INDEX_FILE_NAME = "index.json"
+
+# parameter -> (minimum, maximum, amount of steps), the ranges of
+# LightingRandomizer.randomize_environment_lighting
+DEFAULT_SKY_GRID = {
+    "sun_elevation": (0.0, math.pi / 2, 16),
+    "air_density": (1.0, 2.0, 3),
+    "dust_density": (0.0, 10.0, 4),
+    "ozone_density": (1.0, 2.0, 2),
+}
+
+
+def quantized_values(minimum, maximum, steps):
+    if steps == 1:
+        return [(minimum + maximum) / 2]
+
+    return [minimum + (maximum - minimum) * i / (steps - 1) for i in range(steps)]
+
+
+def parse_grid_steps(grid_steps, grid=None):
+    """
+    Changes the amount of steps of grid parameters
+
+    Args:
+    - grid_steps (list): "parameter=steps" strings, e.g. ["dust_density=8"]
+    - grid (dict, optional): grid to change, defaults to DEFAULT_SKY_GRID
+
+    Returns:
+    - grid (dict): parameter -> (minimum, maximum, amount of steps)
+    """
+
+    grid = dict(grid or DEFAULT_SKY_GRID)
+    for grid_step in grid_steps:
+        parameter, _, steps = grid_step.partition("=")
+        if parameter not in grid or not steps.isdigit() or int(steps) < 1:
+            raise ValueError(f"Invalid sky grid step {grid_step}")
+        minimum, maximum, _ = grid[parameter]
+        grid[parameter] = (minimum, maximum, int(steps))
+
+    return grid
+
+
+def iter_grid(grid):
+    """
+    Yields:
+    - (entry_name, params): name of the entry and its parameter values
+    """
+
+    parameters = sorted(grid)
+    value_lists = [quantized_values(*grid[parameter]) for parameter in parameters]
+    for value_indices in itertools.product(
+        *[range(len(values)) for values in value_lists]
+    ):
+        entry_name = "sky_" + "_".join(str(i) for i in value_indices)
+        params = {
+            parameter: values[i]
+            for parameter, values, i in zip(parameters, value_lists, value_indices)
+        }
+        yield entry_name, params
+
+
+class SkyLibraryIndex:
+    """
+    The index.json of a sky library folder. Every entry holds its parameters
+    and the file names of the sky image without sun disc and of the sun disc
+    image at sun intensity 1.
+    """
+
+    def __init__(self, folder_path, grid, entries=None):
+        self.folder_path = pathlib.Path(folder_path)
+        self.grid = grid
+        # entry_name -> {"params": ..., "sky": ..., "disc": ...}
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, folder_path):
+        """
+        Returns:
+        - index (SkyLibraryIndex): None if the folder has no index
+        """
+
+        index_path = pathlib.Path(folder_path) / INDEX_FILE_NAME
+        if not index_path.exists():
+            return None
+
+        with open(index_path, "r") as index_file:
+            index_dict = json.load(index_file)
+
+        return cls(
+            folder_path,
+            {
+                parameter: tuple(grid_range)
+                for parameter, grid_range in index_dict["grid"].items()
+            },
+            index_dict["entries"],
+        )
+
+    def save(self):
+        self.folder_path.mkdir(parents=True, exist_ok=True)
+        with open(self.folder_path / INDEX_FILE_NAME, "w") as index_file:
+            json.dump(
+                {"grid": self.grid, "entries": self.entries}, index_file, indent=2
+            )
+
+    def add(self, entry_name, params, sky_file_name, disc_file_name):
+        self.entries[entry_name] = {
+            "params": params,
+            "sky": sky_file_name,
+            "disc": disc_file_name,
+        }
+
+    def nearest(self, params):
+        """
+        Finds the entry closest to the given parameters, every parameter is
+        measured in grid steps
+
+        Returns:
+        - (entry_name, entry): None if the library is empty
+        """
+
+        def distance(entry):
+            squared_distance = 0.0
+            for parameter, (minimum, maximum, steps) in self.grid.items():
+                step_size = (maximum - minimum) / max(steps - 1, 1) or 1.0
+                squared_distance += (
+                    (entry["params"][parameter] - params[parameter]) / step_size
+                ) ** 2
+            return squared_distance
+
+        if not self.entries:
+            return None
+
+        return min(self.entries.items(), key=lambda item: distance(item[1]))